@@ -0,0 +1,84 @@
+import argparse
+import json
+import random
+import sys
+from typing import Any, Callable, Optional
+from benchmarks.run import GRIDS, measure
+from kektris.blocks import Grid
+
+LARGE_CELLS = 256
+
+
+def grid_cases(
+    grid_class: type[Grid],
+    cells: int,
+        ) -> dict[str, tuple[Callable, Optional[Callable]]]:
+    """Get (func, setup) of whole grid paths for a half frozen grid
+    """
+    rng = random.Random(0)
+    positions = [
+        (x, y) for x in range(1, cells - 1) for y in range(1, cells - 1)
+        if rng.random() < 0.5
+            ]
+    blocked = [(cells // 2 + n, cells // 2) for n in range(4)]
+
+    def make() -> Grid:
+        grid = grid_class(cells)
+        for pos in positions:
+            grid.freeze(pos)
+        return grid
+
+    grid = make()
+    other = make()
+    other.freeze((0, 0))
+    snapshot, other_snapshot = grid.snapshot(), other.snapshot()
+
+    def blocked_grid() -> Grid:
+        for pos in blocked:
+            grid.block(pos)
+        return grid
+
+    def restore(_) -> None:
+        grid.restore(other_snapshot)
+        grid.restore(snapshot)
+
+    return {
+        'init': (lambda _: grid_class(cells), None),
+        'fill': (lambda _: make(), None),
+        'get_frozen': (lambda _: grid.get_frozen, None),
+        'get_clear': (lambda _: grid.get_clear, None),
+        'get_blocked': (lambda g: g.get_blocked, blocked_grid),
+        'freeze_blocked': (lambda g: g.freeze_blocked(), blocked_grid),
+        'clear_blocked': (lambda g: g.clear_blocked(), blocked_grid),
+        'has_frozen_border': (lambda _: grid.has_frozen_border(), None),
+        'snapshot_restore': (restore, None),
+            }
+
+
+def run(cells: int = LARGE_CELLS, repeat: int = 10) -> dict[str, Any]:
+    """Time whole grid paths of every grid backend
+    """
+    results = {}
+    for name, grid_class in GRIDS.items():
+        for case, (func, setup) in grid_cases(grid_class, cells).items():
+            results[f'{case}/{name}'] = measure(func, setup, repeat, number=1)
+    return {'cells': cells, 'repeat': repeat, 'results': results}
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark grid backends')
+    parser.add_argument('--cells', type=int, default=LARGE_CELLS)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--output', help='write results json to file')
+    args = parser.parse_args(argv)
+    result = run(args.cells, args.repeat)
+    for name, value in result['results'].items():
+        print(f'{name:<30}{value["median_us"]:>14.2f} us')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import argparse
+import json
+import random
+import sys
+import tracemalloc
+from typing import Any, Optional
+from benchmarks.run import GRIDS, engine_class
+
+
+def board_bytes(grid_class: type, boards: int = 100) -> float:
+    """Get traced bytes per engine with grid backend
+    """
+    engines = []
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    for n in range(boards):
+        engine = engine_class(grid_class)(random.Random(n))
+        # touch every cell like drawing and line checks do
+        for row in engine.grid.grid:
+            for cell in row:
+                cell.is_frozen
+        engines.append(engine)
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return size / boards
+
+
+def run(boards: int = 100) -> dict[str, Any]:
+    """Measure bytes per board for all grid backends
+    """
+    return {
+        'boards': boards,
+        'results': {
+            name: {'bytes_per_board': board_bytes(grid_class, boards)}
+            for name, grid_class in GRIDS.items()
+                },
+            }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Measure memory per board')
+    parser.add_argument('--boards', type=int, default=100)
+    parser.add_argument('--output', help='write results json to file')
+    args = parser.parse_args(argv)
+    result = run(args.boards)
+    for name, value in result['results'].items():
+        print(f'{name:<10}{value["bytes_per_board"]:>12.0f} bytes per board')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
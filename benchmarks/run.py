@@ -0,0 +1,354 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from functools import lru_cache
+from statistics import median
+from typing import Any, Callable, Optional
+from kektris.blocks import Grid, Figure, Window
+from kektris.bitboard import BitGrid
+from kektris.constraints import Direction, FigureOrientation
+from kektris.constraints import GameConst as const
+from kektris.engine import Engine
+
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+GRIDS: dict[str, type[Grid]] = {'grid': Grid, 'bit': BitGrid}
+try:
+    from kektris.arraygrid import ArrayGrid
+    GRIDS['array'] = ArrayGrid
+except ImportError:
+    pass
+
+# figure of every board falls down in the top quarter
+FIGURE_TOP_LEFT = (15, 1)
+FIGURE_ORIENTATION = FigureOrientation.T_U
+# line in the top quarter for shift of frozen
+SHIFT_LINE = [(x, 16) for x in range(10, 17)]
+
+
+def fill_empty(grid: Grid, rng: random.Random) -> None:
+    """Empty board
+    """
+
+
+def fill_sparse(grid: Grid, rng: random.Random) -> None:
+    """Fifth of inner cells are frozen
+    """
+    _fill(grid, rng, 0.2, 2)
+
+
+def fill_dense(grid: Grid, rng: random.Random) -> None:
+    """Half of inner cells are frozen
+    """
+    _fill(grid, rng, 0.5, 2)
+
+
+def fill_near_over(grid: Grid, rng: random.Random) -> None:
+    """Most of cells are frozen, up to the line next to the border
+    """
+    _fill(grid, rng, 0.8, 1)
+
+
+def fill_cascade(grid: Grid, rng: random.Random) -> None:
+    """Full 7x7 block in the top quarter with stacks over it:
+    every clear shifts frozen and makes the next line to clear
+    """
+    for x in range(10, 17):
+        for y in range(10, 17):
+            grid.freeze((x, y))
+        for y in range(2, 10):
+            if rng.random() < 0.5:
+                grid.freeze((x, y))
+
+
+def _fill(grid: Grid, rng: random.Random, density: float, margin: int) -> None:
+    for x in range(margin, grid.cells - margin):
+        for y in range(margin, grid.cells - margin):
+            if rng.random() < density:
+                grid.freeze((x, y))
+
+
+BOARDS: dict[str, Callable[[Grid, random.Random], None]] = {
+    'empty': fill_empty,
+    'sparse': fill_sparse,
+    'dense': fill_dense,
+    'near_over': fill_near_over,
+    'cascade': fill_cascade,
+        }
+
+
+@lru_cache(maxsize=None)
+def engine_class(grid_class: type[Grid], cells: Optional[int] = None) -> type[Engine]:
+    """Get engine class with given grid backend and size
+    """
+    return type('BenchEngine', (Engine, ), {'grid_class': grid_class, 'cells': cells})
+
+
+def make_engine(
+    board: str,
+    grid_class: type[Grid] = Grid,
+    cells: Optional[int] = None,
+        ) -> Engine:
+    """Make engine with board state and falling figure
+    """
+    engine = engine_class(grid_class, cells)(random.Random(0))
+    BOARDS[board](engine.grid, random.Random(board))
+    engine.figure = Figure(Window(
+        FIGURE_TOP_LEFT, FIGURE_ORIENTATION, engine.grid, Direction.DOWN
+            ))
+    return engine
+
+
+def measure(
+    func: Callable[[Any], Any],
+    setup: Optional[Callable[[], Any]] = None,
+    repeat: int = 50,
+    number: int = 20,
+        ) -> dict[str, float]:
+    """Time func in microseconds per call. Without setup func is called
+    number times per repeat with None, else setup result is passed
+    to a single timed call per repeat
+    """
+    timer = time.perf_counter
+    samples = []
+    for _ in range(repeat):
+        if setup is None:
+            start = timer()
+            for _ in range(number):
+                func(None)
+            samples.append((timer() - start) / number)
+        else:
+            state = setup()
+            start = timer()
+            func(state)
+            samples.append(timer() - start)
+    return {
+        'median_us': median(samples) * 1e6,
+        'min_us': min(samples) * 1e6,
+            }
+
+
+def core_cases(
+    board: str,
+    grid_class: type[Grid],
+    cells: Optional[int] = None,
+        ) -> dict[str, tuple[Callable, Optional[Callable]]]:
+    """Get (func, setup) of core paths for a board
+    """
+    engine = make_engine(board, grid_class, cells)
+    grid, figure = engine.grid, engine.figure
+    window = figure.window
+    moved = figure.move_figure(Direction.DOWN)
+
+    def fresh() -> Engine:
+        return make_engine(board, grid_class, cells)
+
+    def all_dirty() -> Engine:
+        for dim in (0, 1):
+            engine.grid.dirty_lines[dim].update(range(grid.cells))
+        return engine
+
+    def new_window(_) -> Window:
+        return Window(FIGURE_TOP_LEFT, FIGURE_ORIENTATION, grid, Direction.DOWN)
+
+    def map_window(_) -> None:
+        window._map_window = None
+        window.map_window
+
+    def scan_cells(_) -> int:
+        return sum(cell.is_frozen for row in grid.grid for cell in row)
+
+    def snapshot_restore(_) -> None:
+        snapshot = engine.snapshot()
+        figure.block_figure(moved)
+        grid.freeze_blocked()
+        engine.restore(snapshot)
+
+    def is_game_over(_) -> bool:
+        engine.is_over = False
+        return engine._is_game_over()
+
+    return {
+        'window_init': (new_window, None),
+        'map_window': (map_window, None),
+        'move_figure': (lambda _: figure.move_figure(Direction.LEFT), None),
+        'rotate_figure': (lambda _: figure.rotate_figure(Direction.RIGHT), None),
+        'is_valid_figure': (lambda _: figure.is_valid_figure(moved), None),
+        'block_figure': (lambda _: figure.block_figure(window), None),
+        'check_line': (lambda e: (e._check_line(0), e._check_line(1)), all_dirty),
+        'clear_rows': (lambda e: e._clear_rows(), fresh),
+        'get_shifted_frozen': (
+            lambda _: engine._get_shifted_frozen(SHIFT_LINE), None
+                ),
+        'snapshot_restore': (snapshot_restore, None),
+        'is_game_over': (is_game_over, None),
+        'scan_cells': (scan_cells, None),
+            }
+
+
+def draw_cases(board: str) -> dict[str, tuple[Callable, Optional[Callable]]]:
+    """Get (func, setup) of board drawing, if pyxel can be initialized
+    """
+    game = _get_game()
+    if game is None:
+        return {}
+    engine = make_engine(board, Grid)
+    pos = [(x, y) for x in range(12, 16) for y in range(0, 2)]
+
+    def cached() -> None:
+        game.cached_board = True
+        game.grid = engine.grid
+        for p in pos:
+            if engine.grid.is_clear(p):
+                engine.grid.block(p)
+            else:
+                engine.grid.clear(p)
+
+    def full() -> None:
+        game.cached_board = False
+        game.grid = engine.grid
+
+    return {
+        'draw_figures': (lambda _: game._draw_figures(), cached),
+        'draw_figures_uncached': (lambda _: game._draw_figures(), full),
+            }
+
+
+_game = None
+
+
+def _get_game():
+    """Make game once without pyxel loop
+    """
+    global _game
+    if _game is None:
+        try:
+            import pyxel
+            from kektris.kektris import Game
+            run, pyxel.run = pyxel.run, lambda *args, **kwargs: None
+            try:
+                _game = Game()
+            finally:
+                pyxel.run = run
+        except Exception as e:
+            print(f'draw benchmarks skipped: {e}', file=sys.stderr)
+            _game = False
+    return _game or None
+
+
+def run(
+    grid_name: str = 'grid',
+    repeat: int = 50,
+    boards: Optional[list[str]] = None,
+    draw: bool = True,
+    cells: Optional[int] = None,
+        ) -> dict[str, Any]:
+    """Run all benchmarks for all boards, board is drawn
+    only for default grid size
+    """
+    cells = cells or const.CELLS
+    results = {}
+    for board in boards or list(BOARDS):
+        cases = core_cases(board, GRIDS[grid_name], cells)
+        if draw and cells == const.CELLS:
+            cases.update(draw_cases(board))
+        for name, (func, setup) in cases.items():
+            results[f'{name}/{board}'] = measure(func, setup, repeat)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'grid': grid_name,
+            'cells': cells,
+            'repeat': repeat,
+                },
+        'results': results,
+            }
+
+
+def compare(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float
+        ) -> list[tuple[str, float, float, float]]:
+    """Get regressions as (name, baseline, current, ratio) for benchmarks,
+    which median is slower than baseline more then by threshold
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        base = baseline['results'][name]['median_us']
+        ratio = result['median_us'] / base if base else 1.0
+        if ratio > 1 + threshold:
+            regressions.append((name, base, result['median_us'], ratio))
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark game hot paths')
+    parser.add_argument('--grid', default='grid', choices=list(GRIDS))
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--board', action='append', choices=list(BOARDS))
+    parser.add_argument('--no-draw', action='store_true')
+    parser.add_argument(
+        '--cells', type=int, default=const.CELLS, help='grid size of boards'
+            )
+    parser.add_argument('--output', help='write results json to file')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.25,
+        help='allowed slowdown of median against baseline, 0.25 is 25%%',
+            )
+    parser.add_argument(
+        '--save-baseline', action='store_true', help='write results as baseline'
+            )
+    args = parser.parse_args(argv)
+    # pyxel.init changes working directory, so paths are resolved before
+    output = args.output and os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline)
+
+    current = run(args.grid, args.repeat, args.board, not args.no_draw, args.cells)
+    for name, result in current['results'].items():
+        print(f'{name:<40}{result["median_us"]:>12.2f} us')
+    if output:
+        with open(output, 'w') as f:
+            json.dump(current, f, indent=2)
+    if args.save_baseline:
+        with open(baseline_path, 'w') as f:
+            json.dump(current, f, indent=2)
+        return 0
+    if not os.path.exists(baseline_path):
+        print(f'no baseline {baseline_path}', file=sys.stderr)
+        return 0
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    if baseline['meta']['grid'] != current['meta']['grid']:
+        print(
+            f'baseline is made for {baseline["meta"]["grid"]} grid', file=sys.stderr
+                )
+        return 0
+    if baseline['meta'].get('cells') != current['meta']['cells']:
+        print(
+            f'baseline is made for {baseline["meta"].get("cells")} cells',
+            file=sys.stderr
+                )
+        return 0
+    regressions = compare(current, baseline, args.threshold)
+    for name, base, value, ratio in regressions:
+        print(
+            f'REGRESSION {name}: {base:.2f} us -> {value:.2f} us (x{ratio:.2f})',
+            file=sys.stderr
+                )
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
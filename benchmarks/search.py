@@ -0,0 +1,71 @@
+import argparse
+import json
+import sys
+import time
+from typing import Any, Optional
+from benchmarks.run import BOARDS, GRIDS, make_engine
+from kektris.search import PlacementSearch
+
+
+def placements_per_second(
+    board: str,
+    grid_class: type,
+    repeat: int = 5
+        ) -> dict[str, float]:
+    """Time search of all landings of board figure, tables of moves
+    are made before timing
+    """
+    engine = make_engine(board, grid_class)
+    landings = len(PlacementSearch(engine).find())
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        PlacementSearch(engine).find()
+        samples.append(time.perf_counter() - start)
+    best = min(samples)
+    return {
+        'landings': landings,
+        'search_ms': best * 1000,
+        'placements_per_second': landings / best,
+            }
+
+
+def run(
+    grid_name: str = 'grid',
+    repeat: int = 5,
+    boards: Optional[list[str]] = None,
+        ) -> dict[str, Any]:
+    """Measure search speed for all boards
+    """
+    return {
+        'grid': grid_name,
+        'repeat': repeat,
+        'results': {
+            board: placements_per_second(board, GRIDS[grid_name], repeat)
+            for board in boards or list(BOARDS)
+                },
+            }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Measure placements search speed')
+    parser.add_argument('--grid', default='grid', choices=list(GRIDS))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--board', action='append', choices=list(BOARDS))
+    parser.add_argument('--output', help='write results json to file')
+    args = parser.parse_args(argv)
+    result = run(args.grid, args.repeat, args.board)
+    for board, value in result['results'].items():
+        print(
+            f'{board:<12}{value["landings"]:>6} landings'
+            f'{value["search_ms"]:>10.2f} ms'
+            f'{value["placements_per_second"]:>10.0f} placements/s'
+                )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from statistics import median
+from typing import Any, Optional
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES: list[str] = [
+    'kektris.constraints',
+    'kektris.geometry',
+    'kektris.blocks',
+    'kektris.profiler',
+    'kektris.engine',
+    'kektris.search',
+    'kektris.replay',
+    'kektris.tournament',
+    'kektris.kektris',
+    'kektris.arraygrid',
+    'kektris.batch',
+        ]
+# module is imported after interpreter start, pyxel import is reported
+IMPORT = 'import sys, time; start = time.perf_counter(); import {module}; ' \
+    'print(time.perf_counter() - start, "pyxel" in sys.modules)'
+
+
+def import_time(module: str, repeat: int = 5) -> Optional[dict[str, Any]]:
+    """Time cold import of module in new interpreters, None if module
+    can not be imported (optional dependency is not installed)
+    """
+    samples = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-c', IMPORT.format(module=module)],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+                )
+        if result.returncode:
+            return None
+        seconds, pyxel = result.stdout.split()
+        samples.append(float(seconds))
+    return {
+        'median_ms': median(samples) * 1000,
+        'min_ms': min(samples) * 1000,
+        'pyxel': pyxel == 'True',
+            }
+
+
+def run(repeat: int = 5, modules: Optional[list[str]] = None) -> dict[str, Any]:
+    """Time cold import of every module
+    """
+    results = {}
+    for module in modules or MODULES:
+        result = import_time(module, repeat)
+        if result is not None:
+            results[module] = result
+    return {'repeat': repeat, 'results': results}
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Measure cold import time of modules')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--module', action='append', choices=MODULES)
+    parser.add_argument('--output', help='write results json to file')
+    args = parser.parse_args(argv)
+    result = run(args.repeat, args.module)
+    for module, value in result['results'].items():
+        pyxel = ' (pyxel)' if value['pyxel'] else ''
+        print(f'{module:<24}{value["median_ms"]:>10.2f} ms{pyxel}')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,265 @@
+import numpy as np
+from numpy.typing import NDArray
+from typing import Iterable, Optional
+from kektris.blocks import (
+    Grid,
+    CellView,
+    GridSnapshot,
+    WindowCache,
+    _ViewRows,
+    CLEAR,
+    BLOCK,
+    FROZEN,
+    STATES,
+        )
+from kektris.constraints import CellState
+from kektris.geometry import get_geometry, get_zobrist_keys
+
+
+class ArrayGrid(Grid):
+    """Grid of cells, which keeps cell states
+    in a single uint8 numpy array indexed as [x, y].
+    Frozen positions, line counts and bitmasks and Zobrist hash
+    are not kept on every change, they are made from the array, when asked,
+    only blocked positions, changed and dirty lines and number
+    of frozen border cells are kept
+    """
+
+    def __init__(self, cells: Optional[int] = None) -> None:
+        if cells:
+            self.cells = cells
+        self.geometry = get_geometry(self.cells)
+        self.states: NDArray[np.uint8] = np.full(
+            (self.cells, self.cells), CLEAR, dtype=np.uint8
+                )
+        self.blocked: set[tuple[int, int]] = set()
+        self.dirty_lines: tuple[set[int], set[int]] = (set(), set())
+        self.changed: set[tuple[int, int]] = set()
+        # number of frozen cells on grid border, game is over, if any
+        self.frozen_border: int = 0
+        self._border = self.geometry.border
+        # made from array, when asked, until grid is changed
+        self._snapshot: Optional[GridSnapshot] = None
+        self._lines: Optional[tuple[tuple[list[int], list[int]], ...]] = None
+        self._zobrist: Optional[int] = None
+        self.grid = _ViewRows(self)
+        self.windows = WindowCache(self)
+
+    @property
+    def array(self) -> NDArray[np.uint8]:
+        """Get read-only zero-copy view of cell states
+        """
+        view = self.states.view()
+        view.flags.writeable = False
+        return view
+
+    def _forget(self) -> None:
+        """Forget everything made from array
+        """
+        self._snapshot = None
+        self._lines = None
+        self._zobrist = None
+
+    def _positions(self, state: int) -> list[tuple[int, int]]:
+        """Get sorted positions of all cells with given state
+        """
+        return list(map(tuple, np.argwhere(self.states == state).tolist()))
+
+    def _cells(self, state: int) -> list[CellView]:
+        """Get cell views for all cells with given state
+        """
+        return [
+            CellView(self, x, y)
+            for x, y in np.argwhere(self.states == state).tolist()
+                ]
+
+    @property
+    def frozen(self) -> set[tuple[int, int]]:
+        """Get frozen positions
+        """
+        return set(self._positions(FROZEN))
+
+    @property
+    def line_counts(self) -> tuple[list[int], list[int]]:
+        """Get frozen cells count by line dimension: 0 - column x, 1 - row y
+        """
+        return self._get_lines()[0]
+
+    @property
+    def line_masks(self) -> tuple[list[int], list[int]]:
+        """Get frozen cells bitmasks by line dimension: bit y of column x
+        and bit x of row y
+        """
+        return self._get_lines()[1]
+
+    def _get_lines(self) -> tuple[tuple[list[int], list[int]], ...]:
+        """Count and pack frozen cells of all lines at once
+        """
+        if self._lines is None:
+            frozen = self.states == FROZEN
+            counts = (
+                np.count_nonzero(frozen, axis=1).tolist(),
+                np.count_nonzero(frozen, axis=0).tolist(),
+                    )
+            masks = tuple(
+                [
+                    int.from_bytes(line.tobytes(), 'little')
+                    for line in np.packbits(lines, axis=1, bitorder='little')
+                        ]
+                for lines in (frozen, frozen.T)
+                    )
+            self._lines = (counts, masks)
+        return self._lines
+
+    def _count_border(self) -> int:
+        """Count frozen cells on grid border in array
+        """
+        states = self.states
+        border = (states[0], states[-1], states[1:-1, 0], states[1:-1, -1])
+        return sum(int(np.count_nonzero(line == FROZEN)) for line in border)
+
+    def has_frozen_border(self) -> bool:
+        """Is any cell on the grid border frozen
+        """
+        return self.frozen_border > 0
+
+    @property
+    def _zobrist_keys(self) -> list[list[int]]:
+        return get_zobrist_keys(self.cells)
+
+    @property
+    def zobrist(self) -> int:
+        """Get Zobrist hash of frozen cells
+        """
+        if self._zobrist is None:
+            keys, zobrist = self._zobrist_keys, 0
+            for x, y in self._positions(FROZEN):
+                zobrist ^= keys[x][y]
+            self._zobrist = zobrist
+        return self._zobrist
+
+    def zobrist_with(self, positions: Iterable[tuple[int, int]]) -> int:
+        """Get Zobrist hash of grid as if given positions were frozen too
+        """
+        keys, zobrist = self._zobrist_keys, self.zobrist
+        for x, y in positions:
+            if self.states.item(x, y) != FROZEN:
+                zobrist ^= keys[x][y]
+        return zobrist
+
+    def restore(self, snapshot: GridSnapshot) -> None:
+        """Restore grid state from snapshot by array assignment
+        """
+        if snapshot is self._snapshot:
+            return
+        old = self.states.copy()
+        self.states.fill(CLEAR)
+        for positions, state in (
+            (snapshot.frozen, FROZEN), (snapshot.blocked, BLOCK)
+                ):
+            if positions:
+                self.states[tuple(zip(*positions))] = state
+        self.changed.update(
+            map(tuple, np.argwhere(old != self.states).tolist())
+                )
+        frozen = (self.states == FROZEN) & (old != FROZEN)
+        self.dirty_lines[0].update(np.flatnonzero(frozen.any(axis=1)).tolist())
+        self.dirty_lines[1].update(np.flatnonzero(frozen.any(axis=0)).tolist())
+        self.blocked.clear()
+        self.blocked.update(snapshot.blocked)
+        self.frozen_border = self._count_border()
+        self._forget()
+        self._snapshot = snapshot
+
+    @property
+    def get_clear(self) -> list[CellView]:
+        """Get all clear cell
+        """
+        return self._cells(CLEAR)
+
+    @property
+    def get_frozen(self) -> list[CellView]:
+        """Get all frozen cell
+        """
+        return self._cells(FROZEN)
+
+    def is_clear(self, pos: tuple[int, int]) -> bool:
+        """Is cell with given position clear
+        """
+        return self.states.item(pos) == CLEAR
+
+    def is_frozen(self, pos: tuple[int, int]) -> bool:
+        """Is cell with given position frozen
+        """
+        return self.states.item(pos) == FROZEN
+
+    def get_state(self, pos: tuple[int, int]) -> CellState:
+        """Get state of cell with given position
+        """
+        return STATES[self.states.item(pos)]
+
+    def set_state(self, pos: tuple[int, int], state: CellState) -> None:
+        """Set state of cell with given position
+        """
+        old, new = self.states.item(pos), state.value
+        if old == new:
+            return
+        self.states[pos] = new
+        self.changed.add(pos)
+        self._forget()
+        if old == BLOCK:
+            self.blocked.discard(pos)
+        elif old == FROZEN and pos in self._border:
+            self.frozen_border -= 1
+        if new == BLOCK:
+            self.blocked.add(pos)
+        elif new == FROZEN:
+            self.dirty_lines[0].add(pos[0])
+            self.dirty_lines[1].add(pos[1])
+            if pos in self._border:
+                self.frozen_border += 1
+
+    def freeze(self, pos: tuple[int, int]) -> None:
+        """Freeze cell with given position
+        """
+        self.set_state(pos, CellState.FR0ZEN)
+
+    def clear(self, pos: tuple[int, int]) -> None:
+        """Clear cell with given position
+        """
+        self.set_state(pos, CellState.CLEAR)
+
+    def block(self, pos: tuple[int, int]) -> None:
+        """Block cell with given position
+        """
+        self.set_state(pos, CellState.BLOCK)
+
+    def has_frozen(self, positions: Iterable[tuple[int, int]]) -> bool:
+        """Is any cell with given positions frozen
+        """
+        states = self.states
+        return any(states.item(pos) == FROZEN for pos in positions)
+
+    def freeze_blocked(self) -> None:
+        """Freeze all blocked cells
+        """
+        self._reset_blocked(FROZEN)
+
+    def clear_blocked(self) -> None:
+        """Clear all blocked cells
+        """
+        self._reset_blocked(CLEAR)
+
+    def _reset_blocked(self, state: int) -> None:
+        """Set given state to all blocked cells at once
+        """
+        if self.blocked:
+            xs, ys = zip(*self.blocked)
+            self.states[xs, ys] = state
+            if state == FROZEN:
+                self.dirty_lines[0].update(xs)
+                self.dirty_lines[1].update(ys)
+                self.frozen_border += len(self.blocked & self._border)
+            self.changed |= self.blocked
+            self.blocked.clear()
+            self._forget()
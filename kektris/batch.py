@@ -0,0 +1,349 @@
+import numpy as np
+from numpy.typing import NDArray
+from typing import Optional
+from kektris.bitboard import find_shifted
+from kektris.constraints import (
+    Action,
+    Direction,
+    FigureOrientation,
+        )
+from kektris.constraints import GameConst as const
+from kektris.geometry import Geometry, ROTATED, get_geometry
+
+
+# figure orientations and its cells offsets (col, row) in window
+ORIENTATIONS: list[FigureOrientation] = FigureOrientation.get_includes()
+ORIENTATION_INDEX: dict[FigureOrientation, int] = {
+    orientation: n for n, orientation in enumerate(ORIENTATIONS)
+        }
+OFFSETS: NDArray[np.int64] = np.array([
+    [
+        (col, row)
+        for row, maps in enumerate(orientation.value)
+        for col, m in enumerate(maps)
+        if m
+            ]
+    for orientation in ORIENTATIONS
+        ])
+
+
+# orientation index after rotation to the left (0) and to the right (1)
+ROTATE: NDArray[np.int64] = np.array([
+    [
+        ORIENTATION_INDEX[ROTATED[o, Direction.LEFT]],
+        ORIENTATION_INDEX[ROTATED[o, Direction.RIGHT]],
+            ]
+    for o in ORIENTATIONS
+        ])
+
+# move directions indexes by Direction value - 1
+DIRECTIONS: list[Direction] = Direction.get_includes()
+DELTA: NDArray[np.int64] = np.array([(-1, 0), (1, 0), (0, -1), (0, 1)])
+OPPOSITE: NDArray[np.int64] = np.array([1, 0, 3, 2])
+
+# move direction index (or -1) and rotation index (or -1) by Action value
+ACTION_MOVE: NDArray[np.int64] = np.full(len(Action) + 1, -1)
+ACTION_ROTATE: NDArray[np.int64] = np.full(len(Action) + 1, -1)
+for _action, _direction in [
+    (Action.MOVE_LEFT, Direction.LEFT),
+    (Action.MOVE_RIGHT, Direction.RIGHT),
+    (Action.MOVE_UP, Direction.UP),
+    (Action.MOVE_DOWN, Direction.DOWN),
+        ]:
+    ACTION_MOVE[_action.value] = _direction.value - 1
+ACTION_ROTATE[Action.ROTATE_LEFT.value] = 0
+ACTION_ROTATE[Action.ROTATE_RIGHT.value] = 1
+
+
+def quarter_bounds(geometry: Geometry) -> NDArray[np.int64]:
+    """Get (left, top, right, bottom) of quarters by move direction index
+    """
+    return np.array([
+        (q.left, q.top, q.right, q.bottom)
+        for q in (geometry.quarters[d] for d in DIRECTIONS)
+            ])
+
+
+def pack_mask(cells: NDArray[np.bool_]) -> int:
+    """Get bitmask of cells line, bit n is cell n
+    """
+    return int.from_bytes(np.packbits(cells, bitorder='little').tobytes(), 'little')
+
+
+def unpack_mask(mask: int, width: int) -> NDArray[np.bool_]:
+    """Get cells line of given width from bitmask
+    """
+    data = np.frombuffer(mask.to_bytes((width + 7) // 8, 'little'), np.uint8)
+    return np.unpackbits(data, count=width, bitorder='little').astype(np.bool_)
+
+
+def run_mask(frozen: NDArray[np.bool_], length: int) -> NDArray[np.bool_]:
+    """Mark cells of runs of at least length frozen cells
+    along last axis
+    """
+    shape = frozen.shape[:-1] + (1, )
+    total = np.concatenate(
+        [np.zeros(shape, np.int16), np.cumsum(frozen, axis=-1, dtype=np.int16)],
+        axis=-1
+            )
+    starts = (total[..., length:] - total[..., :-length]) == length
+    runs = np.zeros_like(frozen)
+    width = starts.shape[-1]
+    for n in range(length):
+        runs[..., n:n + width] |= starts
+    return runs
+
+
+class BatchEngine:
+    """Lockstep simulation of many independent boards.
+    Every board has its own figure, move direction and random stream,
+    boards state is kept in stacked numpy arrays. Moves, gravity,
+    collision, freeze and line search are vectorized over boards,
+    new figures and shifts of frozen cells after a clear are made
+    board by board in Python: they run only for boards, which figure
+    is frozen on the tick, that is about once per GAME_SPEED ticks
+    """
+    cells = const.CELLS
+
+    def __init__(
+        self,
+        boards: int,
+        seed: Optional[int] = None,
+        cells: Optional[int] = None,
+            ) -> None:
+        if cells:
+            self.cells = cells
+        self.boards = boards
+        self.seed = seed
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset all boards
+        """
+        n, cells = self.boards, self.cells
+        self.geometry: Geometry = get_geometry(cells)
+        self.quarter_bounds: NDArray[np.int64] = quarter_bounds(self.geometry)
+        self.rngs: list[np.random.Generator] = [
+            np.random.default_rng(s)
+            for s in np.random.SeedSequence(self.seed).spawn(n)
+                ]
+        self.frozen: NDArray[np.bool_] = np.zeros((n, cells, cells), np.bool_)
+        self.top_left: NDArray[np.int64] = np.zeros((n, 2), np.int64)
+        self.orientation: NDArray[np.int64] = np.zeros(n, np.int64)
+        self.direction: NDArray[np.int64] = np.zeros(n, np.int64)
+        self.score: NDArray[np.int64] = np.zeros(n, np.int64)
+        self.speed: NDArray[np.int64] = np.zeros(n, np.int64)
+        self.lines: NDArray[np.int64] = np.zeros(n, np.int64)
+        self.frame_count_from_last_move: NDArray[np.int64] = np.zeros(n, np.int64)
+        self.ticks: NDArray[np.int64] = np.zeros(n, np.int64)
+        self.is_over: NDArray[np.bool_] = np.zeros(n, np.bool_)
+        # boards with frozen border cells, checked only after freeze
+        self.frozen_border: NDArray[np.bool_] = np.zeros(n, np.bool_)
+        self._arrive_figures(np.arange(n))
+
+    @property
+    def blocked(self) -> NDArray[np.bool_]:
+        """Get blocked cells of current figures
+        """
+        blocked = np.zeros_like(self.frozen)
+        xs, ys, inb = self._cells(self.top_left, self.orientation)
+        b, c = np.nonzero(inb)
+        blocked[b, xs[b, c], ys[b, c]] = True
+        return blocked
+
+    def _generate_figure_start_position(
+        self,
+        board: int
+            ) -> tuple[tuple[int, int], FigureOrientation]:
+        """Genrate random start position for a board
+        """
+        rng = self.rngs[board]
+        arrive = self.geometry.arrive
+        top_left = arrive[rng.integers(len(arrive))]
+        return top_left, ORIENTATIONS[rng.integers(len(ORIENTATIONS))]
+
+    def _arrive_figures(self, boards: NDArray[np.int64]) -> None:
+        """Arrive new figures on boards, one by one: every board
+        takes its start position from its own random stream
+        """
+        for b in boards.tolist():
+            top_left, orientation = self._generate_figure_start_position(b)
+            self.top_left[b] = top_left
+            self.orientation[b] = ORIENTATION_INDEX[orientation]
+            self.direction[b] = self.geometry.arrive_directions[top_left].value - 1
+
+    def _cells(
+        self,
+        top_left: NDArray[np.int64],
+        orientation: NDArray[np.int64]
+            ) -> tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.bool_]]:
+        """Get figures cells coordinates and in-bounds mask
+        """
+        cells = top_left[:, None, :] + OFFSETS[orientation]
+        xs, ys = cells[..., 0], cells[..., 1]
+        inb = (xs >= 0) & (xs < self.cells) & (ys >= 0) & (ys < self.cells)
+        return xs, ys, inb
+
+    def _is_valid(
+        self,
+        boards: NDArray[np.int64],
+        top_left: NDArray[np.int64],
+        orientation: NDArray[np.int64],
+            ) -> tuple[NDArray[np.bool_], NDArray[np.bool_]]:
+        """Check figures are in quarter and do not overlap frozen cells,
+        return valid mask and full on grid mask
+        """
+        xs, ys, inb = self._cells(top_left, orientation)
+        bounds = self.quarter_bounds[self.direction[boards]]
+        in_quarter = (xs >= bounds[:, None, 0]) & (xs < bounds[:, None, 2]) \
+            & (ys >= bounds[:, None, 1]) & (ys < bounds[:, None, 3])
+        last = self.cells - 1
+        hit = self.frozen[
+            boards[:, None], np.clip(xs, 0, last), np.clip(ys, 0, last)
+                ] & inb
+        valid = (in_quarter | ~inb).all(axis=1) & ~hit.any(axis=1)
+        return valid, inb.all(axis=1)
+
+    def _check_border(self, boards: NDArray[np.int64]) -> None:
+        """Check border of boards, which frozen cells are changed
+        """
+        f = self.frozen[boards]
+        self.frozen_border[boards] = f[:, 0, :].any(axis=1) | f[:, -1, :].any(axis=1) \
+            | f[:, :, 0].any(axis=1) | f[:, :, -1].any(axis=1)
+
+    def _move_figures(self, boards: NDArray[np.int64], moves: NDArray[np.int64]) -> None:
+        """Move figures by player
+        """
+        allowed = moves != OPPOSITE[self.direction[boards]]
+        boards, moves = boards[allowed], moves[allowed]
+        _, _, inb = self._cells(self.top_left[boards], self.orientation[boards])
+        on_grid = inb.any(axis=1)
+        boards, moves = boards[on_grid], moves[on_grid]
+        top_left = self.top_left[boards] + DELTA[moves]
+        valid, full = self._is_valid(boards, top_left, self.orientation[boards])
+        ok = valid & full
+        self.top_left[boards[ok]] = top_left[ok]
+
+    def _rotate_figures(self, boards: NDArray[np.int64], rotations: NDArray[np.int64]) -> None:
+        """Rotate figures by player
+        """
+        _, _, inb = self._cells(self.top_left[boards], self.orientation[boards])
+        on_grid = inb.any(axis=1)
+        boards, rotations = boards[on_grid], rotations[on_grid]
+        orientation = ROTATE[self.orientation[boards], rotations]
+        valid, full = self._is_valid(boards, self.top_left[boards], orientation)
+        ok = valid & full
+        self.orientation[boards[ok]] = orientation[ok]
+
+    def _freeze_figures(self, boards: NDArray[np.int64]) -> None:
+        """Freeze figures cells
+        """
+        xs, ys, inb = self._cells(self.top_left[boards], self.orientation[boards])
+        b, c = np.nonzero(inb)
+        self.frozen[boards[b], xs[b, c], ys[b, c]] = True
+
+    def step(self, actions: Optional[NDArray[np.int64]] = None) -> None:
+        """Advance all boards by one tick with Action values for every board
+        """
+        self.is_over |= self.frozen_border
+        active = ~self.is_over
+        self.ticks[active] += 1
+
+        if actions is not None:
+            moves = ACTION_MOVE[actions]
+            boards = np.nonzero(active & (moves >= 0))[0]
+            if len(boards):
+                self._move_figures(boards, moves[boards])
+            rotations = ACTION_ROTATE[actions]
+            boards = np.nonzero(active & (rotations >= 0))[0]
+            if len(boards):
+                self._rotate_figures(boards, rotations[boards])
+
+        gravity = active & (
+            self.frame_count_from_last_move == const.GAME_SPEED - self.speed
+                )
+        self.frame_count_from_last_move[active & ~gravity] += 1
+        boards = np.nonzero(gravity)[0]
+        if not len(boards):
+            return
+
+        self.frame_count_from_last_move[boards] = 0
+        top_left = self.top_left[boards] + DELTA[self.direction[boards]]
+        valid, _ = self._is_valid(boards, top_left, self.orientation[boards])
+        self.top_left[boards[valid]] = top_left[valid]
+
+        locked = boards[~valid]
+        if len(locked):
+            self._freeze_figures(locked)
+            self._clear_rows(locked)
+            self._check_border(locked)
+            self._arrive_figures(locked)
+
+    def _clear_rows(self, boards: NDArray[np.int64]) -> None:
+        """Clear filled lines on boards, while any line is ready to clear
+        """
+        length = const.CLEAR_LENGTH
+        while len(boards):
+            frozen = self.frozen[boards]
+            # runs along y for columns (dimension 0) and along x for rows
+            col_runs = run_mask(frozen, length)
+            row_runs = np.swapaxes(run_mask(np.swapaxes(frozen, 1, 2), length), 1, 2)
+            has_col = col_runs.any(axis=2)
+            has_row = row_runs.any(axis=1)
+            by_col = has_col.any(axis=1)
+            by_row = ~by_col & has_row.any(axis=1)
+
+            line = np.zeros_like(frozen)
+            m = np.nonzero(by_col)[0]
+            x = has_col[m].argmax(axis=1)
+            line[m, x, :] = col_runs[m, x, :]
+            m = np.nonzero(by_row)[0]
+            y = has_row[m].argmax(axis=1)
+            line[m, :, y] = row_runs[m, :, y]
+
+            cleared = by_col | by_row
+            boards, line = boards[cleared], line[cleared]
+            count = line.sum(axis=(1, 2))
+            self.frozen[boards] &= ~line
+            self.score[boards] += count * const.PRIZE_BY_CLEAR
+            # Engine adds a prize and at most one speed per cleared cell,
+            # while speed is less than score // SPEED_MODIFICATOR. With
+            # the same prize for every cell it is the same as to add
+            # the count of cells up to score // SPEED_MODIFICATOR at once
+            self.speed[boards] = np.minimum(
+                self.speed[boards] + count,
+                self.score[boards] // const.SPEED_MODIFICATOR,
+                    )
+            self.lines[boards] += 1
+            for b, cells in zip(boards.tolist(), line):
+                self._shift_frozen(b, cells)
+
+    def _shift_frozen(self, board: int, line: NDArray[np.bool_]) -> None:
+        """Move frozen cells of the quarter to the cleared line of a board.
+        Runs in Python only for boards with cleared line, same as Engine
+        shift by bitmasks of columns or rows along move direction
+        """
+        cells = self.cells
+        frozen = self.frozen[board]
+        direction = self.direction[board]
+        quarter = self.geometry.quarters[DIRECTIONS[direction]]
+        s_x, s_y = (-DELTA[direction]).tolist()
+        # lanes are the first axis: columns x or rows y of transposed views
+        if s_y:
+            step, low, high = s_y, quarter.top, quarter.bottom
+            in_quarter = range(quarter.left, quarter.right)
+        else:
+            frozen, line = frozen.T, line.T
+            step, low, high = s_x, quarter.left, quarter.right
+            in_quarter = range(quarter.top, quarter.bottom)
+        quarter_mask = (1 << min(high, cells)) - (1 << max(low, 0))
+
+        lanes = [
+            n for n in np.nonzero(line.any(axis=1))[0].tolist() if n in in_quarter
+                ]
+        masks = [(pack_mask(line[n]), pack_mask(frozen[n]), quarter_mask) for n in lanes]
+        for n, (_, mask, _), shifted in zip(lanes, masks, find_shifted(masks, step, cells)):
+            if shifted:
+                # cells move one step to the line
+                mask = mask & ~shifted | (shifted >> 1 if step > 0 else shifted << 1)
+                frozen[n] = unpack_mask(mask, cells)
@@ -0,0 +1,203 @@
+from typing import Iterable, Iterator, Optional
+from kektris.blocks import Grid, CellView, _ViewRows
+from kektris.constraints import CellState
+from kektris.geometry import Placement
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Iterate indexes of set bits from lowest to highest
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def find_runs(mask: int, length: int) -> int:
+    """Get bits of all runs of at least length consecutive set bits
+    """
+    starts, n = mask, 1
+    while n < length:
+        step = min(n, length - n)
+        starts &= starts >> step
+        n += step
+    runs, n = starts, 1
+    while n < length:
+        step = min(n, length - n)
+        runs |= runs << step
+        n += step
+    return runs
+
+
+def find_line_runs(
+    masks: list[int],
+    length: int,
+    lines: Optional[Iterable[int]] = None,
+        ) -> dict[int, int]:
+    """Get runs bits of at least length for every line bitmask with runs,
+    only given lines are checked, if any
+    """
+    runs = {}
+    for n in range(len(masks)) if lines is None else lines:
+        mask = masks[n]
+        if mask and (bits := find_runs(mask, length)):
+            runs[n] = bits
+    return runs
+
+
+def find_shifted(lanes: list[tuple[int, int, int]], step: int, width: int) -> list[int]:
+    """Get bits of frozen cells to shift to the cleared line for every lane
+    given as (line, frozen, quarter) bitmasks of width, where cells
+    behind the line are at higher bits for step 1 and lower for step -1.
+    Shifted are frozen cells in quarter next to frozen or line cell
+    at distance from the line up to the first distance, where no lane
+    has such cell
+    """
+    goods = []
+    # bit k (step 1) or bit width - k (step -1) is set,
+    # if any lane has cell to shift at distance k
+    hits = 0
+    for line, frozen, quarter in lanes:
+        near = (frozen | line) << 1 if step > 0 else (frozen | line) >> 1
+        good = frozen & quarter & ~line & near
+        goods.append(good)
+        for n in iter_bits(line if good else 0):
+            if step > 0:
+                hits |= good >> n
+            else:
+                hits |= (good & ((1 << n) - 1)) << (width - n)
+    if step > 0:
+        run = hits >> 1
+        distance = (~run & (run + 1)).bit_length() - 1
+    else:
+        distance = width - (~hits & ((1 << width) - 1)).bit_length()
+
+    span = (1 << distance) - 1
+    shifted = []
+    for (line, _, _), good in zip(lanes, goods):
+        band = 0
+        for n in iter_bits(line if good and span else 0):
+            band |= span << (n + 1) if step > 0 else (span << n) >> distance
+        shifted.append(good & band)
+    return shifted
+
+
+class BitGrid(Grid):
+    """Grid of cells, which keeps no cells: frozen states are the integer
+    bitmasks of grid lines (bit x of row y and bit y of column x),
+    blocked states are the blocked positions of grid
+    """
+
+    def _make_grid(self) -> _ViewRows:
+        """Make lazy cell views matrix
+        """
+        return _ViewRows(self)
+
+    @property
+    def frozen_cols(self) -> list[int]:
+        """Get frozen bitmasks of columns
+        """
+        return self.line_masks[0]
+
+    @property
+    def frozen_rows(self) -> list[int]:
+        """Get frozen bitmasks of rows
+        """
+        return self.line_masks[1]
+
+    @classmethod
+    def from_grid(cls, grid: Grid) -> 'BitGrid':
+        """Make bitboard copy of any grid
+        """
+        bit_grid = cls(grid.cells)
+        for cell in grid.get_frozen:
+            bit_grid.freeze(cell.pos)
+        for cell in grid.get_blocked:
+            bit_grid.block(cell.pos)
+        return bit_grid
+
+    def _cells(self, cols: list[int]) -> list[CellView]:
+        """Get cell views for columns bitmasks
+        """
+        return [
+            CellView(self, x, y)
+            for x, col in enumerate(cols)
+            for y in iter_bits(col)
+                ]
+
+    @property
+    def get_clear(self) -> list[CellView]:
+        """Get all clear cell
+        """
+        cols = [~col for col in self.frozen_cols]
+        for x, y in self.blocked:
+            cols[x] &= ~(1 << y)
+        full = (1 << self.cells) - 1
+        return self._cells([full & col for col in cols])
+
+    def is_clear(self, pos: tuple[int, int]) -> bool:
+        """Is cell with given position clear
+        """
+        return not self.is_frozen(pos) and pos not in self.blocked
+
+    def is_frozen(self, pos: tuple[int, int]) -> bool:
+        """Is cell with given position frozen
+        """
+        return bool(self.line_masks[0][pos[0]] >> pos[1] & 1)
+
+    def get_state(self, pos: tuple[int, int]) -> CellState:
+        """Get state of cell with given position
+        """
+        if self.is_frozen(pos):
+            return CellState.FR0ZEN
+        if pos in self.blocked:
+            return CellState.BLOCK
+        return CellState.CLEAR
+
+    def set_state(self, pos: tuple[int, int], state: CellState) -> None:
+        """Set state of cell with given position, line bitmasks
+        and blocked positions are kept by grid on change
+        """
+        old = self.get_state(pos)
+        if old != state:
+            self._on_change(pos, old, state)
+
+    def freeze(self, pos: tuple[int, int]) -> None:
+        """Freeze cell with given position
+        """
+        self.set_state(pos, CellState.FR0ZEN)
+
+    def clear(self, pos: tuple[int, int]) -> None:
+        """Clear cell with given position
+        """
+        self.set_state(pos, CellState.CLEAR)
+
+    def block(self, pos: tuple[int, int]) -> None:
+        """Block cell with given position
+        """
+        self.set_state(pos, CellState.BLOCK)
+
+    def collides(self, placement: Placement) -> bool:
+        """Is any cell of placement frozen
+        """
+        frozen = self.line_masks[1]
+        for y, bits in placement.rows:
+            if frozen[y] & bits:
+                return True
+        return False
+
+    def freeze_blocked(self) -> None:
+        """Freeze all blocked cells
+        """
+        self._reset_blocked(CellState.FR0ZEN)
+
+    def clear_blocked(self) -> None:
+        """Clear all blocked cells
+        """
+        self._reset_blocked(CellState.CLEAR)
+
+    def _reset_blocked(self, state: CellState) -> None:
+        """Give blocked cells given state, only their lines are changed
+        """
+        for pos in list(self.blocked):
+            self._on_change(pos, CellState.BLOCK, state)
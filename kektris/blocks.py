@@ -1,27 +1,46 @@
-from typing import TypeAlias, Optional
+from collections import OrderedDict
+from typing import TypeAlias, Optional, Iterable, NamedTuple
 from kektris.constraints import (
     Direction,
-    Orientation,
     CellState,
     FigureOrientation,
         )
 from kektris.constraints import GameConst as const
+from kektris.geometry import (
+    Placement,
+    ROTATED,
+    KICKS,
+    get_geometry,
+    get_placement_table,
+    get_zobrist_keys,
+        )
+
+
+# cell states as small ints and back
+CLEAR = CellState.CLEAR.value
+BLOCK = CellState.BLOCK.value
+FROZEN = CellState.FR0ZEN.value
+STATES: dict[int, CellState] = {state.value: state for state in CellState}
 
 
 class Cell:
     """This class represent a cell of grid
     """
+    __slots__ = ('_pos', '_state', '_grid')
     pixel_size = 5
 
     def __init__(
         self, x: int,
         y: int,
-        state: CellState = CellState.CLEAR
+        state: CellState = CellState.CLEAR,
+        grid: Optional['Grid'] = None,
             ) -> None:
-        self.x = x
-        self.y = y
-        self.state = state
-        self._pos = (x, y)
+        # position is shared by cells of grids of the same size,
+        # cells without grid share positions of default grid
+        geometry = get_geometry(const.CELLS) if grid is None else grid.geometry
+        self._pos = geometry.position(x, y)
+        self._state: int = state.value
+        self._grid = grid
 
     def __repr__(self) -> str:
         return f'Cell with position ({self.x}, {self.y}), state: {self.state.name}'
@@ -32,20 +51,44 @@ class Cell:
         """
         return self._pos
 
+    @property
+    def x(self) -> int:
+        return self._pos[0]
+
+    @property
+    def y(self) -> int:
+        return self._pos[1]
+
+    @property
+    def state(self) -> CellState:
+        """Return current state
+        """
+        return STATES[self._state]
+
+    @state.setter
+    def state(self, state: CellState) -> None:
+        self._set_state(state.value)
+
+    def _set_state(self, state: int) -> None:
+        if state != self._state:
+            old, self._state = self._state, state
+            if self._grid is not None:
+                self._grid._on_change(self._pos, STATES[old], STATES[state])
+
     @property
     def is_frozen(self) -> bool:
-        return self.state == CellState.FR0ZEN
+        return self._state == FROZEN
 
     @property
     def is_clear(self) -> bool:
-        return self.state == CellState.CLEAR
+        return self._state == CLEAR
 
     @property
     def is_blocked(self) -> bool:
-        return self.state == CellState.BLOCK
+        return self._state == BLOCK
 
     def __hash__(self) -> int:
-        return hash(self.pos)
+        return hash(self._pos)
 
     def __eq__(self, other) -> bool:
         if isinstance(other, Cell):
@@ -55,38 +98,228 @@ class Cell:
     def freeze(self) -> None:
         """Freeze cell
         """
-        self.state = CellState.FR0ZEN
+        self._set_state(FROZEN)
 
     def clear(self) -> None:
         """Clear the cell
         """
-        self.state = CellState.CLEAR
+        self._set_state(CLEAR)
 
     def block(self) -> None:
         """Block the cell
         """
-        self.state = CellState.BLOCK
+        self._set_state(BLOCK)
+
+
+class CellView(Cell):
+    """Cell-like view of a position on a grid, which
+    keeps cell states in its own storage
+    """
+    __slots__ = ('grid', )
+
+    def __init__(self, grid: 'Grid', x: int, y: int) -> None:
+        self.grid = grid
+        self._pos = grid.geometry.position(x, y)
+
+    @property
+    def state(self) -> CellState:
+        """Get state from grid storage
+        """
+        return self.grid.get_state(self._pos)
+
+    @state.setter
+    def state(self, state: CellState) -> None:
+        self.grid.set_state(self._pos, state)
+
+    def _set_state(self, state: int) -> None:
+        self.grid.set_state(self._pos, STATES[state])
+
+    @property
+    def is_frozen(self) -> bool:
+        return self.grid.is_frozen(self._pos)
+
+    @property
+    def is_clear(self) -> bool:
+        return self.grid.is_clear(self._pos)
+
+    @property
+    def is_blocked(self) -> bool:
+        return self.grid.is_blocked(self._pos)
+
+
+def _grid_index(index: int, size: int) -> int:
+    """Normalize index like list indexing does
+    """
+    if index < 0:
+        index += size
+    if not 0 <= index < size:
+        raise IndexError('grid index out of range')
+    return index
+
+
+class _ViewRow:
+    """Row of cell views, supports row[y] indexing
+    """
+    __slots__ = ('_grid', '_x')
+
+    def __init__(self, grid: 'Grid', x: int) -> None:
+        self._grid = grid
+        self._x = x
+
+    def __len__(self) -> int:
+        return self._grid.cells
+
+    def __getitem__(self, y: int) -> CellView:
+        return CellView(self._grid, self._x, _grid_index(y, self._grid.cells))
+
+
+class _ViewRows:
+    """Lazy replacement of cells matrix, supports grid[x][y] indexing
+    """
+    __slots__ = ('_grid',)
+
+    def __init__(self, grid: 'Grid') -> None:
+        self._grid = grid
+
+    def __len__(self) -> int:
+        return self._grid.cells
+
+    def __getitem__(self, x: int) -> _ViewRow:
+        return _ViewRow(self._grid, _grid_index(x, self._grid.cells))
 
 
 Cells: TypeAlias = list[list[Cell]]
 
 
+class GridSnapshot(NamedTuple):
+    """Immutable state of grid: frozen and blocked positions
+    """
+    frozen: frozenset[tuple[int, int]]
+    blocked: frozenset[tuple[int, int]]
+
+
 class Grid:
     """This class represent a grid of cells
     """
-    cells = 34
-
-    def __init__(self) -> None:
+    cells = const.CELLS
+
+    def __init__(self, cells: Optional[int] = None) -> None:
+        if cells:
+            self.cells = cells
+        # arrive positions, quarters and border of grid size
+        self.geometry = get_geometry(self.cells)
+        self.frozen: set[tuple[int, int]] = set()
+        self.blocked: set[tuple[int, int]] = set()
+        # frozen cells count and lines with new frozen cells
+        # by line dimension: 0 - column x, 1 - row y
+        self.line_counts: tuple[list[int], list[int]] = (
+            [0] * self.cells, [0] * self.cells
+                )
+        # frozen cells bitmasks by line dimension: bit y of column x
+        # and bit x of row y
+        self.line_masks: tuple[list[int], list[int]] = (
+            [0] * self.cells, [0] * self.cells
+                )
+        self.dirty_lines: tuple[set[int], set[int]] = (set(), set())
+        # number of frozen cells on grid border, game is over, if any
+        self.frozen_border: int = 0
+        self._border = self.geometry.border
+        # positions with changed state since last pop_changed
+        self.changed: set[tuple[int, int]] = set()
+        # last snapshot, it is shared until grid is changed
+        self._snapshot: Optional[GridSnapshot] = None
+        # Zobrist hash of frozen cells: xor of keys of frozen positions
+        self.zobrist: int = 0
+        self._zobrist_keys = get_zobrist_keys(self.cells)
         self.grid: Cells = self._make_grid()
+        # windows of figures moved on this grid
+        self.windows = WindowCache(self)
 
     def _make_grid(self) -> list[list[Cells]]:
         """Make grid matrix
         """
         return [
-            [Cell(x, y) for y in range(self.cells)]
+            [Cell(x, y, grid=self) for y in range(self.cells)]
             for x in range(self.cells)
                 ]
 
+    def _on_change(
+        self,
+        pos: tuple[int, int],
+        old: CellState,
+        new: CellState
+            ) -> None:
+        """Update positions indexes, when cell state is changed
+        """
+        x, y = pos
+        self.changed.add(pos)
+        self._snapshot = None
+        if old == CellState.FR0ZEN:
+            self.frozen.discard(pos)
+            self.zobrist ^= self._zobrist_keys[x][y]
+            if pos in self._border:
+                self.frozen_border -= 1
+            self.line_counts[0][x] -= 1
+            self.line_counts[1][y] -= 1
+            self.line_masks[0][x] &= ~(1 << y)
+            self.line_masks[1][y] &= ~(1 << x)
+        elif old == CellState.BLOCK:
+            self.blocked.discard(pos)
+        if new == CellState.FR0ZEN:
+            self.frozen.add(pos)
+            self.zobrist ^= self._zobrist_keys[x][y]
+            if pos in self._border:
+                self.frozen_border += 1
+            self.line_counts[0][x] += 1
+            self.line_counts[1][y] += 1
+            self.line_masks[0][x] |= 1 << y
+            self.line_masks[1][y] |= 1 << x
+            self.dirty_lines[0].add(x)
+            self.dirty_lines[1].add(y)
+        elif new == CellState.BLOCK:
+            self.blocked.add(pos)
+
+    def zobrist_with(self, positions: Iterable[tuple[int, int]]) -> int:
+        """Get Zobrist hash of grid as if given positions were frozen too
+        """
+        keys, zobrist = self._zobrist_keys, self.zobrist
+        for x, y in positions:
+            if (x, y) not in self.frozen:
+                zobrist ^= keys[x][y]
+        return zobrist
+
+    def pop_changed(self) -> set[tuple[int, int]]:
+        """Get positions with changed state and forget them
+        """
+        changed, self.changed = self.changed, set()
+        return changed
+
+    def snapshot(self) -> GridSnapshot:
+        """Get immutable state of grid. Snapshots of unchanged grid
+        are the same object
+        """
+        if self._snapshot is None:
+            self._snapshot = GridSnapshot(
+                frozenset(self.frozen), frozenset(self.blocked)
+                    )
+        return self._snapshot
+
+    def restore(self, snapshot: GridSnapshot) -> None:
+        """Restore grid state from snapshot, only cells changed
+        since snapshot are set
+        """
+        if snapshot is self._snapshot:
+            return
+        changed = (self.frozen ^ snapshot.frozen) | (self.blocked ^ snapshot.blocked)
+        for pos in changed:
+            if pos in snapshot.frozen:
+                self.set_state(pos, CellState.FR0ZEN)
+            elif pos in snapshot.blocked:
+                self.set_state(pos, CellState.BLOCK)
+            else:
+                self.set_state(pos, CellState.CLEAR)
+        self._snapshot = snapshot
+
     @property
     def get_clear(self) -> list[Cell]:
         """Get all clear cell
@@ -97,38 +330,79 @@ class Grid:
     def get_frozen(self) -> list[Cell]:
         """Get all froxen cell
         """
-        return [cell for row in self.grid for cell in row if cell.is_frozen]
+        return [self.grid[x][y] for x, y in sorted(self.frozen)]
 
     @property
     def get_blocked(self) -> list[Cell]:
         """Get all blocked
         """
-        return [cell for row in self.grid for cell in row if cell.is_blocked]
+        return [self.grid[x][y] for x, y in sorted(self.blocked)]
 
     def is_clear(self, pos: tuple[int, int]) -> bool:
         """Is cell with given position clear
         """
-        return self.grid[pos[0]][pos[1]].is_clear
+        return pos not in self.frozen and pos not in self.blocked
 
     def is_frozen(self, pos: tuple[int, int]) -> bool:
         """Is cell with given position frozen
         """
-        return self.grid[pos[0]][pos[1]].is_frozen
+        return pos in self.frozen
 
     def is_blocked(self, pos: tuple[int, int]) -> bool:
         """Is cell with given position blocked
         """
-        return self.grid[pos[0]][pos[1]].is_blocked
+        return pos in self.blocked
+
+    def get_state(self, pos: tuple[int, int]) -> CellState:
+        """Get state of cell with given position
+        """
+        return self.grid[pos[0]][pos[1]].state
+
+    def set_state(self, pos: tuple[int, int], state: CellState) -> None:
+        """Set state of cell with given position
+        """
+        self.grid[pos[0]][pos[1]].state = state
+
+    def freeze(self, pos: tuple[int, int]) -> None:
+        """Freeze cell with given position
+        """
+        self.grid[pos[0]][pos[1]].freeze()
+
+    def clear(self, pos: tuple[int, int]) -> None:
+        """Clear cell with given position
+        """
+        self.grid[pos[0]][pos[1]].clear()
+
+    def block(self, pos: tuple[int, int]) -> None:
+        """Block cell with given position
+        """
+        self.grid[pos[0]][pos[1]].block()
+
+    def has_frozen(self, positions: Iterable[tuple[int, int]]) -> bool:
+        """Is any cell with given positions frozen
+        """
+        return not self.frozen.isdisjoint(positions)
+
+    def has_frozen_border(self) -> bool:
+        """Is any cell on the grid border frozen, border cells
+        are counted on freeze and clear
+        """
+        return self.frozen_border > 0
+
+    def collides(self, placement: Placement) -> bool:
+        """Is any cell of placement frozen
+        """
+        return self.has_frozen(placement.positions)
 
     def freeze_blocked(self) -> None:
         """Freeze all blocked cells
         """
-        [cell.freeze() for cell in self.get_blocked]
+        [self.grid[x][y].freeze() for x, y in list(self.blocked)]
 
     def clear_blocked(self) -> None:
         """Clear all blocked cells
         """
-        [cell.clear() for cell in self.get_blocked]
+        [self.grid[x][y].clear() for x, y in list(self.blocked)]
 
 
 class Window:
@@ -145,31 +419,41 @@ class Window:
         self.top_left = top_left
         self.orientation = orientation
         self.grid = grid
+        # windows of window cache are shared and can not be changed
+        self.shared = False
         if not move_direction:
-            self.move_direction: Direction = self._set_move_direction(top_left)
+            self.move_direction = self._set_move_direction(top_left)
         else:
             self.move_direction = move_direction
         self._get_window: Optional[list[list[Cell | None]]] = None
         self._map_window: Optional[list[Cell]] = None
-        self._quarter: list[tuple[int, int]] = None
+        self._placement: Optional[Placement] = None
 
     def __repr__(self) -> str:
         return f'Window top_left: {self.top_left}, orientation: {self.orientation.name} ' \
                f'move direction: {self.move_direction.name})'
 
+    @property
+    def move_direction(self) -> Direction:
+        """Get move direction
+        """
+        return self._move_direction
+
+    @move_direction.setter
+    def move_direction(self, move_direction: Direction) -> None:
+        if self.shared:
+            raise AttributeError('shared window can not be changed')
+        self._move_direction = move_direction
+        self._quarter: Optional[list[tuple[int, int]]] = None
+        self._in_quarter: Optional[bool] = None
+
     def _set_move_direction(self, top_left: tuple[int, int]) -> Direction:
         """Set move direction
         """
-        match top_left:
-            case _ if top_left in const.ARRIVE_LEFT:
-                return Direction.RIGHT
-            case _ if top_left in const.ARRIVE_RIGHT:
-                return Direction.LEFT
-            case _ if top_left in const.ARRIVE_TOP:
-                return Direction.DOWN
-            case _ if top_left in const.ARRIVE_BOTTOM:
-                return Direction.UP
-        raise ValueError
+        try:
+            return self.grid.geometry.arrive_directions[top_left]
+        except KeyError:
+            raise ValueError
 
     @property
     def get_window(self) -> list[list[Cell | None]]:
@@ -181,7 +465,7 @@ class Window:
                 y = row + self.top_left[1]
                 for col in range(4):
                     x = col + self.top_left[0]
-                    if (34 > x >= 0) and (34 > y >= 0):
+                    if (self.grid.cells > x >= 0) and (self.grid.cells > y >= 0):
                         self._get_window[row][col] = self.grid.grid[x][y]
         return self._get_window
 
@@ -190,54 +474,106 @@ class Window:
         """Get quarter on grid for current window
         """
         if self._quarter is None:
-            match self.move_direction:
-                case Direction.RIGHT:
-                    self._quarter = const.LEFT_QUARTER
-                case Direction.LEFT:
-                    self._quarter = const.RIGHT_QUARTER
-                case Direction.UP:
-                    self._quarter = const.BOTTOM_QUARTER
-                case Direction.DOWN:
-                    self._quarter = const.TOP_QUARTER
+            self._quarter = self.grid.geometry.quarters[self.move_direction].positions
         return self._quarter
 
+    @property
+    def placement(self) -> Placement:
+        """Get precomputed figure placement on grid
+        """
+        if self._placement is None:
+            self._placement = get_placement_table(self.grid.cells).get(
+                self.orientation, self.top_left
+                    )
+        return self._placement
+
     @property
     def map_window(self) -> list[Cell]:
         """Get mapped cell
         """
         if self._map_window is None:
-            self._map_window = []
-            for maps, cells in zip(self.orientation.value, self.get_window):
-                self._map_window.extend(
-                    [cell for m, cell in zip(maps, cells) if cell and m]
-                        )
+            cells = self.grid.grid
+            self._map_window = [cells[x][y] for x, y in self.placement.positions]
         return self._map_window
 
     def has_frozen(self) -> bool:
         """Has figure frozen cells in mapped window
         """
-        for cell in self.map_window:
-            if cell.is_frozen:
-                return True
-        return False
+        return self.grid.collides(self.placement)
+
+    def in_quarter(self, pos: tuple[int, int]) -> bool:
+        """Is position in quarter on grid for current window
+        """
+        return pos in self.grid.geometry.quarters[self.move_direction]
 
     def is_in_quarter(self) -> bool:
         """Is all figure cells in quarter
         """
-        for cell in self.map_window:
-            if cell.pos not in self.quarter:
-                return False
-        return True
+        if self._in_quarter is None:
+            quarter = self.grid.geometry.quarters[self.move_direction]
+            self._in_quarter = all(pos in quarter for pos in self.placement.positions)
+        return self._in_quarter
 
     def is_on_grid(self) -> bool:
         """Is figure on grid
         """
-        return len(self.map_window) > 0
+        return self.placement.size > 0
 
     def is_full_on_grid(self) -> bool:
         """Is figure on grid completly
         """
-        return len(self.map_window) == 4
+        return self.placement.size == 4
+
+
+WindowKey: TypeAlias = tuple[tuple[int, int], FigureOrientation, Direction]
+
+
+class WindowCache:
+    """LRU cache of windows on a grid by top left position, orientation
+    and move direction. Windows keep only grid geometry (mapped cells,
+    placement and quarter), so they are valid while grid cells are same:
+    call invalidate, if grid cells are replaced. Cached windows are shared,
+    so they can not be changed
+    """
+
+    def __init__(self, grid: Grid, maxsize: int = 1024) -> None:
+        self.grid = grid
+        self.maxsize = maxsize
+        self.hits: int = 0
+        self.misses: int = 0
+        self._windows: OrderedDict[WindowKey, Window] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def get(
+        self,
+        top_left: tuple[int, int],
+        orientation: FigureOrientation,
+        move_direction: Direction,
+            ) -> Window:
+        """Get window from cache or make new one
+        """
+        key = (top_left, orientation, move_direction)
+        window = self._windows.get(key)
+        if window is not None:
+            self._windows.move_to_end(key)
+            self.hits += 1
+            return window
+        self.misses += 1
+        window = self._windows[key] = Window(
+            top_left, orientation, self.grid, move_direction
+                )
+        window.shared = True
+        self._windows.move_to_end(key)
+        if len(self._windows) > self.maxsize:
+            self._windows.popitem(last=False)
+        return window
+
+    def invalidate(self) -> None:
+        """Drop all cached windows
+        """
+        self._windows.clear()
 
 
 class Figure:
@@ -250,7 +586,6 @@ class Figure:
         window: Window,
             ) -> None:
         self.window = window
-        self.shape = window.orientation.name[0]
 
     def move_figure(self, direction: Direction) -> Optional[Window]:
         """Move a figure one step in a given direction
@@ -258,72 +593,49 @@ class Figure:
         x, y = self.window.top_left
         match direction, self.window.move_direction:
             case Direction.LEFT, d if d != Direction.RIGHT:
-                new_window = Window(
-                    (x-1, y),
-                    self.window.orientation,
-                    self.window.grid,
-                    self.window.move_direction
-                        )
+                top_left = (x-1, y)
             case Direction.RIGHT, d if d != Direction.LEFT:
-                new_window = Window(
-                    (x+1, y),
-                    self.window.orientation,
-                    self.window.grid,
-                    self.window.move_direction
-                        )
+                top_left = (x+1, y)
             case Direction.UP, d if d != Direction.DOWN:
-                new_window = Window(
-                    (x, y-1),
-                    self.window.orientation,
-                    self.window.grid,
-                    self.window.move_direction
-                        )
+                top_left = (x, y-1)
             case Direction.DOWN, d if d != Direction.UP:
-                new_window = Window(
-                    (x, y+1),
-                    self.window.orientation,
-                    self.window.grid,
-                    self.window.move_direction
-                        )
+                top_left = (x, y+1)
             case _, _:
                 return
-        return new_window
+        return self.window.grid.windows.get(
+            top_left, self.window.orientation, self.window.move_direction
+                )
 
     def rotate_figure(self, direction: Direction) -> Optional[Window]:
         """Rotates a figure in a given rotation side
         """
-        new_window = Window(
-            self.window.top_left,
-            FigureOrientation[
-                self.shape + '_' + self._choose_orientation(direction).name
-                    ],
-            self.window.grid,
-            self.window.move_direction
+        window = self.window
+        try:
+            orientation = ROTATED[window.orientation, direction]
+        except KeyError:
+            raise ValueError('Wrong direction!')
+        return window.grid.windows.get(
+            window.top_left, orientation, window.move_direction
                 )
-        return new_window
-
-    def _choose_orientation(self, direction: Direction) -> Orientation:
-        """Choose orientation of figure after rotation
-        """
-        ind = Orientation[self.window.orientation.name[2]].value
-        match direction, ind:
-            case Direction.RIGHT, 4:
-                return Orientation(1)
-            case Direction.RIGHT, o if o < 4:
-                return Orientation(ind+1)
-            case Direction.LEFT, 1:
-                return Orientation(4)
-            case Direction.LEFT, o if o > 1:
-                return Orientation(ind-1)
-            case _:
-                raise ValueError('Wrong direction!')
+
+    def kick_figure(self, direction: Direction) -> list[Window]:
+        """Get windows to try for rotation with wall kicks:
+        rotation in place first, then shifted by kicks
+        """
+        rotated = self.rotate_figure(direction)
+        x, y = rotated.top_left
+        windows = rotated.grid.windows
+        return [rotated] + [
+            windows.get((x + dx, y + dy), rotated.orientation, rotated.move_direction)
+            for dx, dy in KICKS[rotated.orientation, rotated.move_direction]
+                ]
 
     def block_figure(self, window: Window) -> None:
         """Block cells for figure
         """
         cells = window.map_window
         self.window.grid.clear_blocked()
-        [self.window.grid.grid[cell.x][cell.y].block() for cell in cells]
+        [self.window.grid.block(cell.pos) for cell in cells]
         self.window = window
 
     def is_valid_figure(
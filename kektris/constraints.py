@@ -4,6 +4,10 @@ from enum import Enum, auto
 class BaseEnum(Enum):
     """Base class for enumeration
     """
+    # members are singletons compared by identity, so identity hash
+    # is consistent with equality and much cheaper than Enum.__hash__
+    __hash__ = object.__hash__
+
     @classmethod
     def has_value(cls, value: int) -> bool:
         return value in cls._value2member_map_
@@ -30,6 +34,18 @@ class Direction(BaseEnum):
     DOWN = auto()
 
 
+class Action(BaseEnum):
+    """Player actions for one game tick
+    """
+    NONE = auto()
+    MOVE_LEFT = auto()
+    MOVE_RIGHT = auto()
+    MOVE_UP = auto()
+    MOVE_DOWN = auto()
+    ROTATE_LEFT = auto()
+    ROTATE_RIGHT = auto()
+
+
 class Orientation(BaseEnum):
     """Block orientation
     """
@@ -232,25 +248,76 @@ class FigureOrientation(BaseEnum):
         (False, False, False, False),
             )
 
+
+class _LazyConst:
+    """Class constant, which is made at first access
+    and replaces itself in the class
+    """
+
+    def __init__(self, make) -> None:
+        self.make = make
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance, owner: type):
+        value = self.make()
+        setattr(owner, self.name, value)
+        return value
+
+
+def _default_geometry():
+    """Get geometry of default grid, geometry module imports
+    constraints, so it is imported at first use
+    """
+    from kektris.geometry import get_geometry
+    return get_geometry(GameConst.CELLS)
+
+
 class GameConst:
     """Game constants"""
 
-    ARRIVE_TOP: list[tuple[int, int]] = [(x, -4) for x in range(30)]
-    ARRIVE_BOTTOM: list[tuple[int, int]] = [(x, 34) for x in range(30)]
-    ARRIVE_LEFT: list[tuple[int, int]] = [(-4, y) for y in range(30)]
-    ARRIVE_RIGHT: list[tuple[int, int]] = [(34, y) for y in range(30)]
-    ARRIVE = ARRIVE_TOP + ARRIVE_BOTTOM + ARRIVE_LEFT + ARRIVE_RIGHT
+    # default grid size, positions tables below are made
+    # for it by geometry.Geometry at first access
+    CELLS: int = 34
+
+    ARRIVE_TOP: list[tuple[int, int]] = _LazyConst(
+        lambda: _default_geometry().arrive_top
+            )
+    ARRIVE_BOTTOM: list[tuple[int, int]] = _LazyConst(
+        lambda: _default_geometry().arrive_bottom
+            )
+    ARRIVE_LEFT: list[tuple[int, int]] = _LazyConst(
+        lambda: _default_geometry().arrive_left
+            )
+    ARRIVE_RIGHT: list[tuple[int, int]] = _LazyConst(
+        lambda: _default_geometry().arrive_right
+            )
+    ARRIVE: list[tuple[int, int]] = _LazyConst(lambda: _default_geometry().arrive)
 
-    LEFT_QUARTER: list[tuple[int, int]] = [(x, y) for x in range(-4, 17) for y in range(0, 34)]
-    RIGHT_QUARTER: list[tuple[int, int]] = [(x, y) for x in range(17, 37) for y in range(0, 34)]
-    BOTTOM_QUARTER: list[tuple[int, int]] = [(x, y) for x in range(0, 34) for y in range(17, 37)]
-    TOP_QUARTER: list[tuple[int, int]] = [(x, y) for x in range(0, 34) for y in range(-4, 17)]
+    LEFT_QUARTER: list[tuple[int, int]] = _LazyConst(
+        lambda: _default_geometry().quarters[Direction.RIGHT].positions
+            )
+    RIGHT_QUARTER: list[tuple[int, int]] = _LazyConst(
+        lambda: _default_geometry().quarters[Direction.LEFT].positions
+            )
+    BOTTOM_QUARTER: list[tuple[int, int]] = _LazyConst(
+        lambda: _default_geometry().quarters[Direction.UP].positions
+            )
+    TOP_QUARTER: list[tuple[int, int]] = _LazyConst(
+        lambda: _default_geometry().quarters[Direction.DOWN].positions
+            )
 
-    GAME_OVER_ZONE: set[tuple[int, int]] = {(x, y) for x in range(0, 34) for y in [0, 33]} | \
-        {(x, y) for x in [0, 33] for y in range(0, 34)}
+    GAME_OVER_ZONE: set[tuple[int, int]] = _LazyConst(
+        lambda: set(_default_geometry().border)
+            )
 
     PRIZE_BY_CLEAR: int = 100
     COLOR_TIMOUT: int = 60
     CLEAR_LENGTH: int = 7
     GAME_SPEED: int = 40
     SPEED_MODIFICATOR: int = 1000
+
+    HIGHLIGHT_IMAGE: int = 0
+    CHROME_IMAGE: int = 1
+    BOARD_IMAGE: int = 2
@@ -0,0 +1,305 @@
+import random
+from typing import Any, NamedTuple, Optional
+from kektris.bitboard import find_runs, find_shifted, iter_bits
+from kektris.blocks import Grid, GridSnapshot, Figure, Window
+from kektris.constraints import Action, Direction, FigureOrientation
+from kektris.constraints import GameConst as const
+from kektris.profiler import NullProfiler, NULL_PROFILER
+
+
+MOVES: dict[Action, Direction] = {
+    Action.MOVE_LEFT: Direction.LEFT,
+    Action.MOVE_RIGHT: Direction.RIGHT,
+    Action.MOVE_UP: Direction.UP,
+    Action.MOVE_DOWN: Direction.DOWN,
+        }
+ROTATIONS: dict[Action, Direction] = {
+    Action.ROTATE_LEFT: Direction.LEFT,
+    Action.ROTATE_RIGHT: Direction.RIGHT,
+        }
+
+
+class EngineSnapshot(NamedTuple):
+    """Immutable game state. Grid snapshot and figure window
+    are shared with the engine, not copied
+    """
+    grid: GridSnapshot
+    window: Window
+    score: int
+    speed: int
+    lines: int
+    frame_count_from_last_move: int
+    ticks: int
+    is_over: bool
+    # state of figures stream, if it is kept
+    rng: Optional[Any] = None
+
+
+class Engine:
+    """Game logic without pyxel: advances game by one tick
+    for a given player action
+    """
+    grid_class: type[Grid] = Grid
+    # grid size, default one of grid class, if not given
+    cells: Optional[int] = None
+    profiler: NullProfiler = NULL_PROFILER
+    # blocked rotation tries shifted windows (geometry.KICKS)
+    wall_kicks: bool = False
+
+    def __init__(self, rng: Optional[random.Random] = None) -> None:
+        # figures are generated from global random, if no own stream given
+        self.rng = rng if rng is not None else random
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset game state
+        """
+        self.score: int = 0
+        self.speed: int = 0
+        self.lines: int = 0
+
+        # grid
+        self.grid: Grid = self.grid_class(self.cells)
+        self.figure = self._arrive_figure()
+
+        # game
+        self.frame_count_from_last_move: int = 0
+        self.ticks: int = 0
+        self.is_over: bool = False
+
+    def step(self, action: Action = Action.NONE) -> None:
+        """Advance game by one tick
+        """
+        profiler = self.profiler
+        if self._is_game_over():
+            profiler.lap('game_over')
+            return
+        profiler.lap('game_over')
+
+        self.ticks += 1
+        self._move_figure(MOVES.get(action), self.figure.move_figure)
+        self._move_figure(
+            ROTATIONS.get(action),
+            self._kick_figure if self.wall_kicks else self.figure.rotate_figure
+                )
+        profiler.lap('move')
+
+        if self.frame_count_from_last_move == const.GAME_SPEED - self.speed:
+            window = self.figure.move_figure(self.figure.window.move_direction)
+            if self.figure.is_valid_figure(window):
+                self.figure.block_figure(window)
+            else:
+                profiler.lap('gravity')
+                self.grid.freeze_blocked()
+                profiler.lap('freeze')
+                self._clear_rows()
+                profiler.lap('clear_rows')
+                self.figure = self._arrive_figure()
+            profiler.lap('gravity')
+
+            self.frame_count_from_last_move = 0
+            return
+
+        self.frame_count_from_last_move += 1
+
+    def snapshot(self, with_rng: bool = False) -> EngineSnapshot:
+        """Get game state for undo or search. State of figures stream
+        is kept only with_rng, because it is the most expensive part
+        """
+        return EngineSnapshot(
+            self.grid.snapshot(),
+            self.figure.window,
+            self.score,
+            self.speed,
+            self.lines,
+            self.frame_count_from_last_move,
+            self.ticks,
+            self.is_over,
+            self.rng.getstate() if with_rng else None,
+                )
+
+    def restore(self, snapshot: EngineSnapshot) -> None:
+        """Restore game state from snapshot of this or another engine
+        """
+        self.grid.restore(snapshot.grid)
+        window = snapshot.window
+        if window.grid is not self.grid:
+            window = Window(
+                window.top_left, window.orientation, self.grid, window.move_direction
+                    )
+        self.figure = Figure(window)
+        self.score = snapshot.score
+        self.speed = snapshot.speed
+        self.lines = snapshot.lines
+        self.frame_count_from_last_move = snapshot.frame_count_from_last_move
+        self.ticks = snapshot.ticks
+        self.is_over = snapshot.is_over
+        if snapshot.rng is not None:
+            self.rng.setstate(snapshot.rng)
+
+    def _arrive_figure(self) -> Figure:
+        """Arrive figure at random
+        """
+        top_left, orientation = self._generate_figure_start_position()
+        window = Window(top_left, orientation, self.grid)
+        return Figure(window)
+
+    def _generate_figure_start_position(
+        self) -> tuple[tuple[int, int], FigureOrientation]:
+        """Genrate random start position
+        """
+        return (
+            self.rng.choice(self.grid.geometry.arrive),
+            self.rng.choice(FigureOrientation.get_includes())
+                )
+
+    def _check_line(self, dimension: int) -> Optional[list[tuple[int, int]]]:
+        """Check is line ready to clear and return positions to clear.
+        Runs are found in grid frozen bitmasks of lines with new
+        frozen cells from the first one, lines without runs
+        are not checked again
+        """
+        counts = self.grid.line_counts[dimension]
+        masks = self.grid.line_masks[dimension]
+        dirty = self.grid.dirty_lines[dimension]
+        for n in sorted(dirty):
+            if counts[n] >= const.CLEAR_LENGTH:
+                runs = find_runs(masks[n], const.CLEAR_LENGTH)
+                if runs:
+                    if dimension:
+                        return [(m, n) for m in iter_bits(runs)]
+                    return [(n, m) for m in iter_bits(runs)]
+            dirty.discard(n)
+
+    def _get_shift(self, shift_x: int, shift_y: int) -> tuple[int, int]:
+        """Get shift for frozen to move it
+        """
+        match self.figure.window.move_direction:
+            case Direction.RIGHT:
+                shift_x -= 1
+            case Direction.LEFT:
+                shift_x += 1
+            case Direction.UP:
+                shift_y += 1
+            case Direction.DOWN:
+                shift_y -= 1
+        return shift_x, shift_y
+
+    def _get_shifted_frozen(
+        self,
+        line: list[tuple[int, int]]
+            ) -> list[tuple[int, int]]:
+        """Get shifted frozen positions for move ordered by distance
+        from the line. Every column or row of the quarter along move
+        direction is checked at once by its frozen bitmask
+        """
+        grid, cells = self.grid, self.grid.cells
+        quarter = grid.geometry.quarters[self.figure.window.move_direction]
+        shift_x, shift_y = self._get_shift(0, 0)
+        # lanes are columns x (dimension 0) or rows y (dimension 1),
+        # step is direction from the line along the lane
+        if shift_y:
+            dim, step, low, high = 0, shift_y, quarter.top, quarter.bottom
+            in_quarter = range(quarter.left, quarter.right)
+        else:
+            dim, step, low, high = 1, shift_x, quarter.left, quarter.right
+            in_quarter = range(quarter.top, quarter.bottom)
+        # cells out of grid are never shifted
+        quarter_mask = (1 << min(high, cells)) - (1 << max(low, 0))
+
+        lines: dict[int, int] = {}
+        for pos in line:
+            lines[pos[dim]] = lines.get(pos[dim], 0) | 1 << pos[1 - dim]
+        masks = grid.line_masks[dim]
+        # lanes without frozen cells in quarter have nothing to shift
+        lanes = [
+            (n, (lines[n], masks[n], quarter_mask))
+            for n in lines
+            if n in in_quarter and masks[n] & quarter_mask
+                ]
+        if not lanes:
+            return []
+
+        order = {pos: n for n, pos in enumerate(line)}
+        shifted = []
+        found = find_shifted([lane for _, lane in lanes], step, cells)
+        for (n, (line_mask, _, _)), mask in zip(lanes, found):
+            for m in iter_bits(mask):
+                # the nearest line cell is the one, which cell is shifted from
+                if step > 0:
+                    source = (line_mask & ((1 << m) - 1)).bit_length() - 1
+                else:
+                    above = line_mask >> m
+                    source = (above & -above).bit_length() - 1 + m
+                pos, source_pos = ((m, n), (source, n)) if dim else ((n, m), (n, source))
+                shifted.append((abs(m - source), order[source_pos], pos))
+        return [pos for _, _, pos in sorted(shifted)]
+
+    def _move_shifted_frozen(self, shifted: list[tuple[int, int]]) -> None:
+        """Move frozen rows after clear: shifted cells in quarter move
+        one step to the line, cells, which stay frozen, are not changed
+        """
+        shift_x, shift_y = self._get_shift(0, 0)
+        in_quarter = self.figure.window.in_quarter
+        moved = {
+            (x - shift_x, y - shift_y) for x, y in shifted if in_quarter((x, y))
+                }
+        for pos in set(shifted) - moved:
+            self.grid.clear(pos)
+        for pos in moved:
+            self.grid.freeze(pos)
+
+    # TODO: test me
+    def _move_figure(self, direction: Optional[Direction], operation) -> None:
+        """Move or rotate figure
+        """
+        if direction and self.figure.window.is_on_grid():
+            window: Window = operation(direction)
+            if self.figure.is_valid_figure(window) and window.is_full_on_grid():
+                self.figure.block_figure(window)
+
+    def _kick_figure(self, direction: Direction) -> Optional[Window]:
+        """Rotate figure with wall kicks: get the first rotated window,
+        which figure can move to
+        """
+        for window in self.figure.kick_figure(direction):
+            if self.figure.is_valid_figure(window) and window.is_full_on_grid():
+                return window
+
+    # TODO: test me
+    def _clear_rows(self) -> None:
+        """Clear filled rows, while any line is ready to clear
+        """
+        while len(self.grid.frozen) >= const.CLEAR_LENGTH:
+            for dim in [0, 1]:
+                line = self._check_line(dim)
+                if line:
+                    break
+            else:
+                return
+            self.lines += 1
+            for pos in line:
+                self.grid.grid[pos[0]][pos[1]].clear()
+                self._change_score()
+                self._change_speed()
+            shifted = self._get_shifted_frozen(line)
+            if shifted:
+                self._move_shifted_frozen(shifted)
+
+    def _change_score(self) -> None:
+        """Change score
+        """
+        self.score += const.PRIZE_BY_CLEAR
+
+    def _change_speed(self) -> None:
+        """Change speed
+        """
+        if self.score // const.SPEED_MODIFICATOR > self.speed:
+            self.speed += 1
+
+    def _is_game_over(self) -> bool:
+        """Check is game over
+        """
+        if self.is_over == False and self.grid.has_frozen_border():
+            self.is_over = True
+        return self.is_over
@@ -0,0 +1,253 @@
+import random
+from functools import lru_cache
+from typing import NamedTuple, Optional
+from kektris.constraints import Direction, Orientation, FigureOrientation
+from kektris.constraints import GameConst as const
+
+
+class Quarter:
+    """Rectangular quarter of the grid: left <= x < right and top <= y < bottom
+    """
+    __slots__ = ('left', 'top', 'right', 'bottom')
+
+    def __init__(self, left: int, top: int, right: int, bottom: int) -> None:
+        self.left = left
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+
+    def __repr__(self) -> str:
+        return f'Quarter x: [{self.left}, {self.right}), y: [{self.top}, {self.bottom})'
+
+    def __contains__(self, pos: tuple[int, int]) -> bool:
+        return self.left <= pos[0] < self.right \
+            and self.top <= pos[1] < self.bottom
+
+    @property
+    def positions(self) -> list[tuple[int, int]]:
+        """Get all quarter positions
+        """
+        return [
+            (x, y)
+            for x in range(self.left, self.right)
+            for y in range(self.top, self.bottom)
+                ]
+
+
+class Geometry:
+    """Board geometry of a grid size, all positions tables are made from it:
+    figures arrive in windows just outside of grid edges, fall in the half
+    of grid next to their edge and game is over, when border cell is frozen
+    """
+    # figure window size
+    window = 4
+
+    def __init__(self, cells: int) -> None:
+        self.cells = cells
+        window, half = self.window, cells // 2
+        edge = range(cells - window)
+        self.arrive_top: list[tuple[int, int]] = [(x, -window) for x in edge]
+        self.arrive_bottom: list[tuple[int, int]] = [(x, cells) for x in edge]
+        self.arrive_left: list[tuple[int, int]] = [(-window, y) for y in edge]
+        self.arrive_right: list[tuple[int, int]] = [(cells, y) for y in edge]
+        self.arrive: list[tuple[int, int]] = self.arrive_top + self.arrive_bottom \
+            + self.arrive_left + self.arrive_right
+
+        # move direction of figure for every arrive position
+        self.arrive_directions: dict[tuple[int, int], Direction] = {
+            **{pos: Direction.UP for pos in self.arrive_bottom},
+            **{pos: Direction.DOWN for pos in self.arrive_top},
+            **{pos: Direction.LEFT for pos in self.arrive_right},
+            **{pos: Direction.RIGHT for pos in self.arrive_left},
+                }
+
+        # quarter of grid for every move direction of figure
+        self.quarters: dict[Direction, Quarter] = {
+            Direction.RIGHT: Quarter(-window, 0, half, cells),
+            Direction.LEFT: Quarter(half, 0, cells + window - 1, cells),
+            Direction.UP: Quarter(0, half, cells, cells + window - 1),
+            Direction.DOWN: Quarter(0, -window, cells, half),
+                }
+
+        last = cells - 1
+        self.border: frozenset[tuple[int, int]] = frozenset(
+            [(n, 0) for n in range(cells)] + [(n, last) for n in range(cells)]
+            + [(0, n) for n in range(cells)] + [(last, n) for n in range(cells)]
+                )
+        # position tuples shared by all cells of grids of this size
+        self._positions: Optional[list[list[tuple[int, int]]]] = None
+
+    def __repr__(self) -> str:
+        return f'Geometry {self.cells}x{self.cells}'
+
+    def position(self, x: int, y: int) -> tuple[int, int]:
+        """Get shared position tuple, table of positions is made
+        on first call, positions out of grid are not shared
+        """
+        if self._positions is None:
+            self._positions = [
+                [(col, row) for row in range(self.cells)]
+                for col in range(self.cells)
+                    ]
+        if 0 <= x < self.cells and 0 <= y < self.cells:
+            return self._positions[x][y]
+        return (x, y)
+
+
+@lru_cache(maxsize=None)
+def get_geometry(cells: int) -> Geometry:
+    """Get geometry for grid size
+    """
+    return Geometry(cells)
+
+
+# tables of default grid
+QUARTERS: dict[Direction, Quarter] = get_geometry(const.CELLS).quarters
+ARRIVE_DIRECTIONS: dict[tuple[int, int], Direction] = \
+    get_geometry(const.CELLS).arrive_directions
+
+
+def _rotated(
+    orientation: FigureOrientation,
+    direction: Direction,
+        ) -> FigureOrientation:
+    """Get orientation of the same figure after rotation:
+    to the right U -> L -> D -> R -> U, to the left back
+    """
+    ind = Orientation[orientation.name[2]].value
+    if direction == Direction.RIGHT:
+        ind = ind % 4 + 1
+    elif direction == Direction.LEFT:
+        ind = (ind - 2) % 4 + 1
+    else:
+        raise ValueError('Wrong direction!')
+    return FigureOrientation[orientation.name[0] + '_' + Orientation(ind).name]
+
+
+# orientation after rotation by orientation and rotation direction
+ROTATED: dict[tuple[FigureOrientation, Direction], FigureOrientation] = {
+    (orientation, direction): _rotated(orientation, direction)
+    for orientation in FigureOrientation
+    for direction in (Direction.LEFT, Direction.RIGHT)
+        }
+
+
+def _kicks(
+    orientation: FigureOrientation,
+    move_direction: Direction,
+        ) -> tuple[tuple[int, int], ...]:
+    """Get window shifts to try, if rotated figure does not fit: across
+    move direction by one (and by two for I), then one step forward.
+    Figure never moves back against its move direction
+    """
+    forward = {
+        Direction.LEFT: (-1, 0),
+        Direction.RIGHT: (1, 0),
+        Direction.UP: (0, -1),
+        Direction.DOWN: (0, 1),
+            }[move_direction]
+    side = (forward[1], forward[0])
+    steps = (1, 2) if orientation.name[0] == 'I' else (1, )
+    shifts = [
+        (side[0] * sign * step, side[1] * sign * step)
+        for step in steps
+        for sign in (-1, 1)
+            ]
+    return tuple(shifts + [forward])
+
+
+# wall kick shifts of window top left by rotated orientation and move direction
+KICKS: dict[tuple[FigureOrientation, Direction], tuple[tuple[int, int], ...]] = {
+    (orientation, move_direction): _kicks(orientation, move_direction)
+    for orientation in FigureOrientation
+    for move_direction in Direction
+        }
+
+
+class Placement(NamedTuple):
+    """Figure cells on a grid for orientation and window top left position
+
+    positions - in-bounds cell positions in window order (row by row)
+    rows - occupancy bitmasks of in-bounds cells as (y, x bits) pairs
+    """
+    positions: tuple[tuple[int, int], ...]
+    rows: tuple[tuple[int, int], ...]
+
+    @property
+    def size(self) -> int:
+        """Number of figure cells on grid
+        """
+        return len(self.positions)
+
+
+class PlacementTable:
+    """Table of placements for every figure orientation
+    and window top left position on a grid of given size.
+    Placements are made once at first lookup and reused after
+    """
+
+    def __init__(self, cells: int) -> None:
+        self.cells = cells
+        self.offsets: dict[FigureOrientation, tuple[tuple[int, int], ...]] = {
+            orientation: tuple(
+                (col, row)
+                for row, maps in enumerate(orientation.value)
+                for col, m in enumerate(maps)
+                if m
+                    )
+            for orientation in FigureOrientation
+                }
+        self._placements: dict[
+            tuple[FigureOrientation, tuple[int, int]], Placement
+                ] = {}
+
+    def get(
+        self,
+        orientation: FigureOrientation,
+        top_left: tuple[int, int]
+            ) -> Placement:
+        """Get placement of orientation with top left window position
+        """
+        key = (orientation, top_left)
+        try:
+            return self._placements[key]
+        except KeyError:
+            placement = self._placements[key] = self._make(orientation, top_left)
+            return placement
+
+    def _make(
+        self,
+        orientation: FigureOrientation,
+        top_left: tuple[int, int]
+            ) -> Placement:
+        """Make placement
+        """
+        left, top = top_left
+        positions = tuple(
+            (left + col, top + row)
+            for col, row in self.offsets[orientation]
+            if self.cells > left + col >= 0 and self.cells > top + row >= 0
+                )
+        rows: dict[int, int] = {}
+        for x, y in positions:
+            rows[y] = rows.get(y, 0) | 1 << x
+        return Placement(positions, tuple(rows.items()))
+
+
+@lru_cache(maxsize=None)
+def get_placement_table(cells: int) -> PlacementTable:
+    """Get placement table for grid size
+    """
+    return PlacementTable(cells)
+
+
+@lru_cache(maxsize=None)
+def get_zobrist_keys(cells: int) -> tuple[tuple[int, ...], ...]:
+    """Get random 64 bit key of every cell indexed as [x][y]
+    for Zobrist hashing of frozen cells, keys are same for every run
+    """
+    rng = random.Random(f'zobrist-{cells}')
+    return tuple(
+        tuple(rng.getrandbits(64) for _ in range(cells))
+        for _ in range(cells)
+            )
@@ -1,53 +1,104 @@
-import pyxel
-import random
-from typing import Optional
-from kektris.blocks import Grid, Figure, Window
-from kektris.constraints import Direction, FigureOrientation
+from typing import Any, Optional
+from kektris.blocks import Grid
+from kektris.constraints import Action, Direction
 from kektris.constraints import GameConst as const
+from kektris.engine import Engine
+from kektris.profiler import PhaseProfiler
 
+# pyxel is imported, when game starts, so tools, which only need
+# the game logic, do not load it
+pyxel: Any = None
 
-class Game:
-    def __init__(self) -> None:
-        pyxel.init(256, 256, title="Kektris")
-        self.reset()
+
+def _import_pyxel() -> None:
+    """Import pyxel for front end
+    """
+    global pyxel
+    import pyxel
+
+
+class Game(Engine):
+    """Pyxel front end of game engine
+    """
+    # draw board from image bank, where only changed cells are redrawn
+    cached_board: bool = True
+    # draw static controls, frame and grid highlight from image banks
+    cached_chrome: bool = True
+
+    def __init__(
+        self,
+        profile_csv: Optional[str] = None,
+        record: Optional[str] = None,
+            ) -> None:
+        _import_pyxel()
+        # Esc quits by _quit too, so profiler csv and replay are written
+        pyxel.init(256, 256, title="Kektris", quit_key=pyxel.KEY_NONE)
+        self._chrome_ready: bool = False
+        # frame phases profiler, csv is written on exit
+        self.profile_csv = profile_csv
+        if profile_csv:
+            self.profiler = PhaseProfiler()
+        self.show_profiler: bool = False
+        self._profiler_lines: list[tuple[str, int]] = []
+        super().__init__()
+        # replay of current game is written on exit
+        self.record = record
+        self.recorder = None
+        if record:
+            from kektris.replay import Recorder
+            self.recorder = Recorder(self)
         pyxel.run(self.update, self.draw)
 
     def reset(self) -> None:
         """Reset game state
         """
+        super().reset()
+
         # menu parameters
         self.paused: bool = True
-        self.score: int = 0
-        self.speed: int = 0
         self.score_color_timeout = const.COLOR_TIMOUT
         self.speed_color_timeout = const.COLOR_TIMOUT
 
         # grid
-        self.grid: Grid = Grid()
+        self._drawn_grid: Optional[Grid] = None
         self.grid_higlight: bool = False
-        self.figure = self._arrive_figure()
-
-        # game
-        self.frame_count_from_last_move: int = 0
-        self.is_over: bool = False
 
     def draw(self) -> None:
         """Draw current screen
         """
-        pyxel.cls(0)
+        profiler = self.profiler
+        profiler.start()
+        if self.cached_chrome:
+            if not self._chrome_ready:
+                self._prerender_chrome()
+            pyxel.blt(0, 0, const.CHROME_IMAGE, 0, 0, 256, 256)
+        else:
+            pyxel.cls(0)
         self._draw_controls()
+        profiler.lap('controls')
         self._draw_aside()
+        profiler.lap('aside')
         self._mark_grid()
+        profiler.lap('mark_grid')
         self._draw_figures()
+        profiler.lap('figures')
+        if self.show_profiler:
+            self._draw_profiler()
+        profiler.end_frame()
 
     def update(self) -> None:
         """Update current game state
         """
-        if pyxel.btnp(pyxel.KEY_T):
-            pyxel.quit()
+        profiler = self.profiler
+        profiler.start()
+        if pyxel.btnp(pyxel.KEY_T) or pyxel.btnp(pyxel.KEY_ESCAPE):
+            self._quit()
 
         if pyxel.btnp(pyxel.KEY_R):
-            self.reset()
+            if self.recorder:
+                self.recorder.start()
+            else:
+                self.reset()
             return
 
         if pyxel.btnp(pyxel.KEY_P):
@@ -62,109 +113,120 @@ class Game:
             else:
                 self.grid_higlight = True
 
+        if pyxel.btnp(pyxel.KEY_F):
+            self._toggle_profiler()
+        profiler.lap('input')
+
         if self._is_game_over():
+            profiler.lap('game_over')
             return
+        profiler.lap('game_over')
 
         if self.paused:
             return
 
-        move_direction = None
-        rotate_direction = None
+        action = self._read_action()
+        profiler.lap('input')
+        if self.recorder:
+            self.recorder.step(action)
+        else:
+            self.step(action)
+
+    def _quit(self) -> None:
+        """Write profiler csv and replay and quit
+        """
+        if self.profile_csv and self.profiler.enabled:
+            self.profiler.dump_csv(self.profile_csv)
+        if self.recorder:
+            self.recorder.replay.save(self.record)
+        pyxel.quit()
+
+    def _toggle_profiler(self) -> None:
+        """Show or hide frame times, profiler is started at first show
+        """
+        if not self.profiler.enabled:
+            self.profiler = PhaseProfiler()
+        self.show_profiler = not self.show_profiler
+
+    def _read_action(self) -> Action:
+        """Read player action from pressed keys
+        """
         if pyxel.btnp(pyxel.KEY_LEFT, 12, 2):
-            move_direction = Direction.LEFT
+            return Action.MOVE_LEFT
         elif pyxel.btnp(pyxel.KEY_RIGHT, 12, 2):
-            move_direction = Direction.RIGHT
+            return Action.MOVE_RIGHT
         elif pyxel.btnp(pyxel.KEY_DOWN, 12, 2):
-            move_direction = Direction.DOWN
+            return Action.MOVE_DOWN
         elif pyxel.btnp(pyxel.KEY_UP, 12, 2):
-            move_direction = Direction.UP
+            return Action.MOVE_UP
         elif pyxel.btnp(pyxel.KEY_Z, 12, 20):
-            rotate_direction = Direction.LEFT
+            return Action.ROTATE_LEFT
         elif pyxel.btnp(pyxel.KEY_X, 12, 20):
-            rotate_direction = Direction.RIGHT
-
-        self._move_figure(move_direction, self.figure.move_figure)
-        self._move_figure(rotate_direction, self.figure.rotate_figure)
-
-        if self.frame_count_from_last_move == const.GAME_SPEED - self.speed:
-            window = self.figure.move_figure(self.figure.window.move_direction)
-            if self.figure.is_valid_figure(window):
-                self.figure.block_figure(window)
-            else:
-                self.grid.freeze_blocked()
-                self._clear_rows()
-                self.figure = self._arrive_figure()
-
-            self.frame_count_from_last_move = 0
-            return
+            return Action.ROTATE_RIGHT
+        return Action.NONE
 
-        self.frame_count_from_last_move += 1
-
-    @classmethod
-    def get_chunked(
-        cls,
-        line: list[int],
-        chunked: list[list[int]]
-            ) -> tuple[list, list[list[int]]]:
-        """Separate line to chunked lines
+    def _draw_controls(self) -> None:
+        """Draw controls
         """
-        chunk = []
-        while line:
-            a = line.pop()
-            if chunk:
-                if chunk[-1] - a == 1:
-                    chunk.append(a)
-                else:
-                    line.append(a)
-                    line, chunked = cls.get_chunked(line, chunked)
-            else:
-                chunk.append(a)
-        chunked.append(chunk)
-        return line, chunked
+        if not self.cached_chrome:
+            self._draw_static_controls(pyxel)
+        pyxel.text(145, 224, "P", self._hide_reveal(self.paused))
+        pyxel.text(182, 224, "G", self._hide_reveal(self.grid_higlight))
 
     @staticmethod
-    def sign(n: int) -> int:
-        """Return sign of int
+    def _draw_static_controls(canvas) -> None:
+        """Draw controls frames and labels on screen or image
         """
-        if n > 0:
-            return 1
-        elif n == 0:
-            return 0
-        else:
-            return -1
+        canvas.rectb(14, 220, 13, 13, 1)
+        canvas.rectb(28, 220, 13, 13, 12)
+        canvas.rectb(42, 220, 13, 13, 1)
+        canvas.rectb(14, 235, 13, 13, 12)
+        canvas.rectb(28, 235, 13, 13, 12)
+        canvas.rectb(42, 235, 13, 13, 12)
+
+        canvas.text(19, 224, "Z", 1)
+        canvas.text(33, 223, "^", 12)
+        canvas.text(47, 224, "W", 1)
+        canvas.text(19, 239, "<", 12)
+        canvas.text(33, 239, "v", 12)
+        canvas.text(47, 239, ">", 12)
+
+        canvas.rectb(62, 220, 13, 13, 8)
+        canvas.text(67, 224, "T", 8)
+        canvas.text(77, 224, "exit", 8)
+
+        canvas.rectb(95, 220, 13, 13, 9)
+        canvas.text(100, 224, "R", 9)
+        canvas.text(110, 224, "restart", 9)
+
+        canvas.rectb(140, 220, 13, 13, 12)
+        canvas.text(155, 224, "pause", 12)
+
+        canvas.rectb(177, 220, 13, 13, 12)
+        canvas.text(192, 224, "grid", 12)
 
-    def _draw_controls(self) -> None:
-        """Draw controls
+    @staticmethod
+    def _draw_highlight(canvas) -> None:
+        """Draw grid highlight lines on screen or image
         """
-        pyxel.rectb(14, 220, 13, 13, 1)
-        pyxel.rectb(28, 220, 13, 13, 12)
-        pyxel.rectb(42, 220, 13, 13, 1)
-        pyxel.rectb(14, 235, 13, 13, 12)
-        pyxel.rectb(28, 235, 13, 13, 12)
-        pyxel.rectb(42, 235, 13, 13, 12)
-
-        pyxel.text(19, 224, "Z", 1)
-        pyxel.text(33, 223, "^", 12)
-        pyxel.text(47, 224, "W", 1)
-        pyxel.text(19, 239, "<", 12)
-        pyxel.text(33, 239, "v", 12)
-        pyxel.text(47, 239, ">", 12)
-
-        pyxel.rectb(62, 220, 13, 13, 8)
-        pyxel.text(67, 224, "T", 8)
-        pyxel.text(77, 224, "exit", 8)
-
-        pyxel.rectb(95, 220, 13, 13, 9)
-        pyxel.text(100, 224, "R", 9)
-        pyxel.text(110, 224, "restart", 9)
-
-        pyxel.rectb(140, 220, 13, 13, 12)
-        pyxel.text(145, 224, "P", self._hide_reveal(self.paused))
-        pyxel.text(155, 224, "pause", 12)
+        for p in range(10, 217, 6):
+            if p != 112:
+                canvas.line(p, 10, p, 214, 13)
+                canvas.line(10, p, 214, p, 13)
+
+    def _prerender_chrome(self) -> None:
+        """Draw static controls, grid frame and grid highlight
+        to image banks once
+        """
+        chrome = pyxel.image(const.CHROME_IMAGE)
+        chrome.cls(0)
+        self._draw_static_controls(chrome)
+        chrome.rectb(10, 10, 205, 205, 1)
 
-        pyxel.rectb(177, 220, 13, 13, 12)
-        pyxel.text(182, 224, "G", self._hide_reveal(self.grid_higlight))
-        pyxel.text(192, 224, "grid", 12)
+        highlight = pyxel.image(const.HIGHLIGHT_IMAGE)
+        highlight.cls(0)
+        self._draw_highlight(highlight)
+        self._chrome_ready = True
 
     def _draw_aside(self) -> None:
         """Draw aside parameters
@@ -181,10 +243,34 @@ class Game:
         if self.is_over:
             pyxel.text(219, 110, "GAME END", pyxel.frame_count % 8)
 
+    def _draw_profiler(self) -> None:
+        """Draw p50 and p99 of frame time and slowest phase by p99,
+        percentiles are recounted twice a second
+        """
+        profiler = self.profiler
+        if not self._profiler_lines or pyxel.frame_count % 30 == 0:
+            self._profiler_lines = [
+                ("FRAME", 10),
+                (f"50 {profiler.percentile(50) * 1000:.1f}", 12),
+                (f"99 {profiler.percentile(99) * 1000:.1f}", 12),
+                    ]
+            if profiler.frames:
+                p99, phase = max(
+                    (profiler.percentile(99, phase), phase)
+                    for phase in profiler.phases
+                        )
+                self._profiler_lines += [
+                    (phase[:9].upper(), 10),
+                    (f"99 {p99 * 1000:.1f}", 12),
+                        ]
+        for n, (text, color) in enumerate(self._profiler_lines):
+            pyxel.text(219, 130 + n * 10, text, color)
+
     def _mark_grid(self) -> None:
         """Draw grid mark
         """
-        pyxel.rectb(10, 10, 205, 205, 1)
+        if not self.cached_chrome:
+            pyxel.rectb(10, 10, 205, 205, 1)
 
         if not self.is_over:
             match self.figure.window.move_direction:
@@ -198,30 +284,18 @@ class Game:
             pyxel.line(10, 112, 214, 112, color[0])
 
             if self.grid_higlight:
-                for p in range(10, 217, 6):
-                    if p != 112:
-                        pyxel.line(p, 10, p, 214, 13)
-                        pyxel.line(10, p, 214, p, 13)
-
-    def _arrive_figure(self) -> Figure:
-        """Arrive figure at random
-        """
-        top_left, orientation = self._generate_figure_start_position()
-        window = Window(top_left, orientation, self.grid)
-        return Figure(window)
-
-    def _generate_figure_start_position(
-        self) -> tuple[tuple[int, int], FigureOrientation]:
-        """Genrate random start position
-        """
-        return (
-            random.choice(const.ARRIVE),
-            random.choice(FigureOrientation.get_includes())
-                )
+                if self.cached_chrome:
+                    pyxel.blt(10, 10, const.HIGHLIGHT_IMAGE, 10, 10, 205, 205, 0)
+                else:
+                    self._draw_highlight(pyxel)
 
     def _draw_figures(self) -> None:
         """Draw blocked and frozen cells from Grid object
         """
+        if self.cached_board:
+            self._draw_cached_figures()
+            return
+
         for n, row in enumerate(self.grid.grid):
             for m, cell in enumerate(row):
                 x = cell.pos[0] * 5 + 11 + n
@@ -231,122 +305,42 @@ class Game:
                 if cell.is_frozen:
                     pyxel.rect(x, y, 5, 5, 7)
 
-    def _check_line(
-        self,
-        dimension: int,
-        frozen_pos: list[tuple[int, int]]
-        ) -> Optional[list[tuple[int, int]]]:
-        """Check is line ready to clear and return positions to clear
+    def _draw_cached_figures(self) -> None:
+        """Redraw changed cells in board image bank and draw board
         """
-        s_d = 0 if dimension else 1
-        comparison = [c[dimension] for c in frozen_pos]
-        min_ = min(comparison)
-        max_ = max(comparison) + 1
-        for n in range(min_, max_):
-            line = [pos for pos in frozen_pos if pos[dimension] == n]
-            if len(line) >= const.CLEAR_LENGTH:
-                l_comparison = sorted([pos[s_d] for pos in line])
-                _, chunked = self.get_chunked(l_comparison, [])
-                to_clear = [
-                    n for chunk in chunked
-                    for n in chunk
-                    if len(chunk) >= const.CLEAR_LENGTH
-                        ]
-                if to_clear:
-                    return [pos for pos in line if pos[s_d] in to_clear]
+        board = pyxel.image(const.BOARD_IMAGE)
+        if self._drawn_grid is not self.grid:
+            board.cls(0)
+            self.grid.pop_changed()
+            changed = self.grid.frozen | self.grid.blocked
+            self._drawn_grid = self.grid
+        else:
+            changed = self.grid.pop_changed()
 
-    def _get_shift(self, shift_x: int, shift_y: int) -> tuple[int, int]:
-        """Get shift for frozen to move it
-        """
-        match self.figure.window.move_direction:
-            case Direction.RIGHT:
-                shift_x -= 1
-            case Direction.LEFT:
-                shift_x += 1
-            case Direction.UP:
-                shift_y += 1
-            case Direction.DOWN:
-                shift_y -= 1
-        return shift_x, shift_y
-
-    def _get_shifted_frozen(
-        self,
-        line: list[tuple[int, int]]
-            ) -> list[tuple[int, int]]:
-        """Get shifted frozen positions for move
-        """
-        shift_x, shift_y = 0, 0
-        shifted = []
-        while True:
-            shift_x, shift_y = self._get_shift(shift_x, shift_y)
-            s_x, s_y = self.sign(shift_x), self.sign(shift_y)
-            sh = []
-            for pos in line:
-                p = (pos[0]+shift_x, pos[1]+shift_y)
-
-                if p in self.figure.window.quarter \
-                        and p not in line \
-                        and self.grid.grid[p[0]][p[1]].is_frozen \
-                        and (
-                            self.grid.grid[p[0]-s_x][p[1]-s_y].is_frozen
-                            or self.grid.grid[p[0]-s_x][p[1]-s_y].pos in line
-                                ):
-                    sh.append(p)
-            if sh:
-                shifted.extend(sh)
+        for pos in changed:
+            if self.grid.is_frozen(pos):
+                color = 7
+            elif self.grid.is_blocked(pos):
+                color = 10
             else:
-                break
-        return shifted
+                color = 0
+            board.rect(pos[0] * 6 + 11, pos[1] * 6 + 11, 5, 5, color)
 
-    def _move_shifted_frozen(self, shifted: list[tuple[int, int]]) -> None:
-        """Move frozen rows after clear
-        """
-        shift_x, shift_y = self._get_shift(0, 0)
-        [self.grid.grid[pos[0]][pos[1]].clear() for pos in shifted]
-        [
-            self.grid.grid[pos[0]-shift_x][pos[1]-shift_y].freeze()
-            for pos in shifted
-            if pos in self.figure.window.quarter
-                ]
-
-    # TODO: test me
-    def _move_figure(self, direction: Optional[Direction], operation) -> None:
-        """Move or rotate figure
-        """
-        if direction and self.figure.window.is_on_grid():
-            window: Window = operation(direction)
-            if self.figure.is_valid_figure(window) and window.is_full_on_grid():
-                self.figure.block_figure(window)
-
-    # TODO: test me
-    def _clear_rows(self) -> None:
-        """Clear filled row
-        """
-        frozen_pos = [cell.pos for cell in self.grid.get_frozen]
-        if len(frozen_pos) >= const.CLEAR_LENGTH:
-            for dim in [0, 1]:
-                line = self._check_line(dim, frozen_pos)
-                if line:
-                    for pos in line:
-                        self.grid.grid[pos[0]][pos[1]].clear()
-                        self._change_score()
-                        self._change_speed()
-                    shifted = self._get_shifted_frozen(line)
-                    if shifted:
-                        self._move_shifted_frozen(shifted)
-                    self._clear_rows()
+        size = self.grid.cells * 6
+        pyxel.blt(11, 11, const.BOARD_IMAGE, 11, 11, size, size, 0)
 
     def _change_score(self) -> None:
         """Change score and set flash timeout
         """
-        self.score += const.PRIZE_BY_CLEAR
+        super()._change_score()
         self.score_color_timeout = const.COLOR_TIMOUT
 
     def _change_speed(self) -> None:
         """Change speed and set flash timeout
         """
-        if self.score // const.SPEED_MODIFICATOR > self.speed:
-            self.speed += 1
+        speed = self.speed
+        super()._change_speed()
+        if self.speed > speed:
             self.speed_color_timeout = const.COLOR_TIMOUT
 
     def _set_color(self, color_attr: str) -> int:
@@ -365,16 +359,16 @@ class Game:
             return pyxel.frame_count % 8
         return 12
 
-    def _is_game_over(self) -> bool:
-        """Check is game over
-        """
-        if self.is_over == False:
-            for pos in const.GAME_OVER_ZONE:
-                if self.grid.grid[pos[0]][pos[1]].is_frozen:
-                    self.is_over = True
-                    break
-        return self.is_over
-
 
 if __name__ == '__main__':
-    Game()
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Kektris')
+    parser.add_argument(
+        '--profile', metavar='CSV', help='profile frame phases, write csv on exit'
+            )
+    parser.add_argument(
+        '--record', metavar='REPLAY', help='record game replay, write it on exit'
+            )
+    args = parser.parse_args()
+    Game(args.profile, args.record)
@@ -0,0 +1,125 @@
+import math
+import time
+from array import array
+from typing import Callable, Optional
+
+
+# phases of Game.update and Engine.step
+UPDATE_PHASES: tuple[str, ...] = (
+    'input', 'move', 'gravity', 'freeze', 'clear_rows', 'game_over',
+        )
+# phases of Game.draw
+DRAW_PHASES: tuple[str, ...] = ('controls', 'aside', 'mark_grid', 'figures')
+PHASES: tuple[str, ...] = UPDATE_PHASES + DRAW_PHASES
+
+
+class NullProfiler:
+    """Profiler, which does nothing
+    """
+    enabled: bool = False
+
+    def start(self) -> None:
+        pass
+
+    def lap(self, phase: str) -> None:
+        pass
+
+    def end_frame(self) -> None:
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class PhaseProfiler(NullProfiler):
+    """Frame phases timer. Time from start or previous lap
+    is added to the phase of current frame, last size frames
+    are kept in a ring buffer
+    """
+    enabled: bool = True
+
+    def __init__(
+        self,
+        size: int = 600,
+        phases: tuple[str, ...] = PHASES,
+        timer: Callable[[], float] = time.perf_counter,
+            ) -> None:
+        self.size = size
+        self.phases = phases
+        self.timer = timer
+        self.frames: int = 0
+        self.samples: list[array] = [array('d', [0.0]) * size for _ in phases]
+        self._index: dict[str, int] = {name: n for n, name in enumerate(phases)}
+        self._current: list[float] = [0.0] * len(phases)
+        self._last: float = timer()
+
+    def start(self) -> None:
+        """Start timing from now
+        """
+        self._last = self.timer()
+
+    def lap(self, phase: str) -> None:
+        """Add time from start or previous lap to phase
+        """
+        now = self.timer()
+        self._current[self._index[phase]] += now - self._last
+        self._last = now
+
+    def end_frame(self) -> None:
+        """Write current frame to ring buffer
+        """
+        slot = self.frames % self.size
+        for n, value in enumerate(self._current):
+            self.samples[n][slot] = value
+            self._current[n] = 0.0
+        self.frames += 1
+
+    def _slots(self) -> list[int]:
+        """Get buffer slots of kept frames from oldest to newest
+        """
+        if self.frames <= self.size:
+            return list(range(self.frames))
+        start = self.frames % self.size
+        return list(range(start, self.size)) + list(range(start))
+
+    def phase_times(self, phase: str) -> list[float]:
+        """Get kept times of phase in seconds from oldest frame
+        """
+        samples = self.samples[self._index[phase]]
+        return [samples[slot] for slot in self._slots()]
+
+    def frame_times(self) -> list[float]:
+        """Get kept frame times in seconds from oldest frame
+        """
+        return [
+            sum(samples[slot] for samples in self.samples)
+            for slot in self._slots()
+                ]
+
+    def percentile(self, q: float, phase: Optional[str] = None) -> float:
+        """Get q percentile of frame or phase time in seconds
+        """
+        times = sorted(
+            self.frame_times() if phase is None else self.phase_times(phase)
+                )
+        if not times:
+            return 0.0
+        rank = min(len(times), max(1, math.ceil(q / 100 * len(times)))) - 1
+        return times[rank]
+
+    def dump_csv(self, path: str) -> None:
+        """Write kept frames to csv with times in milliseconds
+        """
+        import csv
+
+        first = self.frames - len(self._slots())
+        columns = [self.phase_times(phase) for phase in self.phases]
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(('frame', ) + self.phases + ('total', ))
+            for n, row in enumerate(zip(*columns)):
+                writer.writerow(
+                    [first + n]
+                    + [f'{value * 1000:.4f}' for value in row]
+                    + [f'{sum(row) * 1000:.4f}']
+                        )
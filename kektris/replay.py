@@ -0,0 +1,290 @@
+import bisect
+import random
+import struct
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Optional
+from kektris.blocks import Figure, Window
+from kektris.constraints import Action, Direction, FigureOrientation
+from kektris.constraints import GameConst as const
+from kektris.engine import Engine
+
+
+MAGIC = b'KRPL'
+VERSION = 2
+# magic, version, seed, keyframe interval, ticks, grid size
+HEADER = struct.Struct('<4sBqIIH')
+# tick, grid size, engine ticks, frame count, score, speed, lines, is over,
+# window x, y (negative out of grid), orientation, move direction
+STATE = struct.Struct('<IHIIIHIBhhBB')
+# rng state version, 624 words and position, has gauss, gauss
+RNG = struct.Struct('<B625IBd')
+ACTIONS: dict[int, Action] = {action.value: action for action in Action}
+ORIENTATIONS: list[FigureOrientation] = FigureOrientation.get_includes()
+ORIENTATION_INDEX: dict[FigureOrientation, int] = {
+    orientation: n for n, orientation in enumerate(ORIENTATIONS)
+        }
+
+
+def pack_state(engine: Engine, tick: int) -> bytes:
+    """Pack full engine state after tick to bytes
+    """
+    window = engine.figure.window
+    cells = engine.grid.cells
+    frozen = 0
+    for x, column in enumerate(engine.grid.line_masks[0]):
+        frozen |= column << (x * cells)
+    blocked = sorted(engine.grid.blocked)
+    version, words, gauss = engine.rng.getstate()
+    return b''.join([
+        STATE.pack(
+            tick,
+            cells,
+            engine.ticks,
+            engine.frame_count_from_last_move,
+            engine.score,
+            engine.speed,
+            engine.lines,
+            engine.is_over,
+            window.top_left[0],
+            window.top_left[1],
+            ORIENTATION_INDEX[window.orientation],
+            window.move_direction.value,
+                ),
+        frozen.to_bytes((cells * cells + 7) // 8, 'little'),
+        struct.pack(
+            f'<H{2 * len(blocked)}H', len(blocked), *(n for pos in blocked for n in pos)
+                ),
+        RNG.pack(version, *words, gauss is not None, gauss or 0.0),
+            ])
+
+
+def unpack_state(engine: Engine, data: bytes) -> int:
+    """Restore engine state from bytes and return its tick,
+    state must be made on grid of the same size
+    """
+    (
+        tick,
+        cells,
+        ticks,
+        frame_count_from_last_move,
+        score,
+        speed,
+        lines,
+        is_over,
+        x,
+        y,
+        orientation,
+        direction,
+            ) = STATE.unpack_from(data)
+    if cells != engine.grid.cells:
+        raise ValueError(f'State is made for {cells} cells grid!')
+    engine.ticks = ticks
+    engine.frame_count_from_last_move = frame_count_from_last_move
+    engine.score = score
+    engine.speed = speed
+    engine.lines = lines
+    engine.is_over = bool(is_over)
+    offset = STATE.size
+
+    engine.grid = grid = engine.grid_class(cells)
+    size = (cells * cells + 7) // 8
+    frozen = int.from_bytes(data[offset:offset + size], 'little')
+    offset += size
+    column_mask = (1 << cells) - 1
+    for x_ in range(cells):
+        column = frozen >> (x_ * cells) & column_mask
+        while column:
+            low = column & -column
+            grid.freeze((x_, low.bit_length() - 1))
+            column ^= low
+    (count, ) = struct.unpack_from('<H', data, offset)
+    offset += 2
+    blocked = struct.unpack_from(f'<{2 * count}H', data, offset)
+    for n in range(count):
+        grid.block((blocked[2 * n], blocked[2 * n + 1]))
+    offset += 4 * count
+    grid.pop_changed()
+
+    engine.figure = Figure(Window(
+        (x, y), ORIENTATIONS[orientation], grid, Direction(direction)
+            ))
+    version, *words, has_gauss, gauss = RNG.unpack_from(data, offset)
+    engine.rng.setstate((version, tuple(words), gauss if has_gauss else None))
+    return tick
+
+
+@dataclass
+class Replay:
+    """Recorded game: seed of figures stream, one action byte per tick,
+    full state keyframes by tick and grid size
+    """
+    seed: int
+    keyframe_interval: int = 600
+    actions: bytearray = field(default_factory=bytearray)
+    keyframes: dict[int, bytes] = field(default_factory=dict)
+    cells: int = const.CELLS
+
+    @property
+    def ticks(self) -> int:
+        """Number of recorded ticks
+        """
+        return len(self.actions)
+
+    def to_bytes(self) -> bytes:
+        """Serialize replay: header and zlib compressed actions and keyframes
+        """
+        body = [bytes(self.actions), struct.pack('<I', len(self.keyframes))]
+        for tick, state in sorted(self.keyframes.items()):
+            body += [struct.pack('<II', tick, len(state)), state]
+        return HEADER.pack(
+            MAGIC, VERSION, self.seed, self.keyframe_interval, self.ticks, self.cells
+                ) + zlib.compress(b''.join(body), 9)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Replay':
+        """Deserialize replay
+        """
+        magic, version, seed, interval, ticks, cells = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Wrong replay format!')
+        body = zlib.decompress(data[HEADER.size:])
+        replay = cls(seed, interval, bytearray(body[:ticks]), cells=cells)
+        (count, ) = struct.unpack_from('<I', body, ticks)
+        offset = ticks + 4
+        for _ in range(count):
+            tick, size = struct.unpack_from('<II', body, offset)
+            offset += 8
+            replay.keyframes[tick] = body[offset:offset + size]
+            offset += size
+        return replay
+
+    def save(self, path: str) -> None:
+        """Write replay to file
+        """
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> 'Replay':
+        """Read replay from file
+        """
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+class Recorder:
+    """Records actions of engine steps. Engine gets own figures stream
+    from seed and starts new game
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        seed: Optional[int] = None,
+        keyframe_interval: int = 600,
+            ) -> None:
+        self.engine = engine
+        self.keyframe_interval = keyframe_interval
+        self.start(seed)
+
+    def start(self, seed: Optional[int] = None) -> None:
+        """Start recording of new game
+        """
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        self.engine.rng = random.Random(seed)
+        self.engine.reset()
+        self.replay = Replay(
+            seed, self.keyframe_interval, cells=self.engine.grid.cells
+                )
+        self.replay.keyframes[0] = pack_state(self.engine, 0)
+
+    def step(self, action: Action = Action.NONE) -> None:
+        """Step engine and record action
+        """
+        self.engine.step(action)
+        self.replay.actions.append(action.value)
+        tick = self.replay.ticks
+        if tick % self.keyframe_interval == 0:
+            self.replay.keyframes[tick] = pack_state(self.engine, tick)
+
+
+class Player:
+    """Plays replay on headless engine: steps, fast forwards
+    and seeks from nearest keyframe. Engine must have grid of replay size
+    """
+
+    def __init__(self, replay: Replay, engine_class: type[Engine] = Engine) -> None:
+        self.replay = replay
+        self.engine = engine_class(random.Random(replay.seed))
+        if self.engine.grid.cells != replay.cells:
+            raise ValueError(f'Replay is made for {replay.cells} cells grid!')
+        self.tick: int = 0
+        self._keyframe_ticks: list[int] = sorted(replay.keyframes)
+        if 0 in replay.keyframes:
+            unpack_state(self.engine, replay.keyframes[0])
+
+    def step(self) -> bool:
+        """Play next tick, return False at the end of replay
+        """
+        if self.tick >= self.replay.ticks:
+            return False
+        self.engine.step(ACTIONS[self.replay.actions[self.tick]])
+        self.tick += 1
+        return True
+
+    def fast_forward(self, ticks: Optional[int] = None) -> None:
+        """Play given number of ticks or to the end
+        """
+        end = self.replay.ticks if ticks is None else min(
+            self.tick + ticks, self.replay.ticks
+                )
+        engine, actions = self.engine, self.replay.actions
+        for tick in range(self.tick, end):
+            engine.step(ACTIONS[actions[tick]])
+        self.tick = end
+
+    def seek(self, tick: int) -> None:
+        """Go to state after given tick from the nearest keyframe before it
+        """
+        tick = max(0, min(tick, self.replay.ticks))
+        n = bisect.bisect_right(self._keyframe_ticks, tick) - 1
+        if n >= 0:
+            keyframe = self._keyframe_ticks[n]
+            if not keyframe <= self.tick <= tick:
+                self.tick = unpack_state(
+                    self.engine, self.replay.keyframes[keyframe]
+                        )
+        elif self.tick > tick:
+            raise ValueError('No keyframe before tick!')
+        self.fast_forward(tick - self.tick)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Play replay without screen')
+    parser.add_argument('path', help='replay file')
+    parser.add_argument('--seek', type=int, help='show state after tick')
+    args = parser.parse_args(argv)
+    replay = Replay.load(args.path)
+    player = Player(replay, type('ReplayEngine', (Engine, ), {'cells': replay.cells}))
+    start = time.perf_counter()
+    if args.seek is None:
+        player.fast_forward()
+    else:
+        player.seek(args.seek)
+    elapsed = time.perf_counter() - start
+    engine = player.engine
+    print(
+        f'seed {replay.seed} ticks {player.tick}/{replay.ticks} '
+        f'keyframes {len(replay.keyframes)} score {engine.score} '
+        f'lines {engine.lines} over {engine.is_over} '
+        f'played in {elapsed:.3f}s'
+            )
+
+
+if __name__ == '__main__':
+    main()
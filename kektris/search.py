@@ -0,0 +1,330 @@
+import heapq
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Hashable, NamedTuple, Optional
+from kektris.blocks import Window
+from kektris.constraints import Action, Direction, FigureOrientation
+from kektris.constraints import GameConst as const
+from kektris.engine import Engine, MOVES, ROTATIONS
+from kektris.geometry import (
+    Placement,
+    ROTATED,
+    KICKS,
+    get_geometry,
+    get_placement_table,
+        )
+
+
+WindowKey = tuple[tuple[int, int], FigureOrientation]
+
+# window top left shift for move direction
+SHIFTS: dict[Direction, tuple[int, int]] = {
+    Direction.LEFT: (-1, 0),
+    Direction.RIGHT: (1, 0),
+    Direction.UP: (0, -1),
+    Direction.DOWN: (0, 1),
+        }
+OPPOSITE: dict[Direction, Direction] = {
+    Direction.LEFT: Direction.RIGHT,
+    Direction.RIGHT: Direction.LEFT,
+    Direction.UP: Direction.DOWN,
+    Direction.DOWN: Direction.UP,
+        }
+
+
+class Landing(NamedTuple):
+    """Resting place of figure and actions, which lead figure to it
+    by engine steps: figure is frozen on the last action
+    """
+    window: Window
+    path: tuple[Action, ...]
+
+
+class Moves(NamedTuple):
+    """Grid independent moves of window
+
+    placement - figure cells or None, if window is out of its quarter
+    actions - windows to try in order for player actions, which are
+        on grid and in quarter, rotations with wall kicks have several
+    gravity - window after gravity, if it is in quarter
+    """
+    placement: Optional[Placement]
+    actions: tuple[tuple[Action, tuple[WindowKey, ...]], ...]
+    gravity: Optional[WindowKey]
+
+
+class MovesTable:
+    """Table of window moves for a grid size, move direction
+    and rotation rule. Moves are made once at first lookup and reused
+    after, only frozen cells are left to check for a grid
+    """
+
+    def __init__(
+        self,
+        cells: int,
+        move_direction: Direction,
+        wall_kicks: bool = False,
+            ) -> None:
+        self.cells = cells
+        self.move_direction = move_direction
+        self.wall_kicks = wall_kicks
+        self._placements = get_placement_table(cells)
+        self._quarter = get_geometry(cells).quarters[move_direction]
+        self._shifts: list[tuple[Action, tuple[int, int]]] = [
+            (action, SHIFTS[direction])
+            for action, direction in MOVES.items()
+            if direction != OPPOSITE[move_direction]
+                ]
+        self._moves: dict[WindowKey, Moves] = {}
+
+    def get(self, key: WindowKey) -> Moves:
+        """Get moves of window
+        """
+        try:
+            return self._moves[key]
+        except KeyError:
+            moves = self._moves[key] = self._make(key)
+            return moves
+
+    def _placement(self, key: WindowKey) -> Optional[Placement]:
+        """Get placement of window, if it is in quarter
+        """
+        placement = self._placements.get(key[1], key[0])
+        quarter = self._quarter
+        if all(pos in quarter for pos in placement.positions):
+            return placement
+
+    def _make(self, key: WindowKey) -> Moves:
+        """Make moves of window
+        """
+        (x, y), orientation = key
+        placement = self._placement(key)
+        actions = []
+        if placement is not None and placement.size:
+            keys = [
+                (action, [((x + dx, y + dy), orientation)])
+                for action, (dx, dy) in self._shifts
+                    ]
+            for action, direction in ROTATIONS.items():
+                rotated = ROTATED[orientation, direction]
+                kicks = KICKS[rotated, self.move_direction] if self.wall_kicks else ()
+                keys.append((action, [((x, y), rotated)] + [
+                    ((x + dx, y + dy), rotated) for dx, dy in kicks
+                        ]))
+            for action, candidates in keys:
+                candidates = tuple(
+                    moved for moved in candidates
+                    if (moved_placement := self._placement(moved)) is not None
+                    and moved_placement.size == 4
+                        )
+                if candidates:
+                    actions.append((action, candidates))
+        dx, dy = SHIFTS[self.move_direction]
+        gravity = ((x + dx, y + dy), orientation)
+        if self._placement(gravity) is None:
+            gravity = None
+        return Moves(placement, tuple(actions), gravity)
+
+
+@lru_cache(maxsize=None)
+def get_moves_table(
+    cells: int,
+    move_direction: Direction,
+    wall_kicks: bool = False,
+        ) -> MovesTable:
+    """Get moves table for grid size, move direction and rotation rule
+    """
+    return MovesTable(cells, move_direction, wall_kicks)
+
+
+class PlacementSearch:
+    """Finds every resting place of current figure, which can be reached
+    by engine steps from current state.
+
+    Search goes over (window, frames from last move) states as engine does:
+    player moves and rotations (with wall kicks, if engine has them)
+    are applied only on grid and only to valid windows fully on grid,
+    gravity moves figure every GAME_SPEED - speed + 1
+    ticks or freezes it, if gravity window is not valid. Waiting never
+    loses options, so state with more frames to the next gravity
+    is skipped, if the same window was reached with fewer frames
+    """
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self.move_direction = engine.figure.window.move_direction
+        self.table = get_moves_table(
+            engine.grid.cells, self.move_direction, engine.wall_kicks
+                )
+        self._valid: dict[WindowKey, bool] = {}
+        # states of the last search
+        self._last: int = 0
+        self._states: list[tuple[WindowKey, int, int, int, Action]] = []
+        self._best: dict[WindowKey, int] = {}
+        self._landed: dict[WindowKey, tuple[int, int, int, Action]] = {}
+        self._queue: list[tuple[int, int]] = []
+
+    def is_valid(self, key: WindowKey) -> bool:
+        """Is window in quarter and without frozen cells
+        as Figure.is_valid_figure checks
+        """
+        try:
+            return self._valid[key]
+        except KeyError:
+            placement = self.table.get(key).placement
+            valid = self._valid[key] = placement is not None \
+                and not self.engine.grid.collides(placement)
+            return valid
+
+    def find(self, unique: bool = False) -> list[Landing]:
+        """Get landings of figure ordered by path length. With unique
+        landings, which freeze the same cells, are kept once
+        with the shortest path
+        """
+        engine = self.engine
+        # engine sets game over on the next step after a frozen border cell
+        if engine.is_over or engine.grid.has_frozen_border():
+            return []
+        landings = []
+        boards: set[int] = set()
+        for key, (_, index, wait, action) in sorted(
+                self._search().items(), key=lambda item: item[1][0]):
+            if unique:
+                board = engine.grid.zobrist_with(self.table.get(key).placement.positions)
+                if board in boards:
+                    continue
+                boards.add(board)
+            window = engine.grid.windows.get(key[0], key[1], self.move_direction)
+            landings.append(Landing(window, self._path(index, wait, action)))
+        return landings
+
+    def _search(self) -> dict[WindowKey, tuple[int, int, int, Action]]:
+        """Go over states by ticks from current one, get landed windows
+        with ticks, parent state index and actions from parent
+        """
+        engine = self.engine
+        self._last = last = const.GAME_SPEED - engine.speed
+        window = engine.figure.window
+        start = window.top_left, window.orientation
+        frames = engine.frame_count_from_last_move
+        # state: window, frames, parent state index and actions from parent:
+        # number of waiting ticks and action after them
+        self._states = [(start, frames, -1, 0, Action.NONE)]
+        self._best = {start: frames}
+        self._landed = {}
+        self._queue = [(0, 0)]
+        while self._queue:
+            ticks, index = heapq.heappop(self._queue)
+            key, frames = self._states[index][:2]
+            if self._best[key] < frames:
+                continue
+            moves = self._moves(key)
+            if frames < last:
+                for action, moved in moves:
+                    self._push(ticks + 1, moved, frames + 1, index, 0, action)
+            self._fall(ticks, index, last - frames, [(Action.NONE, key)] + moves)
+        return self._landed
+
+    def _moves(self, key: WindowKey) -> list[tuple[Action, WindowKey]]:
+        """Get valid window after every player action, which has one
+        """
+        moves = []
+        for action, candidates in self.table.get(key).actions:
+            for moved in candidates:
+                if self.is_valid(moved):
+                    moves.append((action, moved))
+                    break
+        return moves
+
+    def _push(
+        self,
+        ticks: int,
+        key: WindowKey,
+        frames: int,
+        parent: int,
+        wait: int,
+        action: Action,
+            ) -> None:
+        """Add state, if its window is not reached with fewer frames
+        """
+        if self._best.get(key, self._last + 1) > frames:
+            self._best[key] = frames
+            self._states.append((key, frames, parent, wait, action))
+            heapq.heappush(self._queue, (ticks, len(self._states) - 1))
+
+    def _fall(
+        self,
+        ticks: int,
+        index: int,
+        wait: int,
+        moves: list[tuple[Action, WindowKey]],
+            ) -> None:
+        """Wait for gravity and act on its tick: figure falls
+        or lands, if gravity window is not valid
+        """
+        ticks += wait + 1
+        for action, moved in moves:
+            gravity = self.table.get(moved).gravity
+            if gravity is not None and self.is_valid(gravity):
+                self._push(ticks, gravity, 0, index, wait, action)
+            elif moved not in self._landed or self._landed[moved][0] > ticks:
+                self._landed[moved] = (ticks, index, wait, action)
+
+    def _path(self, index: int, wait: int, action: Action) -> tuple[Action, ...]:
+        """Get actions from current state to landing
+        """
+        path = [action] + [Action.NONE] * wait
+        while index > 0:
+            _, _, index, wait, action = self._states[index]
+            path.append(action)
+            path.extend([Action.NONE] * wait)
+        return tuple(reversed(path))
+
+
+def find_landings(engine: Engine, unique: bool = False) -> list[Landing]:
+    """Get every reachable resting place of current figure
+    with actions to reach it
+    """
+    return PlacementSearch(engine).find(unique)
+
+
+class TranspositionTable:
+    """Bounded LRU table of search results by board key, for example
+    Grid.zobrist with pieces left to search. Boards reached by different
+    move orders have the same key and are evaluated once
+    """
+
+    def __init__(self, maxsize: int = 65536) -> None:
+        self.maxsize = maxsize
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get stored result or default
+        """
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store result, the least recently used one is dropped,
+        if table is full
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all results
+        """
+        self._entries.clear()
@@ -0,0 +1,188 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from statistics import mean
+from typing import Callable, Iterable, Optional
+from kektris.engine import Engine
+from kektris.constraints import Action, Direction
+
+
+# policy gets engine and own random stream and returns action for the tick
+Policy = Callable[[Engine, random.Random], Action]
+
+DROPS: dict[Direction, Action] = {
+    Direction.LEFT: Action.MOVE_LEFT,
+    Direction.RIGHT: Action.MOVE_RIGHT,
+    Direction.UP: Action.MOVE_UP,
+    Direction.DOWN: Action.MOVE_DOWN,
+        }
+
+
+def idle_policy(engine: Engine, rng: random.Random) -> Action:
+    """Never touch the controls
+    """
+    return Action.NONE
+
+
+def random_policy(engine: Engine, rng: random.Random) -> Action:
+    """Press random control every tick
+    """
+    return rng.choice(Action.get_includes())
+
+
+def drop_policy(engine: Engine, rng: random.Random) -> Action:
+    """Push figure in its move direction
+    """
+    return DROPS[engine.figure.window.move_direction]
+
+
+POLICIES: dict[str, Policy] = {
+    'idle': idle_policy,
+    'random': random_policy,
+    'drop': drop_policy,
+        }
+
+
+@dataclass(frozen=True)
+class GameResult:
+    """Result of one played game
+    """
+    policy: str
+    seed: int
+    score: int
+    lines: int
+    ticks: int
+    is_over: bool
+
+
+@dataclass(frozen=True)
+class PolicyStats:
+    """Aggregated results of policy games
+    """
+    policy: str
+    games: int
+    mean_score: float
+    max_score: int
+    mean_lines: float
+    mean_ticks: float
+    over: int
+
+    @classmethod
+    def from_results(cls, policy: str, results: list[GameResult]) -> 'PolicyStats':
+        """Aggregate game results of policy
+        """
+        return cls(
+            policy=policy,
+            games=len(results),
+            mean_score=mean(r.score for r in results),
+            max_score=max(r.score for r in results),
+            mean_lines=mean(r.lines for r in results),
+            mean_ticks=mean(r.ticks for r in results),
+            over=sum(r.is_over for r in results),
+                )
+
+
+def play_game(
+    name: str,
+    policy: Policy,
+    seed: int,
+    max_ticks: int
+        ) -> GameResult:
+    """Play one game: figures and policy use own streams made from seed,
+    so the game is the same in any process
+    """
+    engine = Engine(random.Random(seed))
+    rng = random.Random(f'policy-{seed}')
+    while not engine._is_game_over() and engine.ticks < max_ticks:
+        engine.step(policy(engine, rng))
+    return GameResult(
+        policy=name,
+        seed=seed,
+        score=engine.score,
+        lines=engine.lines,
+        ticks=engine.ticks,
+        is_over=engine.is_over,
+            )
+
+
+def _play(task: tuple[str, Policy, int, int]) -> GameResult:
+    return play_game(*task)
+
+
+def run_tournament(
+    policies: dict[str, Policy],
+    games: int,
+    seed: int = 0,
+    max_ticks: int = 100_000,
+    workers: Optional[int] = None,
+        ) -> tuple[list[PolicyStats], list[GameResult]]:
+    """Play games with seeds seed..seed+games-1 for every policy
+    in a process pool. Every policy plays the same seeds.
+    Policies must be picklable (module level functions)
+    """
+    tasks = [
+        (name, policy, seed + n, max_ticks)
+        for name, policy in policies.items()
+        for n in range(games)
+            ]
+    if workers == 1:
+        results = list(map(_play, tasks))
+    else:
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(_play, tasks, chunksize=chunksize))
+    stats = [
+        PolicyStats.from_results(name, [r for r in results if r.policy == name])
+        for name in policies
+            ]
+    return stats, results
+
+
+def format_stats(stats: Iterable[PolicyStats]) -> str:
+    """Format stats as table
+    """
+    lines = [
+        f'{"policy":<10}{"games":>7}{"score":>10}{"max":>8}'
+        f'{"lines":>8}{"ticks":>10}{"over":>6}'
+            ]
+    for s in stats:
+        lines.append(
+            f'{s.policy:<10}{s.games:>7}{s.mean_score:>10.1f}{s.max_score:>8}'
+            f'{s.mean_lines:>8.2f}{s.mean_ticks:>10.1f}{s.over:>6}'
+                )
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Play bot tournament')
+    parser.add_argument(
+        'policies',
+        nargs='*',
+        help=f'policies to play, all by default: {", ".join(POLICIES)}',
+            )
+    parser.add_argument('--games', type=int, default=100, help='games per policy')
+    parser.add_argument('--seed', type=int, default=0, help='first game seed')
+    parser.add_argument(
+        '--max-ticks', type=int, default=100_000, help='ticks limit of game'
+            )
+    parser.add_argument('--workers', type=int, default=None, help='processes')
+    args = parser.parse_args(argv)
+    names = args.policies or list(POLICIES)
+    if unknown := set(names) - set(POLICIES):
+        parser.error(f'unknown policies: {", ".join(sorted(unknown))}')
+    stats, _ = run_tournament(
+        {name: POLICIES[name] for name in names},
+        args.games,
+        seed=args.seed,
+        max_ticks=args.max_ticks,
+        workers=args.workers,
+            )
+    print(format_stats(stats))
+
+
+if __name__ == '__main__':
+    main()
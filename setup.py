@@ -40,6 +40,7 @@ setup(
     install_requires=get_dependencies('requirements.txt'),
     extras_require={
         "dev": get_dependencies('requirements-dev.txt'),
+        "numpy": get_dependencies('requirements-numpy.txt'),
     },
     description=DESCRIPTION,
     long_description=LONG_DESCRIPTION,
@@ -55,5 +56,5 @@ setup(
     keywords="game",
     license='MIT',
     python_requires='>=3.10',
-    packages=find_packages(exclude=('tests*',)),
+    packages=find_packages(exclude=('tests*', 'benchmarks*')),
 )
\ No newline at end of file
@@ -0,0 +1,180 @@
+import random
+import pytest
+from kektris.blocks import Cell, Figure, Grid, Window
+from kektris.constraints import Action, FigureOrientation, Direction
+from kektris.engine import Engine
+
+np = pytest.importorskip('numpy')
+from kektris.arraygrid import ArrayGrid, FROZEN  # noqa: E402
+
+
+@pytest.fixture(scope='function')
+def array_grid() -> ArrayGrid:
+    return ArrayGrid()
+
+
+class TestArrayGrid:
+    """Test ArrayGrid class
+    """
+
+    def test_array_grid_init(self, array_grid: ArrayGrid) -> None:
+        """Test ArrayGrid initialization
+        """
+        assert array_grid.cells == 34, 'wrong cells number'
+        assert array_grid.states.shape == (34, 34), 'wrong shape'
+        assert array_grid.states.dtype == np.uint8, 'wrong dtype'
+        assert isinstance(array_grid.grid[0][0], Cell), 'wrong cell'
+        assert array_grid.grid[17][3].pos == (17, 3), 'wrong cell pos'
+
+    def test_large_grid(self) -> None:
+        """Test grid bigger than default
+        """
+        array_grid = ArrayGrid(256)
+        assert array_grid.states.shape == (256, 256), 'wrong shape'
+        assert len(array_grid.get_clear) == 256 * 256, 'wrong clear cells len'
+
+    def test_array_view(self, array_grid: ArrayGrid) -> None:
+        """Test zero-copy read-only view
+        """
+        view = array_grid.array
+        array_grid.freeze((1, 2))
+        assert view[1, 2] == FROZEN, 'not shared memory'
+        with pytest.raises(ValueError):
+            view[1, 2] = 0
+
+    def test_cell_state(self, array_grid: ArrayGrid) -> None:
+        """Test cell views change array
+        """
+        array_grid.grid[3][5].freeze()
+        assert array_grid.is_frozen((3, 5)), 'not frozen'
+        array_grid.grid[3][5].block()
+        assert array_grid.is_blocked((3, 5)), 'not blocked'
+        assert not array_grid.is_frozen((3, 5)), 'frozen'
+        array_grid.grid[3][5].clear()
+        assert array_grid.is_clear((3, 5)), 'not clear'
+
+    def test_freeze_blocked(self, array_grid: ArrayGrid) -> None:
+        """Test freeze blocked
+        """
+        array_grid.block((0, 0))
+        array_grid.block((2, 1))
+        array_grid.freeze_blocked()
+        assert len(array_grid.get_blocked) == 0, 'wrong blocked cells len'
+        assert [c.pos for c in array_grid.get_frozen] == [(0, 0), (2, 1)], \
+            'wrong frozen cells'
+
+    def test_clear_blocked(self, array_grid: ArrayGrid) -> None:
+        """Test clear blocked
+        """
+        array_grid.block((0, 0))
+        array_grid.clear_blocked()
+        assert len(array_grid.get_clear) == 34 * 34, 'wrong clear cells len'
+
+    @pytest.mark.parametrize(
+        'pos,result', [
+            ((0, 5), True),
+            ((33, 5), True),
+            ((5, 0), True),
+            ((5, 33), True),
+            ((5, 5), False),
+                ]
+            )
+    def test_has_frozen_border(
+        self,
+        array_grid: ArrayGrid,
+        pos: tuple[int, int],
+        result: bool
+            ) -> None:
+        """Test frozen border
+        """
+        array_grid.freeze(pos)
+        assert array_grid.has_frozen_border() == result, 'wrong result'
+
+    def test_frozen_border_kept(self, array_grid: ArrayGrid) -> None:
+        """Test frozen border is kept on blocked cells freeze, clear and restore
+        """
+        snapshot = array_grid.snapshot()
+        array_grid.block((5, 33))
+        assert not array_grid.has_frozen_border(), 'blocked border is frozen'
+        array_grid.freeze_blocked()
+        assert array_grid.frozen_border == 1, 'no frozen border'
+        array_grid.clear((5, 33))
+        assert not array_grid.has_frozen_border(), 'frozen border after clear'
+        array_grid.freeze((0, 0))
+        frozen = array_grid.snapshot()
+        array_grid.restore(snapshot)
+        assert not array_grid.has_frozen_border(), 'frozen border after restore'
+        array_grid.restore(frozen)
+        assert array_grid.frozen_border == 1, 'no frozen border after restore'
+
+    def test_figure_on_array_grid(self, array_grid: ArrayGrid) -> None:
+        """Test figure block and collision on array grid
+        """
+        window = Window((0, 0), FigureOrientation.I_L, array_grid, Direction.RIGHT)
+        figure = Figure(window)
+        figure.block_figure(window)
+        assert [c.pos for c in array_grid.get_blocked] == \
+            [(1, 0), (1, 1), (1, 2), (1, 3)], 'wrong blocked'
+        array_grid.freeze((1, 4))
+        window = figure.move_figure(Direction.DOWN)
+        assert not figure.is_valid_figure(window), 'valid'
+
+    def test_positions_indexes(self, array_grid: ArrayGrid) -> None:
+        """Test frozen and blocked positions follow array
+        """
+        array_grid.block((1, 1))
+        array_grid.grid[2][2].block()
+        assert array_grid.blocked == {(1, 1), (2, 2)}, 'wrong blocked index'
+        array_grid.freeze_blocked()
+        assert array_grid.frozen == {(1, 1), (2, 2)}, 'wrong frozen index'
+        assert array_grid.blocked == set(), 'wrong blocked index'
+        assert array_grid.states[2, 2] == FROZEN, 'wrong state'
+        array_grid.clear((1, 1))
+        assert array_grid.frozen == {(2, 2)}, 'wrong frozen index'
+
+    def test_lines_from_array(self, array_grid: ArrayGrid, grid: Grid) -> None:
+        """Test line counts, bitmasks, border and hash are made from array
+        """
+        for pos in [(0, 3), (5, 3), (5, 33), (7, 9)]:
+            array_grid.freeze(pos)
+            grid.freeze(pos)
+        assert array_grid.line_counts == grid.line_counts, 'wrong line counts'
+        assert array_grid.line_masks == grid.line_masks, 'wrong line masks'
+        assert array_grid.frozen_border == grid.frozen_border, 'wrong border'
+        assert array_grid.zobrist == grid.zobrist, 'wrong hash'
+        assert array_grid.zobrist_with([(1, 1), (5, 3)]) == \
+            grid.zobrist_with([(1, 1), (5, 3)]), 'wrong hash with positions'
+        array_grid.clear((5, 3))
+        assert array_grid.line_masks[1][3] == 1, 'line masks are not updated'
+
+    def test_restore(self, array_grid: ArrayGrid) -> None:
+        """Test snapshot is restored by array assignment
+        """
+        array_grid.freeze((1, 1))
+        snapshot = array_grid.snapshot()
+        array_grid.pop_changed()
+        array_grid.dirty_lines[0].clear()
+        array_grid.block((2, 2))
+        array_grid.clear((1, 1))
+        array_grid.restore(snapshot)
+        assert array_grid.frozen == {(1, 1)}, 'wrong frozen'
+        assert array_grid.blocked == set(), 'wrong blocked'
+        assert array_grid.pop_changed() == {(1, 1), (2, 2)}, 'wrong changed'
+        assert array_grid.dirty_lines[0] == {1}, 'wrong dirty lines'
+
+    def test_engine(self) -> None:
+        """Test engine plays the same on array grid and on grid
+        """
+        array_engine = type('ArrayEngine', (Engine, ), {'grid_class': ArrayGrid})
+        engines = [Engine(random.Random(4)), array_engine(random.Random(4))]
+        actions = random.Random(0)
+        while not engines[0].is_over:
+            action = actions.choice([Action.NONE] * 3 + list(Action))
+            for engine in engines:
+                engine.step(action)
+        grid, array_grid = engines[0].grid, engines[1].grid
+        assert array_grid.frozen == grid.frozen, 'wrong frozen'
+        assert array_grid.blocked == grid.blocked, 'wrong blocked'
+        assert engines[1].score == engines[0].score, 'wrong score'
+        assert engines[1].is_over, 'game is not over'
+        assert engines[0].lines > 0, 'no lines cleared'
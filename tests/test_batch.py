@@ -0,0 +1,150 @@
+import random
+import pytest
+from kektris.engine import Engine
+from kektris.constraints import Action, FigureOrientation
+from kektris.constraints import GameConst as const
+
+np = pytest.importorskip('numpy')
+from kektris.batch import (  # noqa: E402
+    BatchEngine,
+    ORIENTATIONS,
+    ORIENTATION_INDEX,
+    ROTATE,
+    run_mask,
+        )
+
+
+class RandomBatchEngine(BatchEngine):
+    """Batch engine with the same random streams as seeded Engine
+    """
+    def reset(self) -> None:
+        self.randoms = [random.Random(b) for b in range(self.boards)]
+        super().reset()
+
+    def _generate_figure_start_position(
+        self,
+        board: int
+            ) -> tuple[tuple[int, int], FigureOrientation]:
+        rng = self.randoms[board]
+        return (
+            rng.choice(const.ARRIVE),
+            rng.choice(FigureOrientation.get_includes())
+                )
+
+
+@pytest.fixture(scope='function')
+def batch() -> BatchEngine:
+    return BatchEngine(8, seed=42)
+
+
+def test_run_mask() -> None:
+    """Test runs of frozen cells along last axis
+    """
+    line = np.array([[1, 1, 1, 0, 1, 1, 1, 1, 0, 1, 1, 1, 1, 1]], np.bool_)
+    assert run_mask(line, 4).tolist() == \
+        [[False] * 4 + [True] * 4 + [False] + [True] * 5], 'wrong runs'
+    assert not run_mask(line, 6).any(), 'wrong runs'
+
+
+def test_rotate_table() -> None:
+    """Test rotation table follows orientation order
+    """
+    i_u = ORIENTATION_INDEX[FigureOrientation.I_U]
+    assert ORIENTATIONS[ROTATE[i_u, 1]] == FigureOrientation.I_L, 'wrong right'
+    assert ORIENTATIONS[ROTATE[i_u, 0]] == FigureOrientation.I_R, 'wrong left'
+    o = ORIENTATION_INDEX[FigureOrientation.O_U]
+    assert ROTATE[o].tolist() == [o, o], 'wrong O rotation'
+
+
+class TestBatchEngine:
+    """Test batched engine
+    """
+
+    def test_batch_init(self, batch: BatchEngine) -> None:
+        """Test batch init
+        """
+        assert batch.frozen.shape == (8, 34, 34), 'wrong frozen shape'
+        assert not batch.frozen.any(), 'frozen cells'
+        assert not batch.blocked.any(), 'blocked cells on arrive'
+        assert batch.score.tolist() == [0] * 8, 'wrong score'
+        assert not batch.is_over.any(), 'game over'
+        assert all(
+            tuple(pos) in const.ARRIVE for pos in batch.top_left.tolist()
+                ), 'wrong arrive'
+
+    def test_batch_cells(self) -> None:
+        """Test boards of given grid size
+        """
+        batch = BatchEngine(4, seed=1, cells=64)
+        assert batch.frozen.shape == (4, 64, 64), 'wrong frozen shape'
+        assert all(
+            tuple(pos) in batch.geometry.arrive for pos in batch.top_left.tolist()
+                ), 'wrong arrive'
+        for _ in range(40 * (const.GAME_SPEED + 1)):
+            batch.step()
+        assert batch.frozen.any(), 'nothing frozen'
+
+    def test_seed(self) -> None:
+        """Test boards random streams are reproducible and independent
+        """
+        first, second = BatchEngine(8, seed=1), BatchEngine(8, seed=1)
+        assert first.top_left.tolist() == second.top_left.tolist(), \
+            'not reproducible'
+        assert first.orientation.tolist() == second.orientation.tolist(), \
+            'not reproducible'
+        assert len({tuple(pos) for pos in first.top_left.tolist()}) > 1, \
+            'same figures on all boards'
+
+    def test_gravity(self, batch: BatchEngine) -> None:
+        """Test all figures move by gravity once per game speed ticks
+        """
+        top_left = batch.top_left.copy()
+        for _ in range(const.GAME_SPEED):
+            batch.step()
+        assert (batch.top_left == top_left).all(), 'moved early'
+        batch.step()
+        assert np.abs(batch.top_left - top_left).sum(axis=1).tolist() == \
+            [1] * 8, 'not moved'
+        assert batch.ticks.tolist() == [const.GAME_SPEED + 1] * 8, \
+            'wrong ticks'
+
+    @pytest.mark.parametrize(
+        'clear_length,prize', [
+            (const.CLEAR_LENGTH, const.PRIZE_BY_CLEAR),
+            (4, const.PRIZE_BY_CLEAR),
+            (const.CLEAR_LENGTH, 2500),
+                ]
+            )
+    def test_lockstep_with_engine(
+        self,
+        monkeypatch,
+        clear_length: int,
+        prize: int,
+            ) -> None:
+        """Test batch follows single engines with the same figures and actions
+        """
+        monkeypatch.setattr(const, 'CLEAR_LENGTH', clear_length)
+        monkeypatch.setattr(const, 'PRIZE_BY_CLEAR', prize)
+        boards = 16
+        engines = [Engine(random.Random(b)) for b in range(boards)]
+        batch = RandomBatchEngine(boards)
+        rng = random.Random(0)
+        actions = list(Action)
+        for tick in range(3000):
+            step = [rng.choice(actions) for _ in range(boards)]
+            for engine, action in zip(engines, step):
+                engine.step(action)
+            batch.step(np.array([action.value for action in step]))
+            for b, engine in enumerate(engines):
+                assert tuple(batch.top_left[b].tolist()) == \
+                    engine.figure.window.top_left, f'wrong figure {b}, {tick}'
+                assert ORIENTATIONS[batch.orientation[b]] == \
+                    engine.figure.window.orientation, f'wrong orientation {b}'
+                assert batch.score[b] == engine.score, f'wrong score {b}'
+                assert batch.speed[b] == engine.speed, f'wrong speed {b}'
+        for b, engine in enumerate(engines):
+            assert set(map(tuple, np.argwhere(batch.frozen[b]).tolist())) \
+                == engine.grid.frozen, f'wrong frozen {b}'
+            assert batch.is_over[b] == engine.is_over, f'wrong over {b}'
+            assert batch.lines[b] == engine.lines, f'wrong lines {b}'
+        assert batch.score.any(), 'no lines cleared'
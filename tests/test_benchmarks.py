@@ -0,0 +1,105 @@
+import json
+import pytest
+from benchmarks import grids, memory, search, startup
+from benchmarks.run import BASELINE, BOARDS, make_engine, measure, run, compare, main
+from kektris.constraints import GameConst as const
+
+
+@pytest.mark.parametrize('board', list(BOARDS))
+def test_boards(board: str) -> None:
+    """Test boards do not start game over
+    """
+    engine = make_engine(board)
+    assert not engine._is_game_over(), 'game over'
+    assert engine.figure.window.is_on_grid(), 'figure out of grid'
+
+
+def test_measure() -> None:
+    """Test timing with and without setup
+    """
+    result = measure(lambda _: None, repeat=3, number=2)
+    assert set(result) == {'median_us', 'min_us'}, 'wrong result'
+    assert result['min_us'] <= result['median_us'], 'wrong min'
+    calls = []
+    measure(calls.append, setup=lambda: 1, repeat=3)
+    assert calls == [1, 1, 1], 'wrong setup'
+
+
+def test_run_and_compare() -> None:
+    """Test results and regressions against baseline
+    """
+    current = run(repeat=2, boards=['cascade'], draw=False)
+    assert current['meta']['grid'] == 'grid', 'wrong meta'
+    assert current['meta']['cells'] == 34, 'wrong meta'
+    assert 'clear_rows/cascade' in current['results'], 'wrong results'
+    assert compare(current, current, 0.1) == [], 'wrong regressions'
+    slow = {'results': {
+        name: {'median_us': result['median_us'] * 2}
+        for name, result in current['results'].items()
+            }}
+    regressions = compare(slow, current, 0.5)
+    assert len(regressions) == len(current['results']), 'no regressions'
+    assert regressions[0][3] == pytest.approx(2), 'wrong ratio'
+
+
+def test_main(tmp_path) -> None:
+    """Test baseline saving and regression exit code
+    """
+    baseline = str(tmp_path / 'baseline.json')
+    args = ['--repeat', '2', '--board', 'empty', '--no-draw', '--baseline', baseline]
+    assert main(args + ['--save-baseline']) == 0, 'wrong exit code'
+    assert main(args + ['--threshold', '1000']) == 0, 'wrong exit code'
+    assert main(args + ['--threshold', '-1']) == 1, 'no regressions'
+    assert main(args + ['--threshold', '-1', '--cells', '64']) == 0, \
+        'compared with baseline of other grid size'
+    with open(baseline) as f:
+        saved = json.load(f)
+    assert saved['meta']['cells'] == 34, 'no grid size in baseline'
+    del saved['meta']['cells']
+    with open(baseline, 'w') as f:
+        json.dump(saved, f)
+    assert main(args + ['--threshold', '-1']) == 0, \
+        'compared with baseline without grid size'
+
+
+def test_stored_baseline() -> None:
+    """Test stored baseline records its grid size
+    """
+    with open(BASELINE) as f:
+        baseline = json.load(f)
+    assert baseline['meta']['cells'] == const.CELLS, 'wrong baseline cells'
+
+
+def test_memory() -> None:
+    """Test memory per board is measured for all grids
+    """
+    result = memory.run(boards=2)
+    assert set(result['results']) >= {'grid', 'bit'}, 'wrong grids'
+    assert result['results']['grid']['bytes_per_board'] > 0, 'wrong bytes'
+
+
+def test_grids() -> None:
+    """Test whole grid paths are timed for all grids
+    """
+    result = grids.run(cells=16, repeat=1)
+    assert 'init/grid' in result['results'], 'wrong cases'
+    assert 'fill/bit' in result['results'], 'wrong cases'
+    assert result['results']['get_frozen/grid']['median_us'] > 0, 'wrong time'
+
+
+def test_search() -> None:
+    """Test placements search speed is measured
+    """
+    result = search.run(repeat=1, boards=['empty'])
+    value = result['results']['empty']
+    assert value['landings'] > 0, 'no landings'
+    assert value['placements_per_second'] > 0, 'wrong speed'
+
+
+def test_startup() -> None:
+    """Test cold import is timed without pyxel
+    """
+    result = startup.run(repeat=1, modules=['kektris.constraints', 'kektris.kektris'])
+    value = result['results']['kektris.kektris']
+    assert value['median_ms'] > 0, 'wrong time'
+    assert not value['pyxel'], 'pyxel imported'
@@ -0,0 +1,212 @@
+import pytest
+from kektris.bitboard import BitGrid, iter_bits, find_runs, find_line_runs
+from kektris.blocks import Cell, Grid, Figure, Window
+from kektris.constraints import FigureOrientation, Direction
+from kektris.geometry import Placement
+
+
+@pytest.fixture(scope='function')
+def bit_grid() -> BitGrid:
+    return BitGrid()
+
+
+def test_iter_bits() -> None:
+    """Test iterate set bits
+    """
+    assert list(iter_bits(0)) == [], 'wrong empty bits'
+    assert list(iter_bits(0b101001)) == [0, 3, 5], 'wrong bits'
+
+
+@pytest.mark.parametrize(
+    'mask,length,result', [
+        (0, 7, 0),
+        (0b1111111, 7, 0b1111111),
+        (0b111111, 7, 0),
+        (0b1111111111 << 3, 7, 0b1111111111 << 3),
+        (0b1111111011111110, 7, 0b1111111011111110),
+        (0b1101111111101, 7, 0b0001111111100),
+        (0b1011, 1, 0b1011),
+        (0b11011, 2, 0b11011),
+            ]
+        )
+def test_find_runs(mask: int, length: int, result: int) -> None:
+    """Test find runs of set bits
+    """
+    assert find_runs(mask, length) == result, 'wrong runs'
+
+
+def test_find_line_runs() -> None:
+    """Test find runs in all lines
+    """
+    masks = [0, 0b1111111, 0b111, 0b11111111 << 20]
+    assert find_line_runs(masks, 7) == {1: 0b1111111, 3: 0b11111111 << 20}, \
+        'wrong runs'
+    assert find_line_runs(masks, 7, [0, 2, 3]) == {3: 0b11111111 << 20}, \
+        'wrong runs of given lines'
+
+
+class TestBitGrid:
+    """Test BitGrid class
+    """
+
+    def test_snapshot(self, bit_grid: BitGrid) -> None:
+        """Test snapshot restores bitmasks
+        """
+        bit_grid.freeze((1, 1))
+        snapshot = bit_grid.snapshot()
+        bit_grid.block((1, 2))
+        bit_grid.freeze_blocked()
+        bit_grid.clear((1, 1))
+        bit_grid.restore(snapshot)
+        assert bit_grid.frozen == {(1, 1)}, 'wrong frozen'
+        assert bit_grid.frozen_cols[1] == 0b10, 'wrong frozen cols'
+        assert bit_grid.frozen_rows[2] == 0, 'wrong frozen rows'
+
+    def test_zobrist(self, bit_grid: BitGrid, grid: Grid) -> None:
+        """Test Zobrist hash is same for every backend
+        """
+        for pos in [(1, 2), (3, 4), (5, 6)]:
+            bit_grid.block(pos)
+            grid.freeze(pos)
+        bit_grid.freeze_blocked()
+        assert bit_grid.zobrist == grid.zobrist, 'wrong hash'
+
+    def test_bit_grid_init(self, bit_grid: BitGrid) -> None:
+        """Test BitGrid initialization
+        """
+        assert bit_grid.cells == 34, 'wrong cells number'
+        assert len(bit_grid.grid) == 34, 'wrong row number'
+        assert len(bit_grid.grid[0]) == 34, 'wrong col number'
+        assert isinstance(bit_grid.grid[0][0], Cell), 'wrong cell'
+        assert bit_grid.grid[17][0].pos == (17, 0), 'wrong cell pos'
+        assert bit_grid.grid[-1][-1].pos == (33, 33), 'wrong negative index'
+        with pytest.raises(IndexError):
+            bit_grid.grid[34]
+
+    def test_get_clear(self, bit_grid: BitGrid) -> None:
+        """Test get clear
+        """
+        assert len(bit_grid.get_clear) == 34 * 34, 'wrong clear cells len'
+        bit_grid.grid[0][0].block()
+        assert len(bit_grid.get_clear) == 34 * 34 - 1, 'wrong clear cells len'
+        assert bit_grid.grid[0][0] not in bit_grid.get_clear, 'wrong clear cells'
+
+    def test_cell_state(self, bit_grid: BitGrid) -> None:
+        """Test cell views change bitmasks
+        """
+        bit_grid.grid[3][5].freeze()
+        assert bit_grid.is_frozen((3, 5)), 'not frozen'
+        assert bit_grid.frozen_rows[5] == 1 << 3, 'wrong row mask'
+        assert bit_grid.frozen_cols[3] == 1 << 5, 'wrong col mask'
+        bit_grid.grid[3][5].block()
+        assert bit_grid.is_blocked((3, 5)), 'not blocked'
+        assert not bit_grid.is_frozen((3, 5)), 'frozen'
+        assert bit_grid.frozen_rows[5] == 0, 'wrong row mask'
+        bit_grid.grid[3][5].clear()
+        assert bit_grid.is_clear((3, 5)), 'not clear'
+        assert bit_grid.grid[3][5].is_clear, 'not clear'
+
+    def test_line_masks(self, bit_grid: BitGrid) -> None:
+        """Test frozen bitmasks are grid line masks
+        """
+        assert bit_grid.frozen_cols is bit_grid.line_masks[0], 'wrong cols'
+        assert bit_grid.frozen_rows is bit_grid.line_masks[1], 'wrong rows'
+        rows = bit_grid.frozen_rows
+        bit_grid.block((4, 7))
+        bit_grid.freeze_blocked()
+        assert bit_grid.frozen_rows is rows, 'rows are reallocated'
+        assert bit_grid.frozen_rows[7] == 1 << 4, 'wrong row mask'
+        assert bit_grid.line_counts[1][7] == 1, 'wrong row count'
+
+    def test_freeze_blocked(self, bit_grid: BitGrid) -> None:
+        """Test freeze blocked
+        """
+        bit_grid.block((0, 0))
+        bit_grid.block((2, 1))
+        assert len(bit_grid.get_blocked) == 2, 'wrong blocked cells len'
+        bit_grid.freeze_blocked()
+        assert len(bit_grid.get_blocked) == 0, 'wrong blocked cells len'
+        assert [c.pos for c in bit_grid.get_frozen] == [(0, 0), (2, 1)], \
+            'wrong frozen cells'
+
+    def test_clear_blocked(self, bit_grid: BitGrid) -> None:
+        """Test clear blocked
+        """
+        bit_grid.block((0, 0))
+        bit_grid.clear_blocked()
+        assert len(bit_grid.get_clear) == 34 * 34, 'wrong clear cells len'
+
+    def test_has_frozen(self, bit_grid: BitGrid) -> None:
+        """Test collision with frozen
+        """
+        bit_grid.freeze((4, 7))
+        assert bit_grid.has_frozen([(0, 0), (4, 7)]), 'not collided'
+        assert not bit_grid.has_frozen([(0, 0), (7, 4)]), 'collided'
+        assert bit_grid.collides(Placement(((4, 7),), ((7, 1 << 4),))), \
+            'not collided'
+        assert not bit_grid.collides(Placement(((7, 4),), ((4, 1 << 7),))), \
+            'collided'
+
+    def test_from_grid(self, grid: Grid) -> None:
+        """Test make bitboard from cells grid
+        """
+        grid.grid[1][2].freeze()
+        grid.grid[3][4].block()
+        bit_grid = BitGrid.from_grid(grid)
+        assert bit_grid.is_frozen((1, 2)), 'not frozen'
+        assert bit_grid.is_blocked((3, 4)), 'not blocked'
+        assert len(bit_grid.get_clear) == 34 * 34 - 2, 'wrong clear cells len'
+
+    def test_figure_on_bit_grid(self, bit_grid: BitGrid) -> None:
+        """Test figure block and collision on bitboard
+        """
+        window = Window((0, 0), FigureOrientation.I_L, bit_grid, Direction.RIGHT)
+        figure = Figure(window)
+        figure.block_figure(window)
+        assert [c.pos for c in bit_grid.get_blocked] == \
+            [(1, 0), (1, 1), (1, 2), (1, 3)], 'wrong blocked'
+        bit_grid.freeze((1, 4))
+        window = figure.move_figure(Direction.DOWN)
+        assert not figure.is_valid_figure(window), 'valid'
+
+    @pytest.mark.parametrize(
+        'pos,result', [
+            ((0, 5), True),
+            ((33, 5), True),
+            ((5, 0), True),
+            ((5, 33), True),
+            ((5, 5), False),
+                ]
+            )
+    def test_has_frozen_border(
+        self,
+        bit_grid: BitGrid,
+        pos: tuple[int, int],
+        result: bool
+            ) -> None:
+        """Test frozen border
+        """
+        bit_grid.freeze(pos)
+        assert bit_grid.has_frozen_border() == result, 'wrong result'
+
+    def test_frozen_border_blocked(self, bit_grid: BitGrid) -> None:
+        """Test frozen border is counted for blocked cells frozen at once
+        """
+        bit_grid.block((5, 33))
+        assert not bit_grid.has_frozen_border(), 'blocked border is frozen'
+        bit_grid.freeze_blocked()
+        assert bit_grid.has_frozen_border(), 'no frozen border'
+        bit_grid.clear((5, 33))
+        assert not bit_grid.has_frozen_border(), 'frozen border after clear'
+
+    def test_positions_indexes(self, bit_grid: BitGrid) -> None:
+        """Test frozen and blocked positions follow bitmasks
+        """
+        bit_grid.block((1, 1))
+        bit_grid.grid[2][2].block()
+        assert bit_grid.blocked == {(1, 1), (2, 2)}, 'wrong blocked index'
+        bit_grid.freeze_blocked()
+        assert bit_grid.frozen == {(1, 1), (2, 2)}, 'wrong frozen index'
+        assert bit_grid.blocked == set(), 'wrong blocked index'
+        bit_grid.clear((1, 1))
+        assert bit_grid.frozen == {(2, 2)}, 'wrong frozen index'
@@ -1,6 +1,7 @@
 import pytest
-from kektris.blocks import Cell, Grid, Figure, Window
-from kektris.constraints import FigureOrientation, Direction
+from kektris.blocks import Cell, CellView, Grid, Figure, Window, WindowCache
+from kektris.constraints import FigureOrientation, Direction, CellState
+from kektris.geometry import get_geometry
 
 
 class TestCell:
@@ -17,8 +18,10 @@ class TestCell:
         """Test cell position
         """
         assert cell.pos == (0, 0), 'wrong position'
-        cell.x = 55
+        with pytest.raises(AttributeError):
+            cell.x = 55
         assert cell.pos == (0, 0), 'wrong position'
+        assert (cell.x, cell.y) == cell.pos, 'wrong coordinates'
 
     def test_cell_state(self, cell: Cell) -> None:
         """Test cell clear
@@ -36,6 +39,22 @@ class TestCell:
         assert not cell.is_frozen, 'wrong state'
         assert not cell.is_blocked, 'wrong state'
 
+    def test_cell_compact(self, cell: Cell) -> None:
+        """Test cell has no dict and shares position
+        """
+        assert not hasattr(cell, '__dict__'), 'cell has dict'
+        assert not hasattr(CellView(Grid(), 0, 0), '__dict__'), 'view has dict'
+        assert cell.pos is Cell(0, 0).pos, 'position not shared'
+        assert cell.pos is get_geometry(34).position(0, 0), 'position not shared'
+        assert Grid().grid[3][4].pos is Grid().grid[3][4].pos, \
+            'position not shared between grids'
+        assert Grid(8).grid[3][4].pos is get_geometry(8).position(3, 4), \
+            'position not shared by geometry'
+        assert Cell(-1, 40).pos == (-1, 40), 'wrong position out of grid'
+        cell.state = CellState.FR0ZEN
+        assert cell.state is CellState.FR0ZEN, 'wrong state'
+        assert Cell(0, 0, CellState.BLOCK).is_blocked, 'wrong init state'
+
     def test_cell_eq(self, cell: Cell) -> None:
         """Test cell equality
         """
@@ -63,6 +82,108 @@ class TestGrid:
         assert grid.grid[17][0].pos == (17, 0), 'wrong cell pos'
         assert grid.grid[17][17].pos == (17, 17), 'wrong cell pos'
 
+    def test_positions_indexes(self, grid: Grid) -> None:
+        """Test frozen and blocked positions follow cells state
+        """
+        assert grid.frozen == set(), 'wrong frozen index'
+        assert grid.blocked == set(), 'wrong blocked index'
+        grid.grid[2][3].freeze()
+        grid.grid[4][5].block()
+        assert grid.frozen == {(2, 3)}, 'wrong frozen index'
+        assert grid.blocked == {(4, 5)}, 'wrong blocked index'
+        grid.grid[2][3].block()
+        assert grid.frozen == set(), 'wrong frozen index'
+        assert grid.blocked == {(2, 3), (4, 5)}, 'wrong blocked index'
+        grid.freeze_blocked()
+        assert grid.frozen == {(2, 3), (4, 5)}, 'wrong frozen index'
+        assert grid.blocked == set(), 'wrong blocked index'
+        grid.set_state((2, 3), CellState.CLEAR)
+        assert grid.frozen == {(4, 5)}, 'wrong frozen index'
+
+    def test_pop_changed(self, grid: Grid) -> None:
+        """Test changed positions
+        """
+        grid.grid[1][1].freeze()
+        grid.grid[2][2].block()
+        grid.grid[2][2].block()
+        assert grid.pop_changed() == {(1, 1), (2, 2)}, 'wrong changed'
+        assert grid.pop_changed() == set(), 'changed not forgotten'
+        grid.clear_blocked()
+        assert grid.pop_changed() == {(2, 2)}, 'wrong changed'
+
+    def test_snapshot(self, grid: Grid) -> None:
+        """Test snapshot is shared and restored by changed cells only
+        """
+        grid.freeze((1, 1))
+        grid.block((2, 2))
+        snapshot = grid.snapshot()
+        assert snapshot.frozen == {(1, 1)}, 'wrong frozen'
+        assert snapshot.blocked == {(2, 2)}, 'wrong blocked'
+        assert grid.snapshot() is snapshot, 'snapshot not shared'
+        grid.pop_changed()
+        grid.freeze_blocked()
+        grid.freeze((3, 3))
+        grid.clear((1, 1))
+        assert grid.snapshot() is not snapshot, 'snapshot not changed'
+        grid.pop_changed()
+        grid.restore(snapshot)
+        assert grid.pop_changed() == {(1, 1), (2, 2), (3, 3)}, 'wrong changed'
+        assert grid.frozen == {(1, 1)}, 'wrong frozen'
+        assert grid.blocked == {(2, 2)}, 'wrong blocked'
+        assert grid.grid[2][2].is_blocked, 'wrong cell'
+        assert grid.line_counts[0][3] == 0, 'wrong line count'
+        assert grid.snapshot() is snapshot, 'snapshot not shared'
+
+    def test_zobrist(self, grid: Grid) -> None:
+        """Test Zobrist hash follows frozen cells only
+        """
+        assert grid.zobrist == 0, 'wrong empty hash'
+        grid.freeze((1, 1))
+        grid.freeze((2, 3))
+        zobrist = grid.zobrist
+        grid.block((5, 5))
+        assert grid.zobrist == zobrist, 'blocked cell hashed'
+        assert grid.zobrist_with([(5, 5), (1, 1)]) != zobrist, 'wrong hash with'
+
+        other = Grid()
+        other.freeze((2, 3))
+        other.block((5, 5))
+        other.freeze_blocked()
+        other.freeze((1, 1))
+        assert other.zobrist_with([]) == other.zobrist, 'wrong hash with'
+        assert grid.zobrist_with([(5, 5), (1, 1)]) == other.zobrist, \
+            'wrong hash of same board'
+        other.clear((5, 5))
+        assert other.zobrist == zobrist, 'wrong hash after clear'
+        snapshot = other.snapshot()
+        other.clear((1, 1))
+        other.restore(snapshot)
+        assert other.zobrist == zobrist, 'wrong hash after restore'
+
+    def test_frozen_border(self, grid: Grid) -> None:
+        """Test frozen border cells are counted on state change
+        """
+        snapshot = grid.snapshot()
+        for pos in [(0, 5), (33, 33), (5, 5)]:
+            grid.freeze(pos)
+        assert grid.frozen_border == 2, 'wrong count'
+        assert grid.has_frozen_border(), 'no frozen border'
+        grid.block((0, 5))
+        assert grid.frozen_border == 1, 'wrong count after block'
+        grid.freeze_blocked()
+        assert grid.frozen_border == 2, 'wrong count after freeze'
+        grid.restore(snapshot)
+        assert grid.frozen_border == 0, 'wrong count after restore'
+        assert not grid.has_frozen_border(), 'frozen border'
+
+    def test_get_frozen_order(self, grid: Grid) -> None:
+        """Test frozen cells are ordered by position
+        """
+        for pos in [(5, 1), (0, 7), (5, 0), (1, 1)]:
+            grid.freeze(pos)
+        assert [cell.pos for cell in grid.get_frozen] == \
+            [(0, 7), (1, 1), (5, 0), (5, 1)], 'wrong order'
+
     def test_get_clear(self, grid: Grid) -> None:
         """Test get clear
         """
@@ -177,9 +298,9 @@ class TestWindow:
         """
         window = Window((-1, -1), FigureOrientation.I_L, grid, Direction.LEFT)
         w = window.get_window
-        assert w[0][0] == None, 'wrong ofgrid cell value'
-        assert w[1][0] == None, 'wrong ofgrid cell value'
-        assert w[0][1] == None, 'wrong ofgrid cell value'
+        assert w[0][0] is None, 'wrong ofgrid cell value'
+        assert w[1][0] is None, 'wrong ofgrid cell value'
+        assert w[0][1] is None, 'wrong ofgrid cell value'
         assert w[1][1].pos == window.grid.grid[0][0].pos, 'wrong grid cell value'
 
     def test_window_get_ofgrid_right_window(self, grid: Grid) -> None:
@@ -187,8 +308,8 @@ class TestWindow:
         """
         window = Window((33, 33), FigureOrientation.I_L, grid, Direction.LEFT)
         w = window.get_window
-        assert w[1][0] == None, 'wrong ofgrid cell value'
-        assert w[0][1] == None, 'wrong ofgrid cell value'
+        assert w[1][0] is None, 'wrong ofgrid cell value'
+        assert w[0][1] is None, 'wrong ofgrid cell value'
         assert w[0][0].pos == window.grid.grid[33][33].pos, 'wrong grid cell value'
 
     def test_map_window(self, grid: Grid) -> None:
@@ -280,6 +401,76 @@ class TestWindow:
         window = Window(top_left, FigureOrientation.I_L, grid, Direction.LEFT)
         assert window.is_on_grid() == result, 'wrong result'
 
+
+class TestWindowCache:
+    """Test window cache
+    """
+
+    def test_grid_cache(self, grid: Grid) -> None:
+        """Test every grid has own cache
+        """
+        assert isinstance(grid.windows, WindowCache), 'wrong cache'
+        assert grid.windows.grid is grid, 'wrong grid'
+        assert Grid().windows is not grid.windows, 'shared cache'
+
+    def test_wiggle(self, grid: Grid) -> None:
+        """Test repeated moves reuse windows
+        """
+        figure = Figure(Window((5, 5), FigureOrientation.T_U, grid, Direction.DOWN))
+        for _ in range(10):
+            figure.block_figure(figure.move_figure(Direction.LEFT))
+            figure.block_figure(figure.move_figure(Direction.RIGHT))
+        assert grid.windows.misses == 2, 'wrong misses'
+        assert grid.windows.hits == 18, 'wrong hits'
+        assert figure.window.top_left == (5, 5), 'wrong position'
+        assert figure.move_figure(Direction.LEFT) is \
+            figure.move_figure(Direction.LEFT), 'not cached'
+        assert figure.rotate_figure(Direction.LEFT) is \
+            figure.rotate_figure(Direction.LEFT), 'not cached'
+
+    def test_lru(self, grid: Grid) -> None:
+        """Test least recently used window is evicted
+        """
+        cache = WindowCache(grid, maxsize=2)
+        first = cache.get((1, 1), FigureOrientation.I_U, Direction.DOWN)
+        cache.get((2, 1), FigureOrientation.I_U, Direction.DOWN)
+        assert cache.get((1, 1), FigureOrientation.I_U, Direction.DOWN) is first, \
+            'not cached'
+        cache.get((3, 1), FigureOrientation.I_U, Direction.DOWN)
+        assert len(cache) == 2, 'wrong size'
+        assert cache.get((1, 1), FigureOrientation.I_U, Direction.DOWN) is first, \
+            'evicted recent'
+        assert cache.misses == 3, 'wrong misses'
+        cache.get((2, 1), FigureOrientation.I_U, Direction.DOWN)
+        assert cache.misses == 4, 'not evicted'
+
+    def test_invalidate(self, grid: Grid) -> None:
+        """Test invalidated and changed windows are made again
+        """
+        window = grid.windows.get((1, 1), FigureOrientation.I_U, Direction.DOWN)
+        grid.windows.invalidate()
+        assert len(grid.windows) == 0, 'not invalidated'
+        assert grid.windows.get((1, 1), FigureOrientation.I_U, Direction.DOWN) \
+            is not window, 'not invalidated'
+        window = grid.windows.get((1, 1), FigureOrientation.I_U, Direction.DOWN)
+        with pytest.raises(AttributeError):
+            window.move_direction = Direction.UP
+        assert grid.windows.get((1, 1), FigureOrientation.I_U, Direction.DOWN) \
+            is window, 'not cached'
+        assert window.move_direction == Direction.DOWN, 'wrong direction'
+
+    def test_not_shared_window(self, grid: Grid) -> None:
+        """Test window made without cache can change move direction
+        """
+        window = Window((1, 1), FigureOrientation.I_U, grid, Direction.DOWN)
+        assert not window.shared, 'shared'
+        assert window.quarter == grid.geometry.quarters[Direction.DOWN].positions, \
+            'wrong quarter'
+        window.move_direction = Direction.UP
+        assert window.quarter == grid.geometry.quarters[Direction.UP].positions, \
+            'quarter is not changed'
+
+
 class TestFigure:
     """Test figure class
     """
@@ -298,10 +489,10 @@ class TestFigure:
         """
         return Figure(window)
 
-    def test_figure_init(self, figure: Figure) -> None:
+    def test_figure_init(self, figure: Figure, window: Window) -> None:
         """Test figure initialization
         """
-        assert figure.shape == figure.window.param.name[0], 'wrong shape'
+        assert figure.window is window, 'wrong window'
 
     def test_is_valid_figure(self, figure: Figure) -> None:
         """Test is_valid_figure method
@@ -365,21 +556,31 @@ class TestFigure:
         else:
             assert not window, 'moved to not accepted side'
 
-    def test_choose_orientation_raise_if_wrong_direction(self, grid: Grid) -> None:
-        """Test choose orientation raise if wrong direction
-        """
-        window = Window((0, 0), FigureOrientation.I_D, grid, Direction.LEFT)
-        figure = Figure(window)
-        with pytest.raises(
-            ValueError,
-            match='Wrong direction!'
-                ):
-            figure._choose_orientation(Direction.DOWN)
-
-    @pytest.mark.skip('TODO: add me')
-    def test_choose_orientation(self, grid: Grid) -> None:
-        """Test choose orientation
-        """
+    def test_rotate_figure_by_table(self, grid: Grid) -> None:
+        """Test rotation follows orientations cycle and raise if wrong direction
+        """
+        figure = Figure(Window((5, 5), FigureOrientation.T_U, grid, Direction.DOWN))
+        names = []
+        for _ in range(4):
+            figure.window = figure.rotate_figure(Direction.RIGHT)
+            names.append(figure.window.orientation.name)
+        assert names == ['T_L', 'T_D', 'T_R', 'T_U'], 'wrong rotations'
+        assert figure.rotate_figure(Direction.LEFT).orientation == \
+            FigureOrientation.T_R, 'wrong left rotation'
+        with pytest.raises(ValueError, match='Wrong direction!'):
+            figure.rotate_figure(Direction.UP)
+
+    def test_kick_figure(self, grid: Grid) -> None:
+        """Test rotation windows with wall kicks never move back
+        """
+        figure = Figure(Window((5, 5), FigureOrientation.I_U, grid, Direction.DOWN))
+        windows = figure.kick_figure(Direction.RIGHT)
+        assert windows[0] is figure.rotate_figure(Direction.RIGHT), 'wrong first'
+        assert [window.top_left for window in windows] == [
+            (5, 5), (4, 5), (6, 5), (3, 5), (7, 5), (5, 6),
+                ], 'wrong kicks'
+        assert {window.orientation for window in windows} == \
+            {FigureOrientation.I_L}, 'wrong orientation'
 
     @pytest.mark.skip('TODO: rewrite me')
     @pytest.mark.parametrize(
@@ -1,4 +1,4 @@
-from kektris.constraints import FigureOrientation
+from kektris.constraints import FigureOrientation, GameConst
 
 
 def test_figure_orientations():
@@ -7,3 +7,17 @@ def test_figure_orientations():
     names = [f.name for f in FigureOrientation]
     includes_names = [i.name for i in FigureOrientation.get_includes()]
     assert names == includes_names, 'wrong includes'
+
+
+def test_lazy_constants():
+    """Test positions tables are made once at first access
+    """
+    quarter = GameConst.LEFT_QUARTER
+    assert GameConst.__dict__['LEFT_QUARTER'] is quarter, 'not replaced'
+    assert GameConst.LEFT_QUARTER is quarter, 'made again'
+    assert len(quarter) == 21 * 34, 'wrong quarter'
+    assert (16, 33) in GameConst.LEFT_QUARTER, 'wrong quarter'
+    assert (17, 0) in GameConst.RIGHT_QUARTER, 'wrong quarter'
+    assert (0, 36) in GameConst.BOTTOM_QUARTER, 'wrong quarter'
+    assert (0, -4) in GameConst.TOP_QUARTER, 'wrong quarter'
+    assert len(GameConst.GAME_OVER_ZONE) == 132, 'wrong game over zone'
@@ -0,0 +1,217 @@
+import subprocess
+import sys
+import pytest
+from kektris.engine import Engine
+from kektris.blocks import Grid, Figure, Window
+from kektris.constraints import Action, Direction, FigureOrientation
+from kektris.constraints import GameConst as const
+from kektris.profiler import PhaseProfiler
+from conftest import FixedSeed
+
+
+@pytest.fixture(scope='function')
+def engine() -> Engine:
+    with FixedSeed(42):
+        return Engine()
+
+
+class TestEngine:
+    """Test headless game engine
+    """
+
+    def test_engine_init(self, engine: Engine) -> None:
+        """Test engine init
+        """
+        assert engine.score == 0, 'wrong score'
+        assert engine.speed == 0, 'wrong speed'
+        assert engine.ticks == 0, 'wrong ticks'
+        assert isinstance(engine.grid, Grid), 'wrong grid'
+        assert isinstance(engine.figure, Figure), 'wrong figure'
+        assert engine.figure.window.top_left == (-4, 21), 'wrong top left'
+        assert engine.figure.window.orientation == FigureOrientation.I_R, \
+            'wrong orientation'
+
+    def test_engine_without_pyxel(self) -> None:
+        """Test engine module does not import pyxel
+        """
+        code = 'import sys, kektris.engine; ' \
+            'assert "pyxel" not in sys.modules; kektris.engine.Engine().step()'
+        subprocess.run([sys.executable, '-c', code], check=True)
+
+    def test_step_gravity(self, engine: Engine) -> None:
+        """Test figure moves by gravity once per game speed ticks
+        """
+        for _ in range(const.GAME_SPEED):
+            engine.step()
+        assert engine.figure.window.top_left == (-4, 21), 'moved early'
+        engine.step()
+        assert engine.figure.window.top_left == (-3, 21), 'not moved'
+        assert engine.frame_count_from_last_move == 0, 'wrong frame count'
+        assert engine.ticks == const.GAME_SPEED + 1, 'wrong ticks'
+
+    def test_step_move(self, engine: Engine) -> None:
+        """Test player move on grid
+        """
+        engine.figure.block_figure(engine.figure.move_figure(Direction.RIGHT))
+        engine.figure.block_figure(engine.figure.move_figure(Direction.RIGHT))
+        assert engine.figure.window.top_left == (-2, 21), 'wrong position'
+        engine.step(Action.MOVE_DOWN)
+        assert engine.figure.window.top_left == (-2, 22), 'not moved'
+        engine.step(Action.MOVE_LEFT)
+        assert engine.figure.window.top_left == (-2, 22), 'moved backward'
+
+    def test_step_rotate(self, engine: Engine) -> None:
+        """Test player rotation on grid
+        """
+        for _ in range(4):
+            engine.figure.block_figure(engine.figure.move_figure(Direction.RIGHT))
+        engine.step(Action.ROTATE_RIGHT)
+        assert engine.figure.window.orientation == FigureOrientation.I_U, \
+            'not rotated'
+        assert len(engine.grid.blocked) == 4, 'wrong blocked'
+
+    def test_step_freeze_and_arrive(self, engine: Engine) -> None:
+        """Test figure freeze in the quarter and new figure arrive
+        """
+        figure = engine.figure
+        for _ in range(30 * (const.GAME_SPEED + 1)):
+            engine.step()
+            if engine.figure is not figure:
+                break
+        assert engine.figure is not figure, 'no new figure'
+        assert engine.grid.frozen == {(16, y) for y in range(21, 25)}, \
+            'wrong frozen'
+        assert not engine.grid.blocked, 'blocked left'
+
+    @pytest.mark.parametrize('wall_kicks,top_left,orientation', [
+        (False, (10, 5), FigureOrientation.I_U),
+        (True, (9, 5), FigureOrientation.I_L),
+            ])
+    def test_step_wall_kicks(
+        self,
+        engine: Engine,
+        wall_kicks: bool,
+        top_left: tuple[int, int],
+        orientation: FigureOrientation,
+            ) -> None:
+        """Test blocked rotation is kicked aside only with wall kicks
+        """
+        engine.wall_kicks = wall_kicks
+        engine.figure = Figure(Window(
+            (10, 5), FigureOrientation.I_U, engine.grid, Direction.DOWN
+                ))
+        engine.grid.freeze((11, 8))
+        engine.step(Action.ROTATE_RIGHT)
+        assert engine.figure.window.top_left == top_left, 'wrong top left'
+        assert engine.figure.window.orientation == orientation, 'wrong orientation'
+
+    def test_step_game_over(self, engine: Engine) -> None:
+        """Test engine does not step after game over
+        """
+        engine.grid.freeze((0, 0))
+        engine.step()
+        assert engine.is_over, 'not over'
+        assert engine.ticks == 0, 'stepped'
+
+    @pytest.mark.parametrize('direction,frozen,line,result', [
+        (
+            Direction.DOWN,
+            [(2, 9), (2, 8), (3, 9), (4, 7)],
+            [(x, 10) for x in range(2, 9)],
+            [(2, 9), (3, 9), (2, 8)],
+                ),
+        (
+            Direction.LEFT,
+            [(21, 0), (22, 0), (21, 1)],
+            [(20, y) for y in range(7)],
+            [(21, 0), (21, 1), (22, 0)],
+                ),
+        # cells behind the line out of grid are not read from other side
+        (Direction.LEFT, [(32, 5)], [(x, 5) for x in range(27, 34)], []),
+        (Direction.RIGHT, [(33, 10)], [(0, y) for y in range(10, 17)], []),
+            ])
+    def test_get_shifted_frozen(
+        self,
+        engine: Engine,
+        direction: Direction,
+        frozen: list[tuple[int, int]],
+        line: list[tuple[int, int]],
+        result: list[tuple[int, int]],
+            ) -> None:
+        """Test frozen cells behind cleared line are shifted
+        """
+        engine.figure.window.move_direction = direction
+        for pos in frozen:
+            engine.grid.freeze(pos)
+        shifted = engine._get_shifted_frozen(line)
+        assert shifted == result, 'wrong shifted'
+        engine._move_shifted_frozen(shifted)
+        assert len(engine.grid.frozen) == len(frozen), 'frozen lost'
+
+    def test_large_grid(self) -> None:
+        """Test engine plays on grid of given size
+        """
+        with FixedSeed(42):
+            engine = type('LargeEngine', (Engine, ), {'cells': 256})()
+        assert engine.grid.cells == 256, 'wrong grid size'
+        assert engine.figure.window.top_left in engine.grid.geometry.arrive, \
+            'wrong arrive'
+        # figure falls to the middle of grid in about 130 gravity moves
+        for _ in range(140 * (const.GAME_SPEED + 1)):
+            engine.step()
+        assert engine.grid.frozen, 'nothing frozen'
+        assert all(0 <= x < 256 and 0 <= y < 256 for x, y in engine.grid.frozen), \
+            'frozen out of grid'
+        assert not engine.is_over, 'over'
+        engine.grid.freeze((0, 255))
+        engine.step()
+        assert engine.is_over, 'not over'
+
+    def test_snapshot(self, engine: Engine) -> None:
+        """Test engine state is restored from snapshot
+        """
+        for _ in range(200):
+            engine.step(Action.MOVE_DOWN)
+        snapshot = engine.snapshot(with_rng=True)
+        state = (
+            set(engine.grid.frozen),
+            set(engine.grid.blocked),
+            engine.figure.window.top_left,
+            engine.score,
+            engine.ticks,
+            engine.frame_count_from_last_move,
+                )
+        for _ in range(300):
+            engine.step(Action.MOVE_UP)
+        steps = [engine.rng.random() for _ in range(3)]
+        engine.restore(snapshot)
+        assert (
+            engine.grid.frozen,
+            engine.grid.blocked,
+            engine.figure.window.top_left,
+            engine.score,
+            engine.ticks,
+            engine.frame_count_from_last_move,
+                ) == state, 'wrong state'
+        assert [engine.rng.random() for _ in range(3)] == steps, 'wrong rng'
+
+        other = Engine()
+        other.restore(snapshot)
+        assert other.grid.frozen == engine.grid.frozen, 'wrong other frozen'
+        assert other.figure.window.grid is other.grid, 'wrong other window'
+        assert other.figure.window.top_left == state[2], 'wrong other figure'
+
+    def test_step_profiler(self, engine: Engine) -> None:
+        """Test step phases are timed by profiler
+        """
+        engine.profiler = PhaseProfiler(size=2000)
+        figure = engine.figure
+        while engine.figure is figure:
+            engine.profiler.start()
+            engine.step()
+            engine.profiler.end_frame()
+        assert all(engine.profiler.phase_times('move')), 'move not timed'
+        assert sum(map(bool, engine.profiler.phase_times('freeze'))) == 1, \
+            'wrong freeze frames'
+        assert engine.profiler.phase_times('clear_rows')[-1] > 0, \
+            'clear rows not timed'
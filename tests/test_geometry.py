@@ -0,0 +1,145 @@
+import pytest
+from kektris.blocks import Grid, Window
+from kektris.constraints import FigureOrientation, Direction, GameConst
+from kektris.geometry import (
+    Geometry,
+    Placement,
+    PlacementTable,
+    QUARTERS,
+    ARRIVE_DIRECTIONS,
+    get_geometry,
+    get_placement_table,
+        )
+
+
+@pytest.mark.parametrize(
+    'direction,quarter', [
+        (Direction.RIGHT, GameConst.LEFT_QUARTER),
+        (Direction.LEFT, GameConst.RIGHT_QUARTER),
+        (Direction.UP, GameConst.BOTTOM_QUARTER),
+        (Direction.DOWN, GameConst.TOP_QUARTER),
+            ]
+        )
+def test_quarters(direction: Direction, quarter: list[tuple[int, int]]) -> None:
+    """Test quarter bounds match quarter constants
+    """
+    assert QUARTERS[direction].positions == quarter, 'wrong positions'
+    for pos in [(-5, 0), (0, -5), (16, 16), (17, 17), (36, 33), (33, 36), (37, 0)]:
+        assert (pos in QUARTERS[direction]) == (pos in quarter), 'wrong membership'
+
+
+def test_arrive_directions() -> None:
+    """Test arrive directions match arrive constants
+    """
+    assert len(ARRIVE_DIRECTIONS) == len(GameConst.ARRIVE), 'wrong len'
+    for pos in GameConst.ARRIVE_LEFT:
+        assert ARRIVE_DIRECTIONS[pos] == Direction.RIGHT, 'wrong direction'
+    for pos in GameConst.ARRIVE_RIGHT:
+        assert ARRIVE_DIRECTIONS[pos] == Direction.LEFT, 'wrong direction'
+    for pos in GameConst.ARRIVE_TOP:
+        assert ARRIVE_DIRECTIONS[pos] == Direction.DOWN, 'wrong direction'
+    for pos in GameConst.ARRIVE_BOTTOM:
+        assert ARRIVE_DIRECTIONS[pos] == Direction.UP, 'wrong direction'
+
+
+class TestGeometry:
+    """Test Geometry class
+    """
+
+    def test_default(self) -> None:
+        """Test geometry of default grid matches game constants
+        """
+        geometry = get_geometry(GameConst.CELLS)
+        assert geometry is get_geometry(GameConst.CELLS), 'not cached'
+        assert geometry.arrive == GameConst.ARRIVE, 'wrong arrive'
+        assert geometry.border == GameConst.GAME_OVER_ZONE, 'wrong border'
+        assert geometry.quarters is QUARTERS, 'wrong quarters'
+        assert geometry.arrive_directions is ARRIVE_DIRECTIONS, 'wrong directions'
+
+    @pytest.mark.parametrize('cells', [16, 35, 256])
+    def test_tables(self, cells: int) -> None:
+        """Test tables are made for grid size
+        """
+        geometry = Geometry(cells)
+        half, last = cells // 2, cells - 1
+        assert len(geometry.arrive) == 4 * (cells - 4), 'wrong arrive len'
+        assert (cells - 5, -4) in geometry.arrive_top, 'wrong arrive'
+        assert geometry.arrive_directions[(cells, 0)] == Direction.LEFT, \
+            'wrong direction'
+        assert len(geometry.border) == 4 * last, 'wrong border len'
+        assert (last, half) in geometry.border, 'wrong border'
+        assert (half - 1, last) in geometry.quarters[Direction.RIGHT], 'wrong quarter'
+        assert (half, 0) not in geometry.quarters[Direction.RIGHT], 'wrong quarter'
+        assert (half, 0) in geometry.quarters[Direction.LEFT], 'wrong quarter'
+        assert (0, cells + 2) in geometry.quarters[Direction.UP], 'wrong quarter'
+        assert (0, -4) in geometry.quarters[Direction.DOWN], 'wrong quarter'
+
+    def test_grid(self) -> None:
+        """Test grid and its windows use geometry of grid size
+        """
+        grid = Grid(256)
+        assert grid.geometry is get_geometry(256), 'wrong geometry'
+        window = Window((256, 100), FigureOrientation.T_U, grid)
+        assert window.move_direction == Direction.LEFT, 'wrong move direction'
+        assert window.in_quarter((128, 255)), 'not in quarter'
+        assert not window.in_quarter((127, 0)), 'in quarter'
+        with pytest.raises(ValueError):
+            Window((34, 0), FigureOrientation.T_U, grid)
+
+
+class TestPlacementTable:
+    """Test PlacementTable class
+    """
+
+    @pytest.fixture(scope='function')
+    def table(self) -> PlacementTable:
+        return PlacementTable(34)
+
+    def test_offsets(self, table: PlacementTable) -> None:
+        """Test orientation offsets
+        """
+        assert table.offsets[FigureOrientation.I_L] == \
+            ((1, 0), (1, 1), (1, 2), (1, 3)), 'wrong offsets'
+        for offsets in table.offsets.values():
+            assert len(offsets) == 4, 'wrong offsets len'
+
+    def test_get(self, table: PlacementTable) -> None:
+        """Test get placement
+        """
+        placement = table.get(FigureOrientation.I_U, (-1, 0))
+        assert isinstance(placement, Placement), 'wrong type'
+        assert placement.positions == ((0, 1), (1, 1), (2, 1)), 'wrong positions'
+        assert placement.rows == ((1, 0b111),), 'wrong rows'
+        assert placement.size == 3, 'wrong size'
+        assert table.get(FigureOrientation.I_U, (-1, 0)) is placement, \
+            'not reused'
+
+    def test_get_out_of_grid(self, table: PlacementTable) -> None:
+        """Test placement out of grid
+        """
+        placement = table.get(FigureOrientation.I_L, (-4, 0))
+        assert placement.positions == (), 'wrong positions'
+        assert placement.rows == (), 'wrong rows'
+
+    def test_get_placement_table(self) -> None:
+        """Test table made once per grid size
+        """
+        assert get_placement_table(34) is get_placement_table(34), 'not cached'
+        assert get_placement_table(34) is not get_placement_table(40), 'shared'
+
+    @pytest.mark.parametrize('orientation', FigureOrientation.get_includes())
+    @pytest.mark.parametrize('top_left', [(-3, -2), (0, 0), (15, 17), (31, 32)])
+    def test_placement_is_window_map(
+        self,
+        grid: Grid,
+        orientation: FigureOrientation,
+        top_left: tuple[int, int],
+            ) -> None:
+        """Test placement equal to cells mapped by window
+        """
+        window = Window(top_left, orientation, grid, Direction.LEFT)
+        expected = []
+        for maps, cells in zip(orientation.value, window.get_window):
+            expected.extend(cell.pos for m, cell in zip(maps, cells) if cell and m)
+        assert list(window.placement.positions) == expected, 'wrong placement'
+        assert [cell.pos for cell in window.map_window] == expected, 'wrong map'
@@ -1,4 +1,7 @@
+import subprocess
+import sys
 import pytest
+import pyxel
 from kektris.kektris import Game
 from kektris.blocks import Grid, Figure
 from kektris.constraints import FigureOrientation, Direction
@@ -18,6 +21,48 @@ class TestGame:
         assert isinstance(make_app.grid, Grid), 'wrong grid'
         assert not make_app.grid_higlight, 'grid highlited'
 
+    def test_import_without_pyxel(self) -> None:
+        """Test pyxel is imported only, when game starts
+        """
+        code = 'import sys, kektris.kektris; assert "pyxel" not in sys.modules'
+        subprocess.run([sys.executable, '-c', code], check=True)
+
+    def test_toggle_profiler(self, make_app: Game) -> None:
+        """Test profiler is started at first show of frame times
+        """
+        assert not make_app.profiler.enabled, 'profiler enabled'
+        make_app._toggle_profiler()
+        assert make_app.profiler.enabled, 'profiler disabled'
+        assert make_app.show_profiler, 'hidden'
+        profiler = make_app.profiler
+        make_app._toggle_profiler()
+        assert make_app.profiler is profiler, 'new profiler'
+        assert not make_app.show_profiler, 'shown'
+
+    def test_quit_dumps_profile(self, make_app: Game, monkeypatch, tmp_path) -> None:
+        """Test profiler csv is written on exit
+        """
+        monkeypatch.setattr(pyxel, 'quit', lambda: None)
+        make_app.profile_csv = str(tmp_path / 'profile.csv')
+        make_app._quit()
+        assert not (tmp_path / 'profile.csv').exists(), 'written without profiler'
+        make_app._toggle_profiler()
+        make_app.profiler.end_frame()
+        make_app._quit()
+        assert (tmp_path / 'profile.csv').read_text().count('\n') == 2, \
+            'wrong csv'
+
+    def test_escape_quits_with_dump(self, make_app: Game, monkeypatch) -> None:
+        """Test Esc quits by game quit, which writes profiler csv and replay
+        """
+        def quit() -> None:
+            raise SystemExit
+
+        monkeypatch.setattr(pyxel, 'btnp', lambda key: key == pyxel.KEY_ESCAPE)
+        monkeypatch.setattr(make_app, '_quit', quit)
+        with pytest.raises(SystemExit):
+            make_app.update()
+
     def test_generate_figure_start_position(self, make_app: Game) -> None:
         """Test random figure generation
         """
@@ -38,36 +83,6 @@ class TestGame:
             assert figure.window.orientation == FigureOrientation.I_R, \
                 'wrong orientation'
 
-    def test_get_chunked(self, make_app: Game) -> None:
-        """Test get chunked
-        """
-        i = [1, 2, 3]
-        line, chunked = make_app.get_chunked(i, [])
-        assert not line, 'line nt empty'
-        assert isinstance(line, list), 'wrong line type'
-        assert isinstance(chunked, list), 'wrong chunked type'
-        assert len(chunked) == 1, 'wrong chunked len'
-        assert chunked[0] == [3, 2, 1], 'wrong chunk'
-
-    @pytest.mark.parametrize(
-        'i,ch', [
-            ([1, 2, 3, 4, 5, 6, 8, 9], [[6, 5, 4, 3, 2, 1], [9, 8]]),
-            ([1, 3], [[1], [3]]),
-            ([1, 2, 5, 6, 8, 9], [[2, 1], [6, 5], [9, 8]])
-                    ]
-                )
-    def test_get_chunked_parts(self, make_app: Game, i: list[int], ch: list[list[int]]) -> None:
-        """Test get chunked multiple parts
-        """
-        line, chunked = make_app.get_chunked(i, [])
-        assert not line, 'line nt empty'
-        assert isinstance(line, list), 'wrong line type'
-        assert isinstance(chunked, list), 'wrong chunked type'
-        assert len(chunked) == len(ch), 'wrong chunked len'
-        assert isinstance(chunked[0], list), 'wrong chunk type'
-        assert chunked[0] == ch[0], 'wrong chunked'
-        assert chunked[1] == ch[1], 'wrong chunked'
-
     @pytest.mark.parametrize(
         'frozen,result,ost', [
             (
@@ -93,9 +108,8 @@ class TestGame:
         """
         for p in frozen:
             make_app.grid.grid[p[0]][p[1]].freeze()
-        frozen_pos = [p.pos for p in make_app.grid.get_frozen]
         assert len(make_app.grid.get_frozen) == len(frozen), 'wrong frozen'
-        line = make_app._check_line(1, frozen_pos)
+        line = make_app._check_line(1)
         assert isinstance(line, list), 'wrong line type'
         assert isinstance(line[0], tuple), 'wrong pos'
         assert line == result, 'wrong comparison'
@@ -112,12 +126,41 @@ class TestGame:
             make_app.grid.grid[p][0].freeze()
         frozen_pos = [p.pos for p in make_app.grid.get_frozen]
         assert len(make_app.grid.get_frozen) == 15, 'wrong frozen'
-        line = make_app._check_line(1, frozen_pos)
+        line = make_app._check_line(1)
         assert isinstance(line, list), 'wrong line type'
         assert isinstance(line[0], tuple), 'wrong pos'
         assert len(line) == 12, 'wrong line lenght'
         assert frozen_pos[0:12] == line, 'wrong comparison'
 
+    def test_check_line_only_dirty(self, make_app: Game) -> None:
+        """Test only lines with new frozen cells are checked
+        """
+        for p in range(7):
+            make_app.grid.grid[p][0].freeze()
+        assert make_app.grid.line_counts[1][0] == 7, 'wrong row count'
+        assert make_app.grid.line_counts[0][0] == 1, 'wrong col count'
+        assert make_app.grid.dirty_lines[1] == {0}, 'wrong dirty rows'
+        make_app.grid.dirty_lines[1].clear()
+        assert make_app._check_line(1) is None, 'not dirty checked'
+        make_app.grid.grid[8][0].freeze()
+        assert make_app._check_line(1) == \
+            [(p, 0) for p in range(7)], 'wrong line'
+        make_app.grid.grid[3][0].clear()
+        assert make_app._check_line(1) is None, 'wrong line'
+        assert make_app.grid.dirty_lines[1] == set(), 'checked line is dirty'
+
+    def test_clear_rows(self, make_app: Game) -> None:
+        """Test clear rows and shift frozen
+        """
+        make_app.figure.window.move_direction = Direction.DOWN
+        for p in range(7):
+            make_app.grid.grid[p][10].freeze()
+        make_app.grid.grid[3][9].freeze()
+        make_app._clear_rows()
+        assert make_app.grid.frozen == {(3, 10)}, 'wrong frozen'
+        assert make_app.score == 700, 'wrong score'
+        assert make_app.lines == 1, 'wrong lines'
+
     def test_get_shift(self, make_app: Game) -> None:
         """Test get shift for frozen cells
         """
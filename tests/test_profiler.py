@@ -0,0 +1,99 @@
+import csv
+import pytest
+from kektris.profiler import PhaseProfiler, NullProfiler, NULL_PROFILER, PHASES
+
+
+class FakeTimer:
+    """Timer, which moves by given steps
+    """
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(scope='function')
+def timer() -> FakeTimer:
+    return FakeTimer()
+
+
+@pytest.fixture(scope='function')
+def profiler(timer: FakeTimer) -> PhaseProfiler:
+    return PhaseProfiler(size=4, phases=('a', 'b'), timer=timer)
+
+
+def play_frame(profiler: PhaseProfiler, timer: FakeTimer, a: float, b: float) -> None:
+    profiler.start()
+    timer.now += a
+    profiler.lap('a')
+    timer.now += b
+    profiler.lap('b')
+    profiler.end_frame()
+
+
+class TestPhaseProfiler:
+    """Test phase profiler
+    """
+
+    def test_null_profiler(self) -> None:
+        """Test null profiler is disabled
+        """
+        assert isinstance(NULL_PROFILER, NullProfiler), 'wrong null profiler'
+        assert not NULL_PROFILER.enabled, 'enabled'
+        NULL_PROFILER.start()
+        NULL_PROFILER.lap('move')
+        NULL_PROFILER.end_frame()
+        assert PhaseProfiler().phases == PHASES, 'wrong phases'
+
+    def test_laps(self, profiler: PhaseProfiler, timer: FakeTimer) -> None:
+        """Test laps are added to frame phases
+        """
+        profiler.start()
+        timer.now += 1
+        profiler.lap('a')
+        timer.now += 2
+        profiler.lap('b')
+        timer.now += 3
+        profiler.lap('a')
+        timer.now += 10
+        profiler.start()
+        profiler.end_frame()
+        assert profiler.phase_times('a') == [4], 'wrong phase a'
+        assert profiler.phase_times('b') == [2], 'wrong phase b'
+        assert profiler.frame_times() == [6], 'wrong frame'
+
+    def test_ring_buffer(self, profiler: PhaseProfiler, timer: FakeTimer) -> None:
+        """Test only last frames are kept in order
+        """
+        for n in range(6):
+            play_frame(profiler, timer, n, 1)
+        assert profiler.frames == 6, 'wrong frames'
+        assert profiler.phase_times('a') == [2, 3, 4, 5], 'wrong order'
+        assert profiler.frame_times() == [3, 4, 5, 6], 'wrong frames'
+
+    def test_percentile(self, profiler: PhaseProfiler, timer: FakeTimer) -> None:
+        """Test nearest rank percentiles
+        """
+        assert profiler.percentile(50) == 0, 'wrong empty'
+        for a in [4, 1, 3, 2]:
+            play_frame(profiler, timer, a, 0)
+        assert profiler.percentile(50) == 2, 'wrong p50'
+        assert profiler.percentile(99) == 4, 'wrong p99'
+        assert profiler.percentile(0, 'a') == 1, 'wrong p0'
+        assert profiler.percentile(99, 'b') == 0, 'wrong phase p99'
+
+    def test_dump_csv(self, profiler: PhaseProfiler, timer: FakeTimer, tmp_path) -> None:
+        """Test csv in milliseconds
+        """
+        for n in range(5):
+            play_frame(profiler, timer, 0.001 * n, 0.002)
+        path = tmp_path / 'profile.csv'
+        profiler.dump_csv(str(path))
+        with open(path) as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == ['frame', 'a', 'b', 'total'], 'wrong header'
+        assert len(rows) == 5, 'wrong rows'
+        assert rows[1][0] == '1', 'wrong first frame'
+        assert float(rows[-1][1]) == pytest.approx(4), 'wrong phase time'
+        assert float(rows[-1][3]) == pytest.approx(6), 'wrong total'
@@ -0,0 +1,121 @@
+import random
+import pytest
+from kektris.engine import Engine
+from kektris.constraints import Action
+from kektris.replay import (
+    Replay,
+    Recorder,
+    Player,
+    pack_state,
+    unpack_state,
+    main,
+        )
+
+
+@pytest.fixture(scope='module')
+def recorder() -> Recorder:
+    recorder = Recorder(Engine(), seed=11, keyframe_interval=500)
+    rng = random.Random(0)
+    actions = list(Action)
+    for _ in range(2600):
+        recorder.step(rng.choice(actions))
+    return recorder
+
+
+def play(
+    replay: Replay,
+    ticks: int,
+    engine_class: type[Engine] = Engine,
+        ) -> Engine:
+    """Play replay from the start without keyframes
+    """
+    engine = engine_class(random.Random(replay.seed))
+    for action in replay.actions[:ticks]:
+        engine.step(Action(action))
+    return engine
+
+
+class TestReplay:
+    """Test replay recording and playback
+    """
+
+    def test_record(self, recorder: Recorder) -> None:
+        """Test actions and keyframes are recorded
+        """
+        replay = recorder.replay
+        assert replay.seed == 11, 'wrong seed'
+        assert replay.ticks == 2600, 'wrong ticks'
+        assert sorted(replay.keyframes) == [0, 500, 1000, 1500, 2000, 2500], \
+            'wrong keyframes'
+
+    def test_state(self, recorder: Recorder) -> None:
+        """Test state is restored from bytes
+        """
+        data = pack_state(recorder.engine, 7)
+        engine = Engine(random.Random(0))
+        assert unpack_state(engine, data) == 7, 'wrong tick'
+        assert pack_state(engine, 7) == data, 'wrong state'
+        assert engine.grid.frozen == recorder.engine.grid.frozen, 'wrong frozen'
+        assert engine.grid.blocked == recorder.engine.grid.blocked, \
+            'wrong blocked'
+        assert engine.figure.window.top_left == \
+            recorder.engine.figure.window.top_left, 'wrong figure'
+        assert engine.rng.getstate() == recorder.engine.rng.getstate(), \
+            'wrong rng'
+
+    def test_fast_forward(self, recorder: Recorder) -> None:
+        """Test playback ends in recorded state
+        """
+        player = Player(recorder.replay)
+        player.fast_forward()
+        assert player.tick == 2600, 'wrong tick'
+        assert not player.step(), 'played after end'
+        assert pack_state(player.engine, 0) == pack_state(recorder.engine, 0), \
+            'wrong state'
+
+    @pytest.mark.parametrize('tick', [0, 1, 499, 500, 1234, 2600, 9999])
+    def test_seek(self, recorder: Recorder, tick: int) -> None:
+        """Test seek gives the same state as playing from the start
+        """
+        player = Player(recorder.replay)
+        player.seek(2200)
+        player.seek(tick)
+        tick = min(tick, 2600)
+        assert player.tick == tick, 'wrong tick'
+        assert pack_state(player.engine, tick) == \
+            pack_state(play(recorder.replay, tick), tick), 'wrong state'
+
+    def test_bytes(self, recorder: Recorder, tmp_path) -> None:
+        """Test replay serialization
+        """
+        data = recorder.replay.to_bytes()
+        assert Replay.from_bytes(data) == recorder.replay, 'wrong replay'
+        assert len(data) < 2600 + 6 * 3000, 'replay is too big'
+        with pytest.raises(ValueError):
+            Replay.from_bytes(b'XXXX' + data[4:])
+        path = str(tmp_path / 'game.krpl')
+        recorder.replay.save(path)
+        assert Replay.load(path) == recorder.replay, 'wrong loaded replay'
+        main([path, '--seek', '100'])
+
+    def test_large_grid(self, tmp_path) -> None:
+        """Test replay of grid bigger than default keeps its size
+        """
+        engine_class = type('LargeEngine', (Engine, ), {'cells': 200})
+        recorder = Recorder(engine_class(), seed=5, keyframe_interval=100)
+        rng = random.Random(0)
+        for _ in range(300):
+            recorder.step(rng.choice(list(Action)))
+        replay = Replay.from_bytes(recorder.replay.to_bytes())
+        assert replay.cells == 200, 'wrong grid size'
+        player = Player(replay, engine_class)
+        player.seek(250)
+        assert pack_state(player.engine, 250) == \
+            pack_state(play(replay, 250, engine_class), 250), 'wrong state'
+        with pytest.raises(ValueError):
+            Player(replay)
+        with pytest.raises(ValueError):
+            unpack_state(Engine(), replay.keyframes[100])
+        path = str(tmp_path / 'large.krpl')
+        replay.save(path)
+        main([path, '--seek', '150'])
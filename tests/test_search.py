@@ -0,0 +1,162 @@
+import random
+import pytest
+from kektris.blocks import Figure, Window
+from kektris.constraints import Action, Direction, FigureOrientation
+from kektris.engine import Engine
+from kektris.geometry import ROTATED
+from kektris.search import (
+    PlacementSearch,
+    TranspositionTable,
+    find_landings,
+    get_moves_table,
+        )
+
+
+@pytest.fixture(scope='function')
+def engine() -> Engine:
+    engine = Engine(random.Random(3))
+    rng = random.Random(0)
+    for _ in range(500):
+        engine.step(rng.choice(list(Action)))
+    return engine
+
+
+class TestPlacementSearch:
+    """Test reachable placements search
+    """
+
+    def test_rotated(self, grid) -> None:
+        """Test rotations table follows figure rotation
+        """
+        for (orientation, direction), rotated in ROTATED.items():
+            figure = Figure(Window((15, 1), orientation, grid, Direction.DOWN))
+            window = figure.rotate_figure(direction)
+            assert window.orientation == ROTATED[(orientation, direction)], \
+                'wrong rotation'
+            assert rotated.name[0] == orientation.name[0], 'wrong figure'
+            back = Direction.LEFT if direction == Direction.RIGHT else Direction.RIGHT
+            assert ROTATED[(rotated, back)] == orientation, 'wrong back rotation'
+
+    def test_moves_table(self) -> None:
+        """Test moves of window
+        """
+        table = get_moves_table(34, Direction.DOWN)
+        assert get_moves_table(34, Direction.DOWN) is table, 'table not shared'
+        moves = table.get(((15, 1), FigureOrientation.T_U))
+        assert [action for action, _ in moves.actions] == [
+            Action.MOVE_LEFT,
+            Action.MOVE_RIGHT,
+            Action.MOVE_DOWN,
+            Action.ROTATE_LEFT,
+            Action.ROTATE_RIGHT,
+                ], 'wrong actions'
+        assert moves.gravity == ((15, 2), FigureOrientation.T_U), 'wrong gravity'
+        assert table.get(((15, 15), FigureOrientation.I_U)).gravity is None, \
+            'gravity out of quarter'
+        assert table.get(((-4, 1), FigureOrientation.T_U)).actions == (), \
+            'moves out of grid'
+
+    def test_landings_are_resting(self, engine: Engine) -> None:
+        """Test landings are unique and can not fall further
+        """
+        landings = find_landings(engine)
+        assert landings, 'no landings'
+        keys = [(landing.window.top_left, landing.window.orientation) for landing in landings]
+        assert len(set(keys)) == len(keys), 'duplicated landings'
+        assert [len(landing.path) for landing in landings] == \
+            sorted(len(landing.path) for landing in landings), 'wrong order'
+        for landing in landings:
+            figure = Figure(landing.window)
+            assert figure.is_valid_figure(landing.window), 'invalid landing'
+            assert not figure.is_valid_figure(
+                figure.move_figure(landing.window.move_direction)
+                    ), 'landing can fall'
+
+    def test_paths(self, engine: Engine) -> None:
+        """Test engine steps by landing path freeze figure in landing
+        """
+        landings = find_landings(engine)
+        for landing in landings:
+            snapshot = engine.snapshot(with_rng=True)
+            figure = engine.figure
+            for action in landing.path[:-1]:
+                engine.step(action)
+                assert engine.figure is figure, 'figure frozen before path end'
+            frozen = set(engine.grid.frozen)
+            engine.step(landing.path[-1])
+            assert engine.figure is not figure, 'figure not frozen'
+            assert engine.grid.frozen - frozen == \
+                set(landing.window.placement.positions), 'wrong frozen cells'
+            engine.restore(snapshot)
+
+    def test_unique(self) -> None:
+        """Test landings freezing the same cells are kept once
+        """
+        engine = Engine(random.Random(0))
+        engine.figure = Figure(Window(
+            (15, 1), FigureOrientation.I_U, engine.grid, Direction.DOWN
+                ))
+        landings = find_landings(engine)
+        unique = find_landings(engine, unique=True)
+        cells = {frozenset(landing.window.placement.positions) for landing in landings}
+        assert len(unique) == len(cells) < len(landings), 'wrong unique landings'
+        assert unique[0] == landings[0], 'wrong first landing'
+
+    def test_wall_kicks(self, engine: Engine) -> None:
+        """Test paths with wall kicks, which engine has
+        """
+        engine.wall_kicks = True
+        search = PlacementSearch(engine)
+        assert search.table.wall_kicks, 'wrong table'
+        assert search.table is not PlacementSearch(Engine()).table, 'shared table'
+        self.test_paths(engine)
+
+    def test_game_over(self, engine: Engine) -> None:
+        """Test no landings after game over
+        """
+        engine.grid.freeze((0, 0))
+        engine.step()
+        assert PlacementSearch(engine).find() == [], 'landings after game over'
+
+    def test_frozen_border_before_step(self, engine: Engine) -> None:
+        """Test no landings after freeze on border before engine step
+        """
+        engine.grid.freeze((0, 0))
+        assert not engine.is_over, 'game over before step'
+        assert PlacementSearch(engine).find() == [], 'landings on frozen border'
+
+
+class TestTranspositionTable:
+    """Test transposition table
+    """
+
+    def test_lru(self) -> None:
+        """Test least recently used result is dropped
+        """
+        table = TranspositionTable(maxsize=2)
+        assert table.get(1) is None, 'wrong missing result'
+        table.put(1, 'a')
+        table.put(2, 'b')
+        assert table.get(1) == 'a', 'wrong result'
+        table.put(3, 'c')
+        assert len(table) == 2, 'wrong size'
+        assert table.get(2, 'x') == 'x', 'not dropped'
+        assert table.get(1) == 'a', 'dropped recent'
+        assert (table.hits, table.misses) == (2, 2), 'wrong stats'
+        table.clear()
+        assert len(table) == 0, 'not cleared'
+
+    def test_board_keys(self, engine: Engine) -> None:
+        """Test boards after different move orders share results
+        """
+        table = TranspositionTable()
+        for landing in find_landings(engine):
+            snapshot = engine.snapshot(with_rng=True)
+            for action in landing.path:
+                engine.step(action)
+            key = engine.grid.zobrist
+            if table.get(key) is None:
+                table.put(key, frozenset(engine.grid.frozen))
+            assert table.get(key) == engine.grid.frozen, 'wrong board'
+            engine.restore(snapshot)
+        assert len(table) <= table.hits, 'wrong hits'
@@ -0,0 +1,74 @@
+import random
+import pytest
+from kektris.engine import Engine
+from kektris.constraints import Action
+from kektris.tournament import (
+    GameResult,
+    PolicyStats,
+    POLICIES,
+    play_game,
+    random_policy,
+    run_tournament,
+    format_stats,
+    main,
+        )
+
+
+def test_engine_own_stream() -> None:
+    """Test engines with same seeded streams get same figures
+    """
+    first, second = Engine(random.Random(3)), Engine(random.Random(3))
+    assert first.figure.window.top_left == second.figure.window.top_left, \
+        'wrong top left'
+    assert first.figure.window.orientation == second.figure.window.orientation, \
+        'wrong orientation'
+    state = random.getstate()
+    Engine(random.Random(3))
+    assert random.getstate() == state, 'global random used'
+
+
+@pytest.mark.parametrize('name', list(POLICIES))
+def test_play_game(name: str) -> None:
+    """Test seeded games are reproducible
+    """
+    result = play_game(name, POLICIES[name], 7, 2000)
+    assert isinstance(result, GameResult), 'wrong result'
+    assert result == play_game(name, POLICIES[name], 7, 2000), \
+        'not reproducible'
+    assert 0 < result.ticks <= 2000, 'wrong ticks'
+
+
+def test_random_policy() -> None:
+    """Test random policy uses own stream
+    """
+    rng = random.Random(1)
+    actions = {random_policy(Engine(), rng) for _ in range(100)}
+    assert actions == set(Action), 'wrong actions'
+
+
+def test_run_tournament() -> None:
+    """Test tournament results do not depend on processes
+    """
+    policies = {'random': POLICIES['random'], 'drop': POLICIES['drop']}
+    stats, results = run_tournament(policies, 3, seed=5, max_ticks=1000, workers=1)
+    pooled, pooled_results = run_tournament(
+        policies, 3, seed=5, max_ticks=1000, workers=2
+            )
+    assert results == pooled_results, 'wrong pooled results'
+    assert stats == pooled, 'wrong pooled stats'
+    assert [s.policy for s in stats] == ['random', 'drop'], 'wrong policies'
+    assert [r.seed for r in results[:3]] == [5, 6, 7], 'wrong seeds'
+    assert isinstance(stats[0], PolicyStats), 'wrong stats'
+    assert stats[0].games == 3, 'wrong games'
+    assert stats[0].mean_ticks == sum(r.ticks for r in results[:3]) / 3, \
+        'wrong mean ticks'
+    assert 'random' in format_stats(stats), 'wrong format'
+
+
+def test_main(capsys) -> None:
+    """Test command line
+    """
+    main(['idle', '--games', '1', '--max-ticks', '100', '--workers', '1'])
+    assert 'idle' in capsys.readouterr().out, 'wrong output'
+    with pytest.raises(SystemExit):
+        main(['unknown'])